@@ -0,0 +1,208 @@
+"""
+Seeded generators of synthetic data files for the benchmarks. The same seed and size always give the same file. Csv
+files are generated in blocks of rows with numpy, so that files with 10^7 rows are written in reasonable time without
+holding them in memory.
+"""
+import json
+import random
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 10 ** 6  # rows generated and written at once
+WORD_LIST = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa", "lambda",
+             "mu", "nu", "xi", "omicron", "pi", "rho", "sigma", "tau", "upsilon", "phi", "chi", "psi", "omega"]
+WORDS = np.array(WORD_LIST)
+CATEGORIES = np.array(["red", "green", "blue", "yellow", "black"])
+
+
+def iter_blocks(n_rows: int) -> Iterator[int]:
+    """
+    :param n_rows: total number of rows
+    :return: iterator over the number of rows of each block
+    """
+    for start in range(0, n_rows, BLOCK_SIZE):
+        yield min(BLOCK_SIZE, n_rows - start)
+
+
+def random_dates(rng: np.random.Generator, n: int) -> np.ndarray:
+    """
+    :return: n random datetimes with second resolution between 1990 and 2030
+    """
+    return np.datetime64("1990-01-01T00:00:00") + rng.integers(0, 40 * 365 * 86400, n).astype("timedelta64[s]")
+
+
+def random_text(rng: np.random.Generator, n: int, n_words: int = 3) -> pd.Series:
+    """
+    :return: n random texts of n_words words each
+    """
+    words = pd.DataFrame(WORDS[rng.integers(0, len(WORDS), (n, n_words))])
+    return words.agg(" ".join, axis=1)
+
+
+def with_missing(rng: np.random.Generator, values: pd.Series, fraction: float) -> pd.Series:
+    """
+    :return: values with a random fraction of them replaced by empty values
+    """
+    return values.where(rng.random(len(values)) >= fraction, "")
+
+
+def write_blocks(fpath: str, blocks: Iterator[pd.DataFrame]) -> None:
+    """
+    Write data frames as consecutive rows of one csv file with the header of the first one
+    """
+    for i, block in enumerate(blocks):
+        block.to_csv(fpath, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+
+def generate_tall_csv(fpath: str, n_rows: int, seed: int = 0) -> None:
+    """
+    Generate a csv file with many rows of the common column types: integers, decimals, booleans, categories, dates and
+    short texts with missing values
+
+    :param fpath: path of the csv file
+    :param n_rows: number of rows
+    :param seed: random seed
+    """
+    rng = np.random.default_rng(seed)
+
+    def blocks():
+        offset = 0
+        for n in iter_blocks(n_rows):
+            yield pd.DataFrame({
+                "id": np.arange(offset, offset + n),
+                "amount": np.round(rng.normal(100, 50, n), 2),
+                "count": rng.integers(0, 1000, n),
+                "flag": rng.integers(0, 2, n),
+                "category": CATEGORIES[rng.integers(0, len(CATEGORIES), n)],
+                "date": random_dates(rng, n).astype("datetime64[D]").astype(str),
+                "comment": with_missing(rng, random_text(rng, n, 2), 0.1),
+            })
+            offset += n
+    write_blocks(fpath, blocks())
+
+
+def generate_wide_csv(fpath: str, n_rows: int, n_columns: int = 10 ** 4, seed: int = 0) -> None:
+    """
+    Generate a csv file with many columns that cycle through integer, decimal and categorical columns
+
+    :param fpath: path of the csv file
+    :param n_rows: number of rows
+    :param n_columns: number of columns
+    :param seed: random seed
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i in range(n_columns):
+        if i % 3 == 0:
+            columns[f"int_{i}"] = rng.integers(-1000, 1000, n_rows)
+        elif i % 3 == 1:
+            columns[f"float_{i}"] = np.round(rng.random(n_rows) * 100, 3)
+        else:
+            columns[f"cat_{i}"] = CATEGORIES[rng.integers(0, len(CATEGORIES), n_rows)]
+    pd.DataFrame(columns).to_csv(fpath, index=False)
+
+
+def generate_string_date_csv(fpath: str, n_rows: int, seed: int = 0) -> None:
+    """
+    Generate a csv file of string and date columns, which are matched against the regular expressions of the literals
+
+    :param fpath: path of the csv file
+    :param n_rows: number of rows
+    :param seed: random seed
+    """
+    rng = np.random.default_rng(seed)
+
+    def blocks():
+        for n in iter_blocks(n_rows):
+            datetimes = pd.Series(random_dates(rng, n).astype(str))
+            yield pd.DataFrame({
+                "date": datetimes.str[:10],
+                "datetime": datetimes,
+                "datetime_tz": datetimes + "Z",
+                "time": datetimes.str[11:] + "+01:00",
+                "uk_date": datetimes.str[8:10] + "/" + datetimes.str[5:7] + "/" + datetimes.str[:4],
+                "text": random_text(rng, n, 5),
+                "optional_text": with_missing(rng, random_text(rng, n, 1), 0.5),
+            })
+    write_blocks(fpath, blocks())
+
+
+def generate_cardinality_csv(fpath: str, n_rows: int, seed: int = 0) -> None:
+    """
+    Generate a csv file with columns of high cardinality (unique keys), medium cardinality and low cardinality
+    (categorical)
+
+    :param fpath: path of the csv file
+    :param n_rows: number of rows
+    :param seed: random seed
+    """
+    rng = np.random.default_rng(seed)
+
+    def blocks():
+        for n in iter_blocks(n_rows):
+            yield pd.DataFrame({
+                "key": pd.Series(rng.integers(0, 2 ** 62, n)).map("{:016x}".format),
+                "user": "user_" + pd.Series(rng.integers(0, 1000, n)).astype(str),
+                "country": pd.Series(np.array(["DE", "FR", "IT", "ES", "NL", "PL"])[rng.integers(0, 6, n)]),
+                "status": CATEGORIES[rng.integers(0, 3, n)],
+                "number": rng.integers(0, 10 ** 9, n),
+            })
+    write_blocks(fpath, blocks())
+
+
+def generate_nested_record(rng: random.Random, depth: int) -> dict:
+    """
+    :return: random json object nested depth levels deep, with optional keys and mixed types at every level
+    """
+    record = {"id": rng.randrange(10 ** 6), "name": rng.choice(WORD_LIST),
+              "tags": [rng.choice(WORD_LIST) for _ in range(rng.randrange(4))]}
+    if rng.random() < 0.5:
+        record["score"] = round(rng.random(), 3) if rng.random() < 0.8 else None
+    if depth > 0:
+        record["child"] = generate_nested_record(rng, depth - 1)
+        if rng.random() < 0.2:
+            record["children"] = [generate_nested_record(rng, depth - 1)]
+    return record
+
+
+def generate_nested_json(fpath: str, n_rows: int, depth: int = 8, seed: int = 0) -> None:
+    """
+    Generate a json file with an array of deeply nested records
+
+    :param fpath: path of the json file
+    :param n_rows: number of records
+    :param depth: nesting depth of the records
+    :param seed: random seed
+    """
+    rng = random.Random(seed)  # faster than numpy for single values
+    with open(fpath, "w") as f:
+        f.write("[")
+        for i in range(n_rows):
+            f.write(("," if i else "") + json.dumps(generate_nested_record(rng, depth)))
+        f.write("]")
+
+
+def generate_ndjson(fpath: str, n_rows: int, seed: int = 0) -> None:
+    """
+    Generate a json lines file of flat records with optional keys and mixed types
+
+    :param fpath: path of the json lines file
+    :param n_rows: number of records
+    :param seed: random seed
+    """
+    rng = np.random.default_rng(seed)
+    with open(fpath, "w") as f:
+        for offset in range(0, n_rows, BLOCK_SIZE):
+            n = min(BLOCK_SIZE, n_rows - offset)
+            amounts = np.round(rng.normal(100, 50, n), 2)
+            categories = CATEGORIES[rng.integers(0, len(CATEGORIES), n)]
+            optional = rng.random(n)
+            for i in range(n):
+                record = {"id": offset + i, "amount": float(amounts[i]), "category": str(categories[i])}
+                if optional[i] < 0.3:
+                    record["note"] = None if optional[i] < 0.1 else WORD_LIST[i % len(WORD_LIST)]
+                elif optional[i] > 0.9:
+                    record["nested"] = {"a": i % 7, "b": [i % 3, i % 5]}
+                f.write(json.dumps(record) + "\n")
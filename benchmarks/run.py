@@ -0,0 +1,218 @@
+"""
+Benchmarks of schema inference on synthetic data. Every scenario generates a seeded data file once (kept in the data
+directory for later runs), then infers and validates its schema in a new process and measures the time of each stage,
+the throughput and the peak memory of that process. The results are compared against the stored baseline of the scale.
+Run from the root of the repository:
+
+    python -m benchmarks.run --scale small              # compare against benchmarks/baselines/small.json
+    python -m benchmarks.run --scale full --update      # store the current results as baseline of the full scale
+    python -m benchmarks.run --scenario tall_csv        # run some scenarios only
+
+The exit code is 1 if any scenario is slower or uses more memory than its baseline times the tolerance. Baselines are
+only comparable on the same machine, store them on the machine that runs the benchmarks.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+from benchmarks import generators
+from infer_schema.utils.profiling import get_peak_rss_bytes
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+SEED = 0
+SCENARIOS = {  # data format, generator and generator arguments per scale
+    "tall_csv": ("csv", generators.generate_tall_csv, {
+        "tiny": {"n_rows": 1000}, "small": {"n_rows": 10 ** 5}, "full": {"n_rows": 10 ** 7}}),
+    "wide_csv": ("csv", generators.generate_wide_csv, {
+        "tiny": {"n_rows": 20, "n_columns": 100}, "small": {"n_rows": 100, "n_columns": 1000},
+        "full": {"n_rows": 1000, "n_columns": 10 ** 4}}),
+    "string_date_csv": ("csv", generators.generate_string_date_csv, {
+        "tiny": {"n_rows": 1000}, "small": {"n_rows": 10 ** 5}, "full": {"n_rows": 10 ** 6}}),
+    "cardinality_csv": ("csv", generators.generate_cardinality_csv, {
+        "tiny": {"n_rows": 1000}, "small": {"n_rows": 10 ** 5}, "full": {"n_rows": 10 ** 6}}),
+    "nested_json": ("json", generators.generate_nested_json, {
+        "tiny": {"n_rows": 100}, "small": {"n_rows": 5000}, "full": {"n_rows": 10 ** 5}}),
+    "ndjson": ("jsonl", generators.generate_ndjson, {
+        "tiny": {"n_rows": 1000}, "small": {"n_rows": 10 ** 5}, "full": {"n_rows": 10 ** 7}}),
+}
+SCALES = ["tiny", "small", "full"]
+
+
+def get_data_fpath(data_dir: str, scenario: str, scale: str) -> str:
+    """
+    Get the path of the data file of a scenario and generate it if it does not exist
+
+    :param data_dir: directory of the generated data files
+    :param scenario: scenario name
+    :param scale: scale name
+    :return: path to data file
+    """
+    data_format, generate, kwargs = SCENARIOS[scenario]
+    fpath = os.path.join(data_dir, f"{scenario}_{scale}_{SEED}.{data_format}")
+    if not os.path.exists(fpath):
+        logging.info(f"Generate {fpath}")
+        tmp_fpath = fpath + ".tmp"  # a partially generated file is never reused
+        generate(tmp_fpath, seed=SEED, **kwargs[scale])
+        os.replace(tmp_fpath, fpath)
+    return fpath
+
+
+def measure(data_fpath: str, jobs: int = 1) -> dict:
+    """
+    Infer and validate the schema of a data file and measure the time of every stage. Runs in a new process, so that the
+    peak memory is that of this data file only.
+
+    :param data_fpath: path to data file
+    :param jobs: number of worker processes of the inference
+    :return: seconds per stage and peak resident memory in MB
+    """
+    stages = {}
+    start = time.perf_counter()
+
+    def stage(name: str) -> None:
+        nonlocal start
+        stages[name] = round(time.perf_counter() - start, 6)
+        start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if data_fpath.endswith(".csv"):
+            from infer_schema.infer_csv_schema import InferCSVSchema
+            stage("import")
+            inferrer = InferCSVSchema(data_fpath, jobs=jobs)
+            stage("separator")
+            inferrer.df_na
+            stage("read")
+            schema = inferrer.create_schema_from_csv()
+            stage("infer")
+            schema_fpath = os.path.join(tmp_dir, "schema.csvs")
+            with open(schema_fpath, "w") as f:
+                f.write(schema)
+            inferrer.validate_csv_schema(schema_fpath)
+            stage("validate")
+        else:
+            from infer_schema.infer_json_schema import InferJSONSchema
+            stage("import")
+            inferrer = InferJSONSchema(data_fpath, jobs=jobs)
+            schema = inferrer.create_schema_from_json()
+            stage("infer")
+            schema_fpath = os.path.join(tmp_dir, "schema.json")
+            with open(schema_fpath, "w") as f:
+                json.dump(schema, f)
+            inferrer.validate_json_schema(schema_fpath)
+            stage("validate")
+    return {"stages": stages, "peak_rss_mb": round(get_peak_rss_mb(), 1)}
+
+
+def get_peak_rss_mb() -> float:
+    """
+    :return: peak resident memory of this process and its worker processes in MB, without the worker processes where
+        it cannot be measured (e.g. on Windows)
+    """
+    peak_mb = get_peak_rss_bytes() / 2 ** 20
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return peak_mb
+    unit = 2 ** 20 if sys.platform == "darwin" else 2 ** 10  # ru_maxrss is in KB on Linux and in bytes on macOS
+    return max(peak_mb, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit)
+
+
+def run_scenario(scenario: str, scale: str, data_dir: str, jobs: int = 1) -> dict:
+    """
+    Run a scenario in a new process
+
+    :param scenario: scenario name
+    :param scale: scale name
+    :param data_dir: directory of the generated data files
+    :param jobs: number of worker processes of the inference
+    :return: timings, throughput and peak memory of the scenario
+    """
+    data_fpath = get_data_fpath(data_dir, scenario, scale)
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        result = pool.apply(measure, (data_fpath, jobs))
+    seconds = sum(seconds for name, seconds in result["stages"].items() if name != "import")
+    n_rows = SCENARIOS[scenario][2][scale]["n_rows"]
+    size_mb = os.path.getsize(data_fpath) / 2 ** 20
+    return {"seconds": round(seconds, 6), "rows_per_s": round(n_rows / seconds, 1),
+            "mb_per_s": round(size_mb / seconds, 3), "size_mb": round(size_mb, 3), "n_rows": n_rows, **result}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, memory_tolerance: float) -> int:
+    """
+    Print the results next to their baseline
+
+    :param results: results per scenario
+    :param baseline: baseline results per scenario
+    :param tolerance: maximum ratio of the seconds of a scenario to its baseline
+    :param memory_tolerance: maximum ratio of the peak memory of a scenario to its baseline
+    :return: number of regressions
+    """
+    regressions = 0
+    print(f"{'scenario':<16} {'seconds':>9} {'rows/s':>12} {'MB/s':>8} {'peak MB':>8} {'time':>6} {'memory':>6}")
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        time_ratio = result["seconds"] / base["seconds"] if base else float("nan")
+        memory_ratio = result["peak_rss_mb"] / base["peak_rss_mb"] if base else float("nan")
+        regressed = time_ratio > tolerance or memory_ratio > memory_tolerance
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{scenario:<16} {result['seconds']:9.3f} {result['rows_per_s']:12.0f} {result['mb_per_s']:8.2f} "
+              f"{result['peak_rss_mb']:8.1f} {time_ratio:5.2f}x {memory_ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main(argv: Optional[list] = None) -> int:
+    logging.basicConfig(format='(%(levelname)s) - %(message)s', level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='benchmark schema inference on synthetic data')
+    parser.add_argument('--scale', choices=SCALES, default="small", help='size of the data files (default: small)')
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append', default=None,
+                        help='scenario to run, can be repeated (default: all)')
+    parser.add_argument('--data-dir', type=str, default=os.path.join(tempfile.gettempdir(), "infer-schema-benchmarks"),
+                        help='directory of the generated data files, kept for later runs')
+    parser.add_argument('--jobs', type=int, default=1, help='number of worker processes of the inference (default: 1)')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='maximum ratio of the seconds of a scenario to its baseline (default: 1.25)')
+    parser.add_argument('--memory-tolerance', type=float, default=1.25,
+                        help='maximum ratio of the peak memory of a scenario to its baseline (default: 1.25)')
+    parser.add_argument('--output', type=str, default=None, help='optional path of the json results')
+    parser.add_argument('--update', action='store_true', help='store the results as baseline of the scale')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = {}
+    for scenario in args.scenario or list(SCENARIOS):
+        logging.info(f"Run {scenario} ({args.scale})")
+        results[scenario] = run_scenario(scenario, args.scale, args.data_dir, args.jobs)
+    report = {"scale": args.scale, "jobs": args.jobs, "python": platform.python_version(),
+              "machine": platform.machine(), "cpus": os.cpu_count(), "results": results}
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline_fpath = os.path.join(BASELINE_DIR, f"{args.scale}.json")
+    baseline = {}
+    if os.path.exists(baseline_fpath):
+        with open(baseline_fpath, "r") as f:
+            baseline = json.load(f)
+    if args.update:
+        baseline.update(results)
+        with open(baseline_fpath, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        logging.info(f"Saved baseline {baseline_fpath}")
+        return 0
+    if not baseline:
+        logging.warning(f"No baseline {baseline_fpath}, store one with --update")
+    return 1 if compare(results, baseline, args.tolerance, args.memory_tolerance) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Benchmark of the start-up time of the command line interface. Every scenario runs the CLI in a new process several times
+and the median wall-clock time is compared against the stored baseline. Run from the root of the repository:
+
+    python benchmarks/startup.py            # compare against benchmarks/baselines/startup.json
+    python benchmarks/startup.py --update   # store the current times as baseline
+
+The exit code is 1 if any scenario is slower than its baseline times the tolerance.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BASELINE_FPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "startup.json")
+TEST_DATA_FILE = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+
+
+def get_scenarios(tmp_dir: str) -> Dict[str, List[str]]:
+    """
+    Create the data files of the scenarios
+
+    :param tmp_dir: directory for data files and the result cache
+    :return: mapping of scenario name to CLI arguments
+    """
+    json_fpath = os.path.join(tmp_dir, "small.json")
+    with open(json_fpath, "w") as f:
+        json.dump([{"id": i, "name": f"name {i}", "tags": ["a", "b"]} for i in range(100)], f)
+    csv_fpath = os.path.join(tmp_dir, "small.csv")
+    shutil.copy(TEST_DATA_FILE, csv_fpath)
+    cache_args = ["--cache-dir", os.path.join(tmp_dir, "cache")]
+    return {
+        "help": ["--help"],
+        "json": [json_fpath, "--no-cache"],
+        "json_cached": [json_fpath] + cache_args,
+        "csv": [csv_fpath, "--no-cache"],
+        "csv_cached": [csv_fpath] + cache_args,
+    }
+
+
+def time_cli(args: List[str], repeat: int) -> float:
+    """
+    :param args: CLI arguments
+    :param repeat: number of runs
+    :return: median wall-clock seconds of the runs
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "infer_schema.main"] + args, check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='benchmark the start-up time of the CLI')
+    parser.add_argument('--repeat', type=int, default=7, help='runs per scenario (default: 7)')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='maximum ratio of the time of a scenario to its baseline (default: 1.5)')
+    parser.add_argument('--update', action='store_true', help='store the measured times as baseline')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        results = {name: time_cli(cli_args, args.repeat) for name, cli_args in get_scenarios(tmp_dir).items()}
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    if args.update:
+        with open(BASELINE_FPATH, "w") as f:
+            json.dump({name: round(seconds, 4) for name, seconds in results.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline {BASELINE_FPATH}")
+        return 0
+
+    with open(BASELINE_FPATH, "r") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for name, seconds in results.items():
+        ratio = seconds / baseline[name] if name in baseline else float("nan")
+        regressed = ratio > args.tolerance
+        regressions += regressed
+        print(f"{name:<12} {seconds * 1000:8.1f} ms  baseline {baseline.get(name, float('nan')) * 1000:8.1f} ms  "
+              f"{ratio:5.2f}x{'  REGRESSION' if regressed else ''}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Batch mode: infer the schemas of many data files in one process pool. The inputs are data files, directories (searched
+recursively), glob patterns or manifest files listing one input per line. Each worker process imports the libraries
+and loads the literals file once and then infers the schemas of many files, so process start-up is paid once per worker
+and not once per file. A machine-readable summary with the status, timing and output path of every file is written.
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+from infer_schema.main import add_inference_arguments, run_inference
+from infer_schema.utils.memory_budget import WORKER_BYTES, MemoryBudget
+from infer_schema.utils.profile_state import STATE_SUFFIX, get_state_fpath
+from infer_schema.utils.utils import get_data_format, get_schema_fpath
+
+SCHEMA_SUFFIX = "_schema-draft"
+GLOB_CHARACTERS = "*?["
+
+
+def is_data_fpath(fpath: str) -> bool:
+    """
+    Check whether a file is a data file whose schema can be inferred. Schema and state files written by this tool are
+    no data files, so that a directory can be processed repeatedly.
+
+    :param fpath: file path
+    :return: True if the file is a csv or json data file
+    """
+    return get_data_format(fpath) is not None and not fpath.endswith(STATE_SUFFIX) \
+        and not os.path.splitext(fpath)[0].endswith(SCHEMA_SUFFIX)
+
+
+def read_manifest(manifest_fpath: str) -> List[str]:
+    """
+    Read the inputs listed in a manifest file, one per line. Empty lines and lines starting with # are skipped,
+    relative paths are relative to the directory of the manifest.
+
+    :param manifest_fpath: path to manifest file
+    :return: list of inputs
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_fpath))
+    with open(manifest_fpath, "r") as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(manifest_dir, line) for line in lines if line and not line.startswith("#")]
+
+
+def collect_data_fpaths(inputs: Iterable[str]) -> List[str]:
+    """
+    Collect the data files of all inputs
+
+    :param inputs: data files, directories or glob patterns
+    :return: sorted list of unique absolute data file paths
+    """
+    data_fpaths = set()
+    for data_input in inputs:
+        if os.path.isdir(data_input):
+            for root, _, fnames in os.walk(data_input):
+                data_fpaths.update(os.path.join(root, fname) for fname in fnames)
+        elif any(char in data_input for char in GLOB_CHARACTERS):
+            data_fpaths.update(fpath for fpath in glob.glob(data_input, recursive=True) if os.path.isfile(fpath))
+        elif os.path.isfile(data_input):
+            data_fpaths.add(data_input)
+        else:
+            logging.warning(f"Input {data_input} does not exist")
+    return sorted(os.path.abspath(fpath) for fpath in data_fpaths if is_data_fpath(fpath))
+
+
+def get_batch_schema_fpath(data_fpath: str, output_dir: Optional[str] = None, input_root: Optional[str] = None) -> str:
+    """
+    Get the schema path of a data file in batch mode
+
+    :param data_fpath: path to data file
+    :param output_dir: optional output directory, otherwise the schema is saved next to the data file
+    :param input_root: common directory of all data files, the directory structure below it is kept in output_dir
+    :return: schema file path
+    """
+    schema_fpath = get_schema_fpath(data_fpath)
+    if output_dir is None:
+        return schema_fpath
+    return os.path.join(output_dir, os.path.relpath(os.path.abspath(schema_fpath), input_root))
+
+
+def init_worker() -> None:
+    """
+    Import the inference modules and load the literals once per worker process
+    """
+    from infer_schema.infer_csv_schema import InferCSVSchema
+    import infer_schema.infer_json_schema  # noqa: F401
+    InferCSVSchema.load_literals()
+
+
+def infer_file_schema(data_fpath: str, schema_fpath: str, args: argparse.Namespace) -> dict:
+    """
+    Infer, save and validate the schema of one file of the batch. Module level function, so it can run in worker
+    processes. Errors are reported in the result instead of being raised, so that one file does not stop the batch.
+
+    :param data_fpath: path to data file
+    :param schema_fpath: path for output schema file
+    :param args: parsed batch arguments
+    :return: summary of the file with its status (valid, invalid or error), timing and output path
+    """
+    start = time.perf_counter()
+    result = {"data_fpath": data_fpath, "format": get_data_format(data_fpath), "schema_fpath": schema_fpath}
+    try:
+        state_fpath = get_state_fpath(schema_fpath) if args.state else None
+        valid = run_inference(data_fpath, schema_fpath, args, state_fpath, jobs=1)
+        result["status"] = "valid" if valid else "invalid"
+    except Exception as e:  # noqa: any failure of a single file is reported in the summary
+        logging.error(f"Schema inference of {data_fpath} failed: {e}")
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def share_memory_budget(args: argparse.Namespace) -> argparse.Namespace:
+    """
+    Cap the number of worker processes to the memory budget and split the budget between them, every worker infers one
+    file at a time within its share
+
+    :param args: parsed batch arguments
+    :return: arguments with the capped number of jobs and the memory budget per worker
+    """
+    if args.max_memory is None:
+        return args
+    jobs = MemoryBudget(args.max_memory * 2 ** 20, WORKER_BYTES).cap_workers(args.jobs)
+    return argparse.Namespace(**{**vars(args), "jobs": jobs, "max_memory": args.max_memory // jobs})
+
+
+def run_batch(data_fpaths: List[str], args: argparse.Namespace, output_dir: Optional[str] = None) -> dict:
+    """
+    Infer the schemas of data files in a pool of args.jobs worker processes
+
+    :param data_fpaths: paths to data files
+    :param args: parsed batch arguments
+    :param output_dir: optional output directory, otherwise the schemas are saved next to the data files
+    :return: summary of the batch with one entry per file in the order of data_fpaths
+    """
+    start = time.perf_counter()
+    args = share_memory_budget(args)
+    input_root = os.path.commonpath([os.path.dirname(os.path.abspath(fpath)) for fpath in data_fpaths]) \
+        if data_fpaths else None
+    schema_fpaths = [get_batch_schema_fpath(fpath, output_dir, input_root) for fpath in data_fpaths]
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker) as executor:
+            files = list(executor.map(infer_file_schema, data_fpaths, schema_fpaths, [args] * len(data_fpaths)))
+    else:
+        init_worker()
+        files = [infer_file_schema(data_fpath, schema_fpath, args)
+                 for data_fpath, schema_fpath in zip(data_fpaths, schema_fpaths)]
+    summary = {"n_files": len(files)}
+    for status in ["valid", "invalid", "error"]:
+        summary[f"n_{status}"] = sum(file["status"] == status for file in files)
+    summary["seconds"] = round(time.perf_counter() - start, 6)
+    summary["files"] = files
+    return summary
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    """
+    :return: parser of the batch mode arguments
+    """
+    parser = argparse.ArgumentParser(description='infer the schemas of many data files')
+    parser.add_argument('inputs', type=str, nargs='*',
+                        help='data files, directories (searched recursively) or glob patterns, e.g. "data/**/*.csv"')
+    parser.add_argument('--manifest', type=str, action='append', default=[],
+                        help='file listing one data file, directory or glob pattern per line, can be repeated')
+    parser.add_argument('--output-dir', type=str, required=False, default=None,
+                        help='optional directory for the schema files, otherwise they are saved next to the data files')
+    parser.add_argument('--summary', type=str, required=False, default=None,
+                        help='path of the json summary of the batch, printed to stdout if not given')
+    parser.add_argument('--state', action='store_true',
+                        help='incremental inference with the inference state saved next to each schema file')
+    add_inference_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    logging.basicConfig(format='(%(levelname)s) - %(message)s', level=logging.WARNING)
+
+    args = get_argument_parser().parse_args(argv)
+
+    inputs = list(args.inputs)
+    for manifest_fpath in args.manifest:
+        inputs += read_manifest(manifest_fpath)
+    data_fpaths = collect_data_fpaths(inputs)
+    logging.info(f"Infer schemas of {len(data_fpaths)} files with {args.jobs} worker processes")
+    summary = run_batch(data_fpaths, args, args.output_dir)
+    if args.summary is None:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.summary)), exist_ok=True)
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if summary["n_error"] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
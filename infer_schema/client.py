@@ -0,0 +1,168 @@
+"""
+Thin client of the inference service, see infer_schema.service. It sends the inference or validation jobs of data files
+to a running service and prints one json response per line as soon as the job is done, with the status, timing and
+inferred schema of the file. Start-up of the client does not import pandas, genson or jsonschema.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import AsyncIterator, List, Optional, Tuple
+
+from infer_schema.batch import collect_data_fpaths
+from infer_schema.main import add_inference_arguments
+from infer_schema.service import DEFAULT_PORT, JOB_OPTION_EXCLUDED, get_default_socket_fpath, has_unix_sockets
+
+
+async def open_service_connection(socket_fpath: Optional[str] = None, port: Optional[int] = None) \
+        -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Connect to the inference service
+
+    :param socket_fpath: path of the Unix socket of the service, the default socket if None and no port is given
+    :param port: optional localhost TCP port of the service, DEFAULT_PORT where there are no Unix sockets
+    :return: streams of the responses and requests
+    """
+    if port is None and not has_unix_sockets():
+        port = DEFAULT_PORT
+    if port is not None:
+        return await asyncio.open_connection("127.0.0.1", port)
+    return await asyncio.open_unix_connection(socket_fpath or get_default_socket_fpath())
+
+
+async def iter_responses(requests: List[dict], socket_fpath: Optional[str] = None, port: Optional[int] = None) \
+        -> AsyncIterator[dict]:
+    """
+    Send requests to the inference service and iterate over the responses as they arrive. Requests are sent while
+    responses are read, so that a service applying back-pressure does not block the client.
+
+    :param requests: requests, see infer_schema.service
+    :param socket_fpath: path of the Unix socket of the service
+    :param port: optional localhost TCP port of the service
+    :return: iterator over one response per request, in the order the jobs are done
+    """
+    reader, writer = await open_service_connection(socket_fpath, port)
+
+    async def send() -> None:
+        for request in requests:
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+        writer.write_eof()
+
+    sender = asyncio.create_task(send())
+    try:
+        for _ in requests:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("The inference service closed the connection")
+            yield json.loads(line)
+        await sender
+    finally:
+        sender.cancel()
+        writer.close()
+
+
+def submit(requests: List[dict], socket_fpath: Optional[str] = None, port: Optional[int] = None) -> List[dict]:
+    """
+    Send requests to the inference service and wait for all responses
+
+    :param requests: requests, see infer_schema.service
+    :param socket_fpath: path of the Unix socket of the service
+    :param port: optional localhost TCP port of the service
+    :return: responses in the order of the requests
+    """
+    async def collect() -> List[dict]:
+        return [response async for response in iter_responses(requests, socket_fpath, port)]
+
+    responses = {response.get("id"): response for response in asyncio.run(collect())}
+    return [responses.get(request.get("id")) for request in requests]
+
+
+def get_job_options(args: argparse.Namespace) -> dict:
+    """
+    Get the inference arguments a job overrides, i.e. the ones that were given on the command line. The number of jobs
+    and the cache directory are set by the service.
+
+    :param args: parsed client arguments
+    :return: job options
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    add_inference_arguments(parser)
+    defaults = vars(parser.parse_args([]))
+    options = {name: getattr(args, name) for name, default in defaults.items()
+               if name not in JOB_OPTION_EXCLUDED and getattr(args, name) != default}
+    if args.state:
+        options["state"] = True
+    return options
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    """
+    :return: parser of the client arguments
+    """
+    parser = argparse.ArgumentParser(description='infer or validate the schemas of data files with a running inference '
+                                                 'service')
+    parser.add_argument('inputs', type=str, nargs='*',
+                        help='data files, directories (searched recursively) or glob patterns, e.g. "data/**/*.csv"')
+    parser.add_argument('--schema_fpath', type=str, required=False, default=None,
+                        help='optional path for the output schema file of a single data file, in the directory of '
+                             'the data file or below the output root of the service')
+    parser.add_argument('--validate', action='store_true',
+                        help='validate the data files against their existing schema files instead of inferring them')
+    parser.add_argument('--no-schema', action='store_true', help='do not print the inferred schemas')
+    parser.add_argument('--state', action='store_true',
+                        help='incremental inference with the inference state saved next to each schema file')
+    parser.add_argument('--socket', type=str, required=False, default=None,
+                        help=f'path of the Unix socket of the service (default: {get_default_socket_fpath()})')
+    parser.add_argument('--port', type=int, required=False, default=None,
+                        help=f'localhost TCP port of the service instead of a Unix socket (default on Windows: '
+                             f'{DEFAULT_PORT})')
+    parser.add_argument('--ping', action='store_true', help='check that the service is running')
+    parser.add_argument('--shutdown', action='store_true',
+                        help='stop the service once the jobs it accepted are done')
+    add_inference_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+    logging.basicConfig(format='(%(levelname)s) - %(message)s', level=logging.WARNING)
+
+    args = get_argument_parser().parse_args(argv)
+
+    if args.ping or args.shutdown:
+        requests = [{"id": 0, "type": "ping" if args.ping else "shutdown"}]
+    else:
+        data_fpaths = collect_data_fpaths(args.inputs)
+        if args.schema_fpath is not None and len(data_fpaths) != 1:
+            logging.error("--schema_fpath can only be given for a single data file")
+            return 2
+        # the service resolves paths relative to its own working directory
+        schema_fpath = None if args.schema_fpath is None else os.path.abspath(args.schema_fpath)
+        if args.cache_dir is not None:
+            logging.warning("--cache-dir is ignored, the service uses its own cache directory")
+        options = get_job_options(args)
+        requests = [{"id": i, "type": "validate" if args.validate else "infer", "data_fpath": data_fpath,
+                     "schema_fpath": schema_fpath, "options": options, "include_schema": not args.no_schema}
+                    for i, data_fpath in enumerate(data_fpaths)]
+
+    async def print_responses() -> int:
+        n_errors = 0
+        async for response in iter_responses(requests, args.socket, args.port):
+            n_errors += response["status"] == "error"
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+        return n_errors
+
+    try:
+        n_errors = asyncio.run(print_responses())
+    except (ConnectionError, FileNotFoundError) as e:
+        logging.error(f"Cannot reach the inference service: {e}")
+        return 2
+    return 0 if n_errors == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,27 @@
+import csv
 import logging
 import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 
+import numpy as np
 import pandas as pd
-from omegaconf import OmegaConf
+from pandas.io.parsers import TextFileReader
 
-import infer_schema.utils.check_dtype as check_type
-from infer_schema.utils.utils import get_schema_fpath, replace_non_ascii_characters
-from typing import Optional
+import infer_schema.utils.profile_state as profile_state
+import infer_schema.utils.profiling as profiling
+from infer_schema.utils.accumulators import ANY, BOOL, CATEGORICAL, NUMERIC, POSITIVE_INTEGER, POSITIVE_NUMERIC, \
+    STRING, ColumnAccumulator, accumulate_chunk
+from infer_schema.utils.csv_schema_ir import ColumnRule, CSVSchemaIR
+from infer_schema.utils.csv_validation import CSVSchema, CSVViolations, validate_csv
+from infer_schema.utils.literal_table import load_literals
+from infer_schema.utils.literals import LiteralEngine
+from infer_schema.utils.memory_budget import ROW_MEMORY_FACTOR, MemoryBudget
+from infer_schema.utils.result_cache import ResultCache, get_file_hash
+from infer_schema.utils.utils import get_compression, get_schema_fpath, open_byte_range, open_data_file, \
+    replace_non_ascii_characters
+from typing import ContextManager, Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 
 class InferCSVSchema:
@@ -15,44 +30,360 @@ class InferCSVSchema:
     validator_exec = "validate.bat" if os.name == 'nt' else "validate"
     validator_path = os.path.join(os.getcwd(), "lib", "csv-validator-1.2", "bin", validator_exec)
 
-    def __init__(self, csv_path: str):
+    literal_types = {"XsdDateTimeWithTimeZoneLiteral": "xDateTimeTz", "XsdDateTimeLiteral": "xDateTime",
+                     "XsdDateLiteral": "xDate", "XsdTimeLiteral": "xTime"}  # literals that map to a schema type
+    checked_literals = list(literal_types) + [STRING]  # literals all values of a column are matched against
+    sniff_size = 2 ** 16  # maximum number of characters read to infer the separator
+    sample_seed = 0  # seed of the random row sample
+    budget_sample_rows = 1000  # number of rows read to estimate the memory per row for the memory budget
+    loaded_literals = {}  # literals config per literals file, see load_literals
+    validation_chunksize = 100000  # number of rows per chunk for validation if no chunksize is given
+
+    def __init__(self, csv_path: str, chunksize: Optional[int] = None, jobs: int = 1,
+                 sample_rows: Optional[int] = None, sample_fraction: Optional[float] = None,
+                 max_errors: Optional[int] = 100, state_fpath: Optional[str] = None, max_memory: Optional[int] = None):
         """
-        Read in csv file into pandas dataframe
+        Read in csv file into pandas dataframe. If a chunksize is given, the file is not read in here but streamed in
+        chunks of chunksize rows during schema inference, so memory depends on the chunk size and not on the file size.
+        If sample_rows or sample_fraction is given, the column types are inferred from a random sample of rows and all
+        rows are only verified against them afterwards. Column types are widened where values do not fit.
 
-        :param csv_path: path to csv file
+        :param csv_path: path to csv file, files compressed with gzip, bz2 or xz (.gz, .bz2, .xz) are decompressed while
+            they are read
+        :param chunksize: optional number of rows per chunk for streaming inference, read whole file if None
+        :param jobs: number of worker processes the columns are distributed to for inference
+        :param sample_rows: optional number of rows of a uniform random sample to infer column types from
+        :param sample_fraction: optional probability of each row to be in the random sample to infer column types from
+        :param max_errors: maximum number of violating values reported as examples by validation, None for no limit
+        :param state_fpath: optional path to the inference state for incremental inference. If it exists, only the new
+            data is read, i.e. the bytes appended to the csv file since the state was saved or the whole csv file if it
+            is another file, e.g. a new partition, and merged into the state. The state is saved in run.
+        :param max_memory: optional memory budget of the run in bytes. The file is streamed in chunks whose size is
+            chosen from the estimated memory per row (or starts at chunksize) and adapted to the observed memory, the
+            number of jobs is capped. A MemoryBudgetError is raised if the budget cannot be met.
         """
+        if sample_rows is not None and sample_fraction is not None:
+            raise ValueError("Only one of sample_rows and sample_fraction can be set.")
         self.csv_path = csv_path
-        self.seperator = self.get_csv_separator(csv_path)
-        self.literals = OmegaConf.load(self.literals_fpath)
-
-        # read in everything as string to keep leading zeros
-        self.df = pd.read_csv(csv_path, sep=self.seperator, dtype=str)
+        self.compression = get_compression(csv_path)
+        self.chunksize = chunksize
+        self.memory_budget = None if max_memory is None else MemoryBudget(max_memory)
+        self.jobs = jobs if self.memory_budget is None else self.memory_budget.cap_workers(jobs)
+        self.sample_rows = sample_rows
+        self.sample_fraction = sample_fraction
+        self.max_errors = max_errors
+        self.violations: Optional[CSVViolations] = None
+        self.state_fpath = state_fpath
+        self.state = profile_state.load_state(state_fpath, "csv")
+        self.byte_range = None if state_fpath is None else profile_state.get_new_byte_range(csv_path, self.state)
+        if self.byte_range is not None and self.byte_range[0] > 0:
+            self.seperator = self.state["separator"]  # appended rows, the separator was inferred from the header
+        else:
+            with profiling.stage("separator"):
+                self.seperator = self.get_csv_separator(csv_path)
+        self.accumulators: Optional[List[ColumnAccumulator]] = None
+        self.schema_ir: Optional[CSVSchemaIR] = None
+        self.literals = self.load_literals()
+        self.literal_engine = LiteralEngine.from_config(self.literals, self.checked_literals)
 
         # pandas treats many values as missing, the standard treats only "" as empty, so we have to detect any values
         # pandas treats as missing separately
         self.missing_symbols = list(pd._libs.parsers.STR_NA_VALUES)
         self.missing_symbols.remove(self.literals["MissingValue"])
-        self.df_na = pd.read_csv(csv_path, sep=self.seperator, keep_default_na=False,
-                                 na_values=self.literals["MissingValue"], dtype=str)
         # Read in as string to avoid automatic treatment of NaN symbols and type inference by pandas.
         # Only "" is a missing symbol according to the csv standard. It is displayed as "empty" in the schema.
         # It is checked if the remaining missing symbols from pandas library appear in the variable and if yes,
-        # they are added as "or is(<missing symbol>), e.g. "or is(NA)" (see line 163)
+        # they are added as "or is(<missing symbol>), e.g. "or is(NA)"
+        # The file is read only once, the view with all pandas missing symbols as NaN is derived from it (see df).
+        self._df_na = None  # read on first access, so that a cached schema can be returned without reading the file
 
-    @staticmethod
-    def get_csv_separator(csv_file_path: str) -> str:
+    @classmethod
+    def load_literals(cls) -> Dict[str, str]:
+        """
+        Load the resolved literals from their precompiled table. They are loaded once per process and shared by all
+        instances, e.g. in batch mode.
+
+        :return: mapping of literal name to regular expression
+        """
+        if cls.literals_fpath not in cls.loaded_literals:
+            cls.loaded_literals[cls.literals_fpath] = load_literals(cls.literals_fpath)
+        return cls.loaded_literals[cls.literals_fpath]
+
+    @property
+    def df_na(self) -> Optional[pd.DataFrame]:
+        """
+        Csv data with all values as strings where only empty values are NaN. Without chunksize and memory budget, the
+        file is read once on first access.
+
+        :return: dataframe where only empty values are NaN or None in streaming mode
+        """
+        if self._df_na is None and self.chunksize is None and self.memory_budget is None and self.has_new_data:
+            with profiling.stage("read"), self.open_csv() as source:
+                self._df_na = self.read_csv(source)
+            profiling.add_bytes_read(self.get_read_size())
+        return self._df_na
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """
+        Csv data as read in by pandas with default missing value handling, i.e. all pandas missing symbols are NaN.
+        It is derived from df_na on access and not kept in memory.
+
+        :return: dataframe with all pandas missing symbols as NaN or None in streaming mode
+        """
+        if self.df_na is None:
+            return None
+        return self.df_na.mask(self.df_na.isin(self.missing_symbols))
+
+    @classmethod
+    def get_csv_separator(cls, csv_file_path: str) -> str:
         """
-        Infer the used separator in the csv file
+        Infer the used separator in the csv file from its first line (like pandas does), reading at most sniff_size
+        characters
 
         :param csv_file_path: path to csv file
         :return: used separator as a character
         """
-        reader = pd.read_csv(csv_file_path, sep=None, iterator=True, engine="python")  # infer delimiter first
-        inferred_sep = reader._engine.data.dialect.delimiter
-        reader.close()
+        # only the first block of a compressed file is decompressed
+        with open_data_file(csv_file_path, "rt", encoding="utf-8", errors="replace", newline="") as f:
+            first_line = f.readline(cls.sniff_size)
+        inferred_sep = csv.Sniffer().sniff(first_line).delimiter
         logging.debug(f"Inferred delimiter {inferred_sep} for csv file {csv_file_path}")
         return inferred_sep
 
+    @property
+    def has_new_data(self) -> bool:
+        """
+        :return: False if the csv file has not grown since the inference state was saved
+        """
+        return self.byte_range is None or self.byte_range[0] < self.byte_range[1]
+
+    def get_read_size(self) -> int:
+        """
+        :return: number of bytes read by a pass over the csv file, i.e. only the new bytes in incremental inference
+        """
+        if self.byte_range is None:
+            return os.path.getsize(self.csv_path)
+        return self.byte_range[1] - self.byte_range[0]
+
+    def open_csv(self) -> ContextManager[Union[str, TextIO]]:
+        """
+        Open the data of the csv file that is read, i.e. only the new bytes in incremental inference
+
+        :return: context manager of the csv file path or of the opened byte range
+        """
+        # compressed files are only read incrementally if they are new files, i.e. they are read as a whole
+        if self.byte_range is None or self.compression is not None:
+            return nullcontext(self.csv_path)
+        return open_byte_range(self.csv_path, *self.byte_range)
+
+    def read_csv(self, source: Union[str, TextIO], **kwargs) -> Union[pd.DataFrame, TextFileReader]:
+        """
+        Read the csv file with all values as strings (to keep leading zeros) and only "" as missing value
+
+        :param source: csv file path or opened csv data as returned by open_csv
+        :param kwargs: additional keyword arguments for pd.read_csv, e.g. chunksize
+        :return: dataframe where only empty values are NaN or a reader over chunks of it
+        """
+        if self.byte_range is not None and self.byte_range[0] > 0:
+            # appended rows have no header
+            kwargs.update(header=None, names=[column["name"] for column in self.state["columns"]])
+        return pd.read_csv(source, sep=self.seperator, keep_default_na=False,
+                           na_values=self.literals["MissingValue"], dtype=str, **kwargs)
+
+    def estimate_row_bytes(self) -> float:
+        """
+        Estimate the memory per row while its chunk is summarized from the first rows of the csv file
+
+        :return: estimated memory per row in bytes
+        """
+        with self.open_csv() as source:
+            sample_na = self.read_csv(source, nrows=self.budget_sample_rows)
+        return sample_na.memory_usage(deep=True).sum() / max(len(sample_na.index), 1) * ROW_MEMORY_FACTOR
+
+    def fit_chunksize(self) -> None:
+        """
+        With a memory budget, estimate the memory per row once and choose the chunk size from it unless it is given
+        """
+        if self.memory_budget is None or self.memory_budget.row_bytes is not None:
+            return
+        row_bytes = self.estimate_row_bytes()
+        if self.chunksize is None:
+            self.chunksize = self.memory_budget.get_chunksize(row_bytes)
+        else:
+            self.memory_budget.row_bytes = row_bytes  # to adapt the given chunk size
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Iterate over the csv file in chunks. Without chunksize and memory budget, the whole file is a single chunk. With
+        a memory budget, the chunk size is adapted to the observed memory after every chunk.
+
+        :return: iterator over chunks where only empty values are NaN
+        """
+        if not self.has_new_data:
+            return
+        self.fit_chunksize()
+        if self.chunksize is None:
+            yield self.df_na
+            return
+        profiling.add_bytes_read(self.get_read_size())
+        with self.open_csv() as source, self.read_csv(source, chunksize=self.chunksize) as reader:
+            while True:
+                with profiling.stage("read"):
+                    chunk_na = next(reader, None)
+                if chunk_na is None:
+                    return
+                yield chunk_na
+                if self.memory_budget is not None:
+                    # the reader reads chunks of its current chunksize
+                    self.chunksize = reader.chunksize = self.memory_budget.adapt_chunksize(self.chunksize)
+
+    def accumulate_columns(self, min_n_limits: int = 100) -> List[ColumnAccumulator]:
+        """
+        Feed all chunks of the csv file into one accumulator per column. With more than one job, the columns of each
+        chunk are split into one slice per job and summarized in a process pool. In sampling mode, only the sampled rows
+        are summarized and all rows are verified against the column types inferred from them.
+
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        :return: list of column accumulators in column order
+        """
+        if not self.has_new_data:
+            logging.info(f"No new data in {self.csv_path} since the inference state was saved")
+            return self.load_state_accumulators()
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        try:
+            if self.sample_rows is None and self.sample_fraction is None:
+                accumulators = None
+                for chunk_na in self.iter_chunks():
+                    accumulators = self.merge_accumulators(accumulators, self.accumulate_chunk(chunk_na, executor))
+            else:
+                accumulators, n_rows = self.accumulate_sample(executor)
+                self.verify_columns(accumulators, n_rows, min_n_limits)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if self.state is not None:
+            state_accumulators = self.load_state_accumulators()
+            if [acc.name for acc in accumulators] != [acc.name for acc in state_accumulators]:
+                raise ValueError(f"Columns of {self.csv_path} do not match the columns of the inference state")
+            accumulators = self.merge_accumulators(state_accumulators, accumulators)
+        return accumulators
+
+    def load_state_accumulators(self) -> List[ColumnAccumulator]:
+        """
+        :return: column accumulators of the data read in previous runs as saved in the inference state
+        """
+        return [ColumnAccumulator.from_dict(column, self.missing_symbols, self.literal_engine)
+                for column in self.state["columns"]]
+
+    def save_state(self) -> None:
+        """
+        Save the column accumulators of all data read so far as inference state, so that a later run only has to read
+        new data
+        """
+        profile_state.save_state(self.state_fpath, "csv", self.csv_path, self.byte_range[1], separator=self.seperator,
+                                 columns=[acc.to_dict() for acc in self.accumulators])
+
+    @staticmethod
+    def merge_accumulators(accumulators: Optional[List[ColumnAccumulator]],
+                           chunk_accumulators: List[ColumnAccumulator]) -> List[ColumnAccumulator]:
+        """
+        Merge the accumulators of a chunk into the accumulators of the preceding chunks
+
+        :param accumulators: accumulators of the preceding chunks or None for the first chunk
+        :param chunk_accumulators: accumulators of the chunk
+        :return: merged accumulators in column order
+        """
+        if accumulators is None:
+            return chunk_accumulators
+        for acc, chunk_acc in zip(accumulators, chunk_accumulators):
+            acc.merge(chunk_acc)
+        return accumulators
+
+    def accumulate_sample(self, executor: Optional[Executor] = None) -> Tuple[List[ColumnAccumulator], int]:
+        """
+        Summarize a random sample of rows in one pass over the file. With sample_fraction, every row is sampled
+        independently and the sampled rows of each chunk are summarized right away. With sample_rows, a uniform
+        sample of at most sample_rows rows is kept as the rows with the smallest random keys (reservoir sample).
+
+        :param executor: optional executor to distribute slices of columns to
+        :return: accumulators of the sampled rows in column order and the number of rows of the whole file
+        """
+        rng = np.random.default_rng(self.sample_seed)
+        reserved = nullcontext()
+        if self.memory_budget is not None and self.sample_rows is not None:
+            reserved = self.memory_budget.reserve(self.sample_rows * self.estimate_row_bytes(),
+                                                  f"A sample of {self.sample_rows} rows")
+        with reserved:
+            accumulators, n_rows = self.accumulate_sample_chunks(rng, executor)
+        logging.info(f"Inferred column types from a sample of rows of {n_rows} rows in total")
+        return accumulators, n_rows
+
+    def accumulate_sample_chunks(self, rng: np.random.Generator, executor: Optional[Executor] = None) \
+            -> Tuple[List[ColumnAccumulator], int]:
+        """
+        Summarize the sampled rows of all chunks, see accumulate_sample
+
+        :param rng: random generator of the sample keys
+        :param executor: optional executor to distribute slices of columns to
+        :return: accumulators of the sampled rows in column order and the number of rows of the whole file
+        """
+        accumulators, reservoir, reservoir_keys, n_rows = None, None, None, 0
+        for chunk_na in self.iter_chunks():
+            n_rows += len(chunk_na.index)
+            keys = rng.random(len(chunk_na.index))
+            if self.sample_fraction is not None:
+                accumulators = self.merge_accumulators(
+                    accumulators, self.accumulate_chunk(chunk_na[keys < self.sample_fraction], executor))
+                continue
+            if reservoir is None:
+                reservoir, reservoir_keys = chunk_na, keys
+            else:
+                reservoir, reservoir_keys = pd.concat([reservoir, chunk_na]), np.concatenate([reservoir_keys, keys])
+            if len(reservoir_keys) > self.sample_rows:
+                # positions of the smallest keys, sorted to keep the order of rows
+                keep = np.sort(np.argpartition(reservoir_keys, self.sample_rows)[:self.sample_rows])
+                reservoir, reservoir_keys = reservoir.iloc[keep], reservoir_keys[keep]
+        if reservoir is not None:
+            accumulators = self.accumulate_chunk(reservoir, executor)
+        return accumulators, n_rows
+
+    def verify_columns(self, accumulators: List[ColumnAccumulator], n_rows: int, min_n_limits: int = 100) -> None:
+        """
+        Verify all rows of the csv file against the column types inferred from a sample and widen column types where
+        values do not fit
+
+        :param accumulators: accumulators of the sampled rows in column order
+        :param n_rows: number of rows of the whole file
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        """
+        for acc in accumulators:
+            acc.start_verification(n_rows, min_n_limits)
+        for chunk_na in self.iter_chunks():
+            for acc, (_, var_na) in zip(accumulators, chunk_na.items()):
+                start = time.perf_counter()
+                acc.verify(var_na, min_n_limits)
+                profiling.add_column_seconds(acc.name, time.perf_counter() - start)
+        for acc in accumulators:
+            acc.finish_verification()
+
+    def accumulate_chunk(self, chunk_na: pd.DataFrame, executor: Optional[Executor] = None) \
+            -> List[ColumnAccumulator]:
+        """
+        Summarize all columns of a chunk, in parallel slices of columns if an executor is given
+
+        :param chunk_na: chunk of the csv file where only empty values are NaN
+        :param executor: optional executor to distribute slices of columns to
+        :return: list of column accumulators in column order
+        """
+        if executor is None or len(chunk_na.columns) < 2:
+            return accumulate_chunk(chunk_na, self.missing_symbols, self.literal_engine)
+        col_slices = np.array_split(np.arange(len(chunk_na.columns)), min(self.jobs, len(chunk_na.columns)))
+        futures = [executor.submit(accumulate_chunk, chunk_na.iloc[:, col_slice], self.missing_symbols,
+                                   self.literal_engine) for col_slice in col_slices]
+        # results are collected in submission order, so the column order is kept
+        return [acc for future in futures for acc in future.result()]
+
     def create_schema_from_csv(self, use_regex_for_nums: bool = False, min_n_limits: int = 100) -> str:
         """
         Create the csv schema according to csv standard. Basic data types are inferred. Ranges are only inferred if
@@ -63,130 +394,168 @@ class InferCSVSchema:
         :param min_n_limits: minimum number of total values for a variable to be considered positive
         :return: string containing the csv schema including line breaks
         """
+        schema_ir = self.create_schema_ir(use_regex_for_nums, min_n_limits)
+        with profiling.stage("serialize"):
+            schema = schema_ir.to_text()
+        logging.debug(f"Inferred csv schema:\n\n{schema}\n")
+        return schema
+
+    def create_schema_ir(self, use_regex_for_nums: bool = False, min_n_limits: int = 100) -> CSVSchemaIR:
+        """
+        Infer the csv schema as in-memory representation, see create_schema_from_csv. It is kept in schema_ir.
+
+        :param use_regex_for_nums: whether to use regex for numeric values (instead of range for ints and floats)
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        :return: inferred csv schema
+        """
         logging.info(f"Start csv schema inference from file {self.csv_path}")
-        sep = "TAB" if self.seperator == "\t" else self.seperator
-        schema = f"{self.version}\n" \
-                 f"@totalColumns {int(len(self.df.columns))}\n"
-        if self.seperator == "\t":
-            schema += "@separator TAB\n"
-        else:
-            schema += f"@separator '{sep}'\n"
-        for i_col, (col_name, var) in enumerate(self.df.items()):
-            schema += f'"{col_name}": '
-            if len(var.index) == 0:
-                schema += "empty"
-            # to check for the different missing values we have to use the dataframe with ignored missing values
-            missings = []
-            for m in self.missing_symbols:
-                if m in self.df_na[col_name].to_list():
-                    missings.append(m)
-            if check_type.check_is_bool(var):
-                schema += 'is("0") or is("1")'
-            elif check_type.heuristic_check_categorical(var):
-                cats = var.dropna().unique().tolist()
-                if len(cats) == 1:  # constant value
-                    if isinstance(cats[0], str) and not cats[0].isascii():
-                        schema += f'regex("{replace_non_ascii_characters(cats[0])}")'
-                    else:
-                        schema += f'is("{cats[0]}")'
-                else:
-                    if check_type.check_is_numeric(var):
-                        schema += 'any('
-                        for i_cat, cat in enumerate(cats):
-                            schema += f'"{cat}"'
-                            if i_cat != len(cats) - 1:
-                                schema += ','
-                            else:
-                                schema += ')'
-                    elif check_type.check_regex(var, self.literals['String']):
-                        ascii_strings, non_ascii_strings = [], []
-                        for cat in cats:
-                            if cat.isascii():
-                                ascii_strings.append(cat)
-                            else:
-                                non_ascii_strings.append(cat)
-                        if len(ascii_strings):
-                            schema += 'any('
-                            for i_cat, cat in enumerate(ascii_strings):
-                                schema += f'"{cat}"'
-                                if i_cat != len(ascii_strings) - 1:
-                                    schema += ','
-                                else:
-                                    schema += ')'
-                        if len(non_ascii_strings):
-                            if not len(ascii_strings):
-                                schema += f'regex("{replace_non_ascii_characters(non_ascii_strings[0])}")'
-                                non_ascii_strings.pop(0)
-                            for cat in non_ascii_strings:
-                                schema += f' or regex("{replace_non_ascii_characters(cat)}")'
-                    else:
-                        schema += "any\n"
-                        continue
-            elif len(var.index) >= min_n_limits and check_type.check_is_numeric_positive(var):
-                if check_type.check_is_positive_integer(var):
-                    schema += "positiveInteger"
-                else:
-                    schema += "range(0, *)"
-            elif check_type.check_is_numeric(var):
-                if not use_regex_for_nums:
-                    schema += "range(*, *)"
-                else:
-                    if check_type.check_is_integer(var):
-                        schema += f'regex("{self.literals["Integer"]}")'
-                    else:
-                        schema += f'regex("{self.literals["Numeric"]}")'
-            elif check_type.check_regex(var, self.literals['XsdDateTimeWithTimeZoneLiteral']):
-                schema += "xDateTimeTz"
-            elif check_type.check_regex(var, self.literals['XsdDateTimeLiteral']):
-                schema += "xDateTime"
-            elif check_type.check_regex(var, self.literals['XsdDateLiteral']):
-                schema += "xDate"
-            elif check_type.check_regex(var, self.literals['XsdTimeLiteral']):
-                schema += "xTime"
-            elif check_type.check_regex(var, self.literals['String']):
-                str_var = var.dropna().to_list()
-                if all([str_val.isalpha() for str_val in str_var]) \
-                        and all([str_val.isupper() for str_val in str_var]) \
-                        and all([str_val.isupper() for str_val in missings]):
-                    schema += "upperCase "
-                elif all([str_val.isalpha() for str_val in str_var]) \
-                        and all([str_val.islower() for str_val in str_var]) \
-                        and all([str_val.islower() for str_val in missings]):
-                    schema += "lowerCase "
-                if all([len(str_val) == 1 for str_val in str_var]):
-                    schema += "length(1)"  # character
+        with profiling.stage("accumulate"):
+            accumulators = self.accumulators = self.accumulate_columns(min_n_limits)
+        with profiling.stage("schema"):
+            rules = [self.get_column_rule(acc, use_regex_for_nums, min_n_limits) for acc in accumulators]
+            self.schema_ir = CSVSchemaIR(self.version, self.seperator, rules)
+        logging.info(f"Inferred csv schema of {len(rules)} columns from file {self.csv_path}")
+        return self.schema_ir
+
+    def get_column_rule(self, acc: ColumnAccumulator, use_regex_for_nums: bool = False, min_n_limits: int = 100) \
+            -> ColumnRule:
+        """
+        Get the schema rule of a summarized column
+
+        :param acc: column accumulator
+        :param use_regex_for_nums: whether to use regex for numeric values (instead of range for ints and floats)
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        :return: column rule
+        """
+        if acc.n_rows == 0:  # no rows at all
+            return ColumnRule(acc.name, allows_empty=True)
+        # to check for the different missing values we have to use the dataframe with ignored missing values
+        missings = acc.get_missing_symbols()
+        column_type = acc.get_type(min_n_limits)
+        rule = ColumnRule(acc.name, column_type, missing_symbols=missings, allows_empty=acc.has_empty)
+        if column_type == BOOL:
+            rule.expressions = ['is("0")', 'is("1")']
+        elif column_type == CATEGORICAL:
+            cats = rule.categories = acc.get_categories()
+            if len(cats) == 1:  # constant value
+                if isinstance(cats[0], str) and not cats[0].isascii():
+                    rule.expressions = [f'regex("{replace_non_ascii_characters(cats[0])}")']
                 else:
-                    schema += "length(1, *)"
+                    rule.expressions = [f'is("{cats[0]}")']
+            elif acc.is_numeric:
+                rule.expressions = ["any(" + ",".join(f'"{cat}"' for cat in cats) + ")"]
+            elif acc.matches_literal(STRING):
+                ascii_strings = [cat for cat in cats if cat.isascii()]
+                if ascii_strings:
+                    rule.expressions.append("any(" + ",".join(f'"{cat}"' for cat in ascii_strings) + ")")
+                rule.expressions += [f'regex("{replace_non_ascii_characters(cat)}")' for cat in cats
+                                     if not cat.isascii()]
             else:
-                schema += "any\n"
-                continue
-            if len(missings):  # append alternative missing values
-                for i_m in missings:
-                    schema += f' or is("{i_m}")'
-            if any(self.df_na[col_name].isna()):
-                schema += " or empty"
-            if i_col < len(self.df.columns)-1:
-                schema += "\n"
-        logging.info(f"Inferred csv schema:\n\n{schema}\n")
-        return schema
+                return ColumnRule(acc.name, ANY, ["any"])
+        elif column_type == POSITIVE_INTEGER:
+            rule.expressions = ["positiveInteger"]
+        elif column_type == POSITIVE_NUMERIC:
+            rule.expressions = ["range(0, *)"]
+        elif column_type == NUMERIC:
+            if not use_regex_for_nums:
+                rule.expressions = ["range(*, *)"]
+            elif acc.is_integer:
+                rule.expressions = [f'regex("{self.literals["Integer"]}")']
+            else:
+                rule.expressions = [f'regex("{self.literals["Numeric"]}")']
+        elif column_type in self.literal_types:
+            rule.expressions = [self.literal_types[column_type]]
+        elif column_type == STRING:
+            expression = ""
+            if acc.is_alpha_upper and all([str_val.isupper() for str_val in missings]):
+                expression = "upperCase "
+            elif acc.is_alpha_lower and all([str_val.islower() for str_val in missings]):
+                expression = "lowerCase "
+            rule.expressions = [expression + ("length(1)" if acc.is_char else "length(1, *)")]  # char or string
+        else:
+            return ColumnRule(acc.name, ANY, ["any"])
+        return rule
 
-    def run(self, schema_fpath: Optional[str] = None) -> bool:
+    def validate_csv_schema(self, schema_fpath: str) -> bool:
+        """
+        Validate the csv file against a csv schema in chunks. The violations per column are kept in violations. In
+        incremental inference, only the new data is validated, data of previous runs fits the merged schema as well.
+
+        :param schema_fpath: path to csv schema
+        :return: True if validation passed, False otherwise
+        """
+        if not self.has_new_data:
+            return True
+        logging.info(f"Validate original data file {self.csv_path} against inferred schema {schema_fpath}")
+        try:
+            schema = CSVSchema.from_file(schema_fpath, self.literals)
+        except ValueError as e:
+            logging.warning(f"Cannot validate file {self.csv_path}, schema {schema_fpath} is not supported: {e}")
+            return False
+        self.fit_chunksize()
+        with profiling.stage("validate"):
+            self.violations = validate_csv(self.csv_path, schema, self.chunksize or self.validation_chunksize,
+                                           self.max_errors, None if self.compression else self.byte_range,
+                                           self.memory_budget)
+        profiling.add_bytes_read(self.get_read_size())
+        if self.violations.n_violations:
+            logging.warning(f"Validation of file {self.csv_path} against schema {schema_fpath} failed: "
+                            f"{self.violations.summary()}")
+            return False
+        return True
+
+    def get_cache_key(self, cache: Optional[ResultCache], use_regex_for_nums: bool = False, min_n_limits: int = 100) \
+            -> Optional[str]:
+        """
+        Get the key of the inference result in a result cache
+
+        :param cache: result cache or None
+        :param use_regex_for_nums: whether to use regex for numeric values (instead of range for ints and floats)
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        :return: cache key or None if the result is not cached, incremental inference is never cached
+        """
+        if cache is None or self.state_fpath is not None:
+            return None
+        params = {"format": "csv", "literals": get_file_hash(self.literals_fpath), "min_n_limits": min_n_limits,
+                  "use_regex_for_nums": use_regex_for_nums, "sample_rows": self.sample_rows,
+                  "sample_fraction": self.sample_fraction, "sample_seed": self.sample_seed}
+        return cache.get_key(self.csv_path, params)
+
+    def run(self, schema_fpath: Optional[str] = None, use_regex_for_nums: bool = False, min_n_limits: int = 100,
+            cache: Optional[ResultCache] = None) -> bool:
         """
         Run csv schema inference, save inferred schema (same path as data file with extension _schema-draft.csvs) and
-        validate it.
+        validate it. If a cache is given, the schema and validation result of an unchanged csv file are taken from it
+        without reading the file.
 
         :param schema_fpath: optional path for output schema, otherwise path will be data file name + _schema-draft.csvs
+        :param use_regex_for_nums: whether to use regex for numeric values (instead of range for ints and floats)
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        :param cache: optional cache of inference results
         :return: True if schema inference worked and data file could be validated with it, False otherwise
         """
-        schema = self.create_schema_from_csv()
+        with profiling.stage("cache"):
+            cache_key = self.get_cache_key(cache, use_regex_for_nums, min_n_limits)
+            cached = None if cache_key is None else cache.get(cache_key)
+        if cached is None:
+            schema = self.create_schema_from_csv(use_regex_for_nums, min_n_limits)
+        else:
+            schema = cached["schema"]
         if schema_fpath in [None, ""]:
             schema_fpath = get_schema_fpath(self.csv_path)
         os.makedirs(os.path.dirname(schema_fpath), exist_ok=True)
         try:
-            with open(schema_fpath, 'w') as f:
+            with profiling.stage("write"), open(schema_fpath, 'w') as f:
                 f.write(schema)
             logging.info(f"Saved inferred data schema at {schema_fpath}.")
-            return True
+            if cached is not None:
+                return cached["valid"]
+            if self.state_fpath is not None:
+                self.save_state()
+            valid = self.validate_csv_schema(schema_fpath)
+            if cache_key is not None:
+                cache.put(cache_key, {"schema": schema, "valid": valid})
+            return valid
         except IOError as e:
             logging.warning(f"Cannot store data schema at {schema_fpath}: {e}.")
             return False
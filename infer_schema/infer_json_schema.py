@@ -1,13 +1,22 @@
 import json
 import logging
 import os
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, TextIO, Tuple
 
-from genson import SchemaBuilder
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+import infer_schema.utils.profile_state as profile_state
+import infer_schema.utils.profiling as profiling
+from infer_schema.utils.json_columnar import infer_values_schema, iter_batches
+from infer_schema.utils.json_shards import MergeSchemaBuilder, ShardSchemaBuilder, build_shard_schema, \
+    get_line_aligned_shards
+from infer_schema.utils.json_stream import is_json_lines, iter_json_array, iter_json_lines, starts_with_array
+from infer_schema.utils.memory_budget import JSON_MEMORY_FACTOR, MemoryBudget
+from infer_schema.utils.result_cache import ResultCache
+from infer_schema.utils.utils import get_compression, get_schema_fpath, open_byte_range, open_data_file, \
+    strip_compression_extension
 
-from infer_schema.utils.utils import get_schema_fpath
+if TYPE_CHECKING:
+    from infer_schema.utils.json_validation import ValidationErrors
 
 JSONVersion = {
     6: "https://json-schema.org/draft-06/",  # draft_06
@@ -18,68 +27,259 @@ JSONVersion = {
 
 
 class InferJSONSchema:
-    def __init__(self, data_fpath: str, json_version: JSONVersion = JSONVersion[2020]) -> None:
+    def __init__(self, data_fpath: str, json_version: JSONVersion = JSONVersion[2020], jobs: int = 1,
+                 max_errors: Optional[int] = 100, state_fpath: Optional[str] = None,
+                 max_memory: Optional[int] = None) -> None:
         """
-        Initialize variables
+        Initialize variables. Files with extension .jsonl or .ndjson are read as json lines, i.e. one record per line,
+        and the inferred schema describes a single record. Files compressed with gzip, bz2 or xz (.gz, .bz2, .xz) are
+        decompressed while they are read.
 
-        :param data_fpath: path to json file containing the data
+        :param data_fpath: path to json or json lines file containing the data
         :param json_version: version of the json standard
+        :param jobs: number of worker processes json lines files are split to for inference and validation, other files
+            and compressed files are read by a single process
+        :param max_errors: maximum number of validation errors to collect before validation stops, None for no limit
+        :param state_fpath: optional path to the inference state for incremental inference. If it exists, only the new
+            data is read, i.e. the lines appended to a json lines file since the state was saved or the whole data file
+            if it is another file, e.g. a new partition, and merged into the state. The state is saved in run.
+        :param max_memory: optional memory budget of the run in bytes. The number of jobs is capped, json documents that
+            are not streamed are only parsed if they fit and streams are stopped once the budget is exceeded, a
+            MemoryBudgetError is raised if the budget cannot be met.
         """
         self.data_fpath = data_fpath
         self.json_version = json_version
+        self.max_errors = max_errors
+        self.validation_errors: Optional["ValidationErrors"] = None
+        self.compression = get_compression(data_fpath)
+        self.is_json_lines = is_json_lines(strip_compression_extension(data_fpath))
+        self.memory_budget = None if max_memory is None else MemoryBudget(max_memory)
+        # compressed files cannot be split at byte offsets
+        shardable = self.is_json_lines and self.compression is None
+        self.jobs = self.memory_budget.cap_workers(jobs) if self.memory_budget is not None and shardable else jobs
+        self.is_sharded = shardable and self.jobs > 1
+        self.state_fpath = state_fpath
+        self.state = profile_state.load_state(state_fpath, "json")
+        self.byte_range = None if state_fpath is None else profile_state.get_new_byte_range(data_fpath, self.state)
+        if self.byte_range is not None and 0 < self.byte_range[0] < self.byte_range[1] and not self.is_json_lines:
+            raise ValueError(f"Json file {data_fpath} changed since the state was saved, only json lines files can be "
+                             f"appended to")
+        self.state_schema: Optional[dict] = None  # lossless schema of all data read so far, saved as state
+
+    @property
+    def has_new_data(self) -> bool:
+        """
+        :return: False if the data file has not grown since the inference state was saved
+        """
+        return self.byte_range is None or self.byte_range[0] < self.byte_range[1]
+
+    def get_read_size(self) -> int:
+        """
+        :return: number of bytes read by a pass over the data, i.e. only the new lines in incremental inference
+        """
+        if self.byte_range is not None and self.is_json_lines:
+            return self.byte_range[1] - self.byte_range[0]
+        return os.path.getsize(self.data_fpath)
+
+    def open_json(self) -> TextIO:
+        """
+        Open the data that is read, i.e. only the new lines of a json lines file in incremental inference
+
+        :return: opened data file
+        """
+        if self.byte_range is not None and self.is_json_lines and self.compression is None:
+            return open_byte_range(self.data_fpath, *self.byte_range)
+        return open_data_file(self.data_fpath, 'rt')
+
+    def watch(self, records: Iterator[Any]) -> Iterator[Any]:
+        """
+        :param records: streamed records of the data file
+        :return: iterator over the records that checks the memory budget if one is given
+        """
+        if self.memory_budget is None:
+            return records
+        return self.memory_budget.watch(records, f"reading {self.data_fpath}")
+
+    def load_document(self, f: TextIO) -> Any:
+        """
+        Parse a json document that cannot be streamed at once. With a memory budget, it is only parsed if its estimated
+        memory fits in the budget.
+
+        :param f: opened data file
+        :return: parsed json document
+        """
+        if self.memory_budget is None:
+            return json.load(f)
+        with self.memory_budget.reserve(os.path.getsize(self.data_fpath) * JSON_MEMORY_FACTOR,
+                                        f"Parsing the json document {self.data_fpath}"):
+            return json.load(f)
+
+    def get_shards(self) -> List[Tuple[int, int]]:
+        """
+        :return: byte ranges of the (new) lines of a json lines file, one per job
+        """
+        return get_line_aligned_shards(self.data_fpath, self.jobs, *(self.byte_range or (0, None)))
 
     def create_schema_from_json(self) -> dict:
         """
         Infer the data schema from a json data file and return it as a dictionary. If a schema_path is provided, the
-        inferred schema will be stored under the specified path.
+        inferred schema will be stored under the specified path. Json lines files and json files with an array at the
+        top level are streamed, the records are inferred column by column in batches, see json_columnar.
 
         :return: inferred json schema as a dictionary
         """
         logging.info(f"Start json schema inference from file {self.data_fpath}")
-        builder = SchemaBuilder(schema_uri=self.json_version)
-        with open(self.data_fpath, 'r') as f:
-            json_content = json.load(f)
-            builder.add_object(json_content)
-        schema = builder.to_schema()
-        logging.info(f"Inferred json schema:\n {schema}\n")
+        # batch, shard and state schemas have to be merged without losing information, see json_shards
+        builder = ShardSchemaBuilder(schema_uri=self.json_version)
+        if self.state is not None:
+            builder.add_schema(self.state["schema"])
+        if not self.has_new_data:
+            logging.info(f"No new data in {self.data_fpath} since the inference state was saved")
+        elif self.is_sharded:
+            with profiling.stage("infer"):
+                self.add_shard_schemas(builder)
+            profiling.add_bytes_read(self.get_read_size())
+        else:
+            with profiling.stage("infer"), self.open_json() as f:
+                if self.is_json_lines:
+                    for batch in iter_batches(self.watch(iter_json_lines(f))):
+                        builder.add_schema(infer_values_schema(batch))
+                elif starts_with_array(f):
+                    # adding the elements in batches of single array schemas gives the same schema as adding the array
+                    builder.add_object([])
+                    for batch in iter_batches(self.watch(iter_json_array(f))):
+                        builder.add_schema({"type": "array", "items": infer_values_schema(batch)})
+                else:
+                    builder.add_object(self.load_document(f))
+            profiling.add_bytes_read(self.get_read_size())
+        with profiling.stage("schema"):
+            self.state_schema = builder.to_schema()
+            builder = MergeSchemaBuilder(schema_uri=self.json_version)
+            builder.add_schema(self.state_schema)
+            schema = builder.to_schema()
+        logging.debug(f"Inferred json schema:\n {schema}\n")
         return schema
 
+    def add_shard_schemas(self, builder: ShardSchemaBuilder) -> None:
+        """
+        Infer the schema of a json lines file in parallel. The file is split into shards of whole lines, the schema of
+        every shard is built in a worker process and the shard schemas are merged in file order, which gives the same
+        schema as a single process.
+
+        :param builder: lossless schema builder the shard schemas are added to
+        """
+        shards = self.get_shards()
+        logging.debug(f"Split {self.data_fpath} into {len(shards)} shards")
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [executor.submit(build_shard_schema, self.data_fpath, start, end, self.json_version)
+                       for start, end in shards]
+            for future in futures:
+                builder.add_schema(future.result())
+
+    def collect_validation_errors(self, schema: dict) -> "ValidationErrors":
+        """
+        Validate the data file against a schema record by record and collect the errors. Json lines files are validated
+        in the worker processes of the shards, json arrays are streamed if the schema describes every element alike.
+        In incremental inference, only the new lines are validated and record indices are relative to the first of them.
+
+        :param schema: json schema
+        :return: collected validation errors
+        """
+        # jsonschema is imported on first validation, so that cached results are returned without importing it
+        from infer_schema.utils.json_validation import ValidationErrors, get_item_schema, get_validator, \
+            validate_shard
+
+        errors = ValidationErrors(self.max_errors)
+        if not self.has_new_data:
+            return errors
+        if self.is_sharded:
+            schema_json = json.dumps(schema)
+            get_validator(schema_json)  # check the schema before starting the workers
+            shards = self.get_shards()
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                futures = [executor.submit(validate_shard, self.data_fpath, start, end, schema_json, self.max_errors)
+                           for start, end in shards]
+                for future in futures:
+                    errors.merge(future.result())
+            return errors
+        with self.open_json() as f:
+            if self.is_json_lines:
+                return errors.validate(get_validator(json.dumps(schema)), self.watch(iter_json_lines(f)))
+            item_schema = get_item_schema(schema)
+            if item_schema is not None and starts_with_array(f):
+                return errors.validate(get_validator(json.dumps(item_schema)), self.watch(iter_json_array(f)),
+                                       path_prefix="$[*]")
+            return errors.validate(get_validator(json.dumps(schema)), [self.load_document(f)])
+
     def validate_json_schema(self, schema_path: str) -> bool:
         """
-        Validate the data file against a schema.
+        Validate the data file against a schema. The collected errors are kept in validation_errors.
 
         :param schema_path: path to json schema
         :return: True if validation passed, False otherwise
         """
-        with open(self.data_fpath, 'r') as f:
-            data_instance = json.load(f)
         with open(schema_path, 'r') as f:
             schema = json.load(f)
-        try:
-            logging.info(f"Validate original data file {self.data_fpath} against inferred schema {schema_path}")
-            logging.debug(validate(data_instance, schema))
-            return True
-        except ValidationError as e:
-            logging.warning(f"Validation of file {self.data_fpath} against schema {schema_path} failed: {e}")
+        logging.info(f"Validate original data file {self.data_fpath} against inferred schema {schema_path}")
+        with profiling.stage("validate"):
+            self.validation_errors = self.collect_validation_errors(schema)
+        if self.has_new_data:
+            profiling.add_bytes_read(self.get_read_size())
+        if self.validation_errors.errors:
+            logging.warning(f"Validation of file {self.data_fpath} against schema {schema_path} failed: "
+                            f"{self.validation_errors.summary()}")
             return False
+        return True
+
+    def save_state(self) -> None:
+        """
+        Save the lossless schema of all data read so far as inference state, so that a later run only has to read new
+        data
+        """
+        profile_state.save_state(self.state_fpath, "json", self.data_fpath, self.byte_range[1],
+                                 schema=self.state_schema)
+
+    def get_cache_key(self, cache: Optional[ResultCache]) -> Optional[str]:
+        """
+        Get the key of the inference result in a result cache
+
+        :param cache: result cache or None
+        :return: cache key or None if the result is not cached, incremental inference is never cached
+        """
+        if cache is None or self.state_fpath is not None:
+            return None
+        params = {"format": "json", "json_version": self.json_version, "json_lines": self.is_json_lines}
+        return cache.get_key(self.data_fpath, params)
 
-    def run(self, schema_fpath: Optional[str] = None) -> bool:
+    def run(self, schema_fpath: Optional[str] = None, cache: Optional[ResultCache] = None) -> bool:
         """
         Run json schema inference, save inferred schema (same path as data file with extension _schema-draft.csvs) and
-        validate it.
+        validate it. If a cache is given, the schema and validation result of an unchanged data file are taken from it
+        without reading the file.
 
         :param schema_fpath: optional path for output schema, otherwise path will be data file name + _schema-draft.json
+        :param cache: optional cache of inference results
         :return: True if schema inference worked and data file could be validated with it, False otherwise
         """
-        schema = self.create_schema_from_json()
+        with profiling.stage("cache"):
+            cache_key = self.get_cache_key(cache)
+            cached = None if cache_key is None else cache.get(cache_key)
+        schema = self.create_schema_from_json() if cached is None else cached["schema"]
         if schema_fpath in [None, ""]:
             schema_fpath = get_schema_fpath(self.data_fpath)
         os.makedirs(os.path.dirname(schema_fpath), exist_ok=True)
         try:
-            with open(schema_fpath, "w") as f:
+            with profiling.stage("write"), open(schema_fpath, "w") as f:
                 json.dump(schema, f, indent=4)
             logging.info(f"Saved schema at {schema_fpath}.")
-            return self.validate_json_schema(schema_fpath)
+            if cached is not None:
+                return cached["valid"]
+            if self.state_fpath is not None:
+                self.save_state()
+            valid = self.validate_json_schema(schema_fpath)
+            if cache_key is not None:
+                cache.put(cache_key, {"schema": schema, "valid": valid})
+            return valid
         except IOError as e:
             logging.warning(f"Cannot store schema at {schema_fpath}: {e}.")
             return False
@@ -1,8 +1,79 @@
 import argparse
 import logging
+import sys
+from contextlib import nullcontext
+from typing import Optional
 
-from infer_schema.infer_json_schema import InferJSONSchema
-from infer_schema.infer_csv_schema import InferCSVSchema
+import infer_schema.utils.profiling as profiling
+from infer_schema.utils.memory_budget import MemoryBudgetError
+from infer_schema.utils.profile_state import get_state_fpath
+from infer_schema.utils.result_cache import DEFAULT_MAX_SIZE, ResultCache
+from infer_schema.utils.utils import get_data_format, get_schema_fpath
+
+
+def add_inference_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the arguments of schema inference that are shared by single file and batch mode
+
+    :param parser: argument parser
+    """
+    parser.add_argument('--chunksize', type=int, required=False, default=None,
+                        help='optional number of rows per chunk to stream large csv files instead of reading them at '
+                             'once')
+    parser.add_argument('--jobs', type=int, required=False, default=1,
+                        help='number of worker processes for schema inference of csv and json lines files (default: 1)')
+    parser.add_argument('--sample-rows', type=int, required=False, default=None,
+                        help='infer csv column types from a random sample of n rows and verify all rows against them')
+    parser.add_argument('--sample-fraction', type=float, required=False, default=None,
+                        help='infer csv column types from a random sample of this fraction of rows and verify all rows '
+                             'against them')
+    parser.add_argument('--max-errors', type=int, required=False, default=100,
+                        help='maximum number of validation errors to report, json validation stops once it is reached '
+                             '(default: 100)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always infer the schema instead of returning the cached result of an unchanged data file')
+    parser.add_argument('--cache-dir', type=str, required=False, default=None,
+                        help='directory of the result cache (default: infer-schema in the user cache directory)')
+    parser.add_argument('--cache-max-size', type=int, required=False, default=DEFAULT_MAX_SIZE // 2 ** 20,
+                        help='maximum size of the result cache in MB, least recently used results are evicted first '
+                             f'(default: {DEFAULT_MAX_SIZE // 2 ** 20})')
+    parser.add_argument('--cache-hash', action='store_true',
+                        help='identify unchanged data files by a hash of their content instead of their path, size and '
+                             'modification time')
+    parser.add_argument('--max-memory', type=int, required=False, default=None,
+                        help='memory budget in MB: csv files are streamed in chunks sized to fit it, the number of '
+                             'jobs is capped and the run fails with an error if the budget cannot be met')
+
+
+def run_inference(data_fpath: str, schema_fpath: Optional[str], args: argparse.Namespace,
+                  state_fpath: Optional[str] = None, jobs: Optional[int] = None) -> bool:
+    """
+    Infer, save and validate the schema of a data file
+
+    :param data_fpath: path to data file for which to infer schema
+    :param schema_fpath: optional path for output schema file
+    :param args: parsed arguments added by add_inference_arguments
+    :param state_fpath: optional path to the inference state for incremental inference
+    :param jobs: number of worker processes for the file, args.jobs if None
+    :return: True if schema inference worked and data file could be validated with it, False otherwise
+    """
+    jobs = args.jobs if jobs is None else jobs
+    max_memory = None if args.max_memory is None else args.max_memory * 2 ** 20
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_max_size * 2 ** 20, args.cache_hash)
+    data_format = get_data_format(data_fpath)
+    # the inference modules are imported once the file type is known, so json runs do not import pandas
+    if data_format == "json":
+        from infer_schema.infer_json_schema import InferJSONSchema
+        return InferJSONSchema(data_fpath, jobs=jobs, max_errors=args.max_errors, state_fpath=state_fpath,
+                               max_memory=max_memory).run(schema_fpath=schema_fpath, cache=cache)
+    if data_format == "csv":
+        from infer_schema.infer_csv_schema import InferCSVSchema
+        return InferCSVSchema(data_fpath, chunksize=args.chunksize, jobs=jobs, sample_rows=args.sample_rows,
+                              sample_fraction=args.sample_fraction, max_errors=args.max_errors,
+                              state_fpath=state_fpath, max_memory=max_memory).run(schema_fpath=schema_fpath,
+                                                                                  cache=cache)
+    raise ValueError(f"File type for {data_fpath} not supported. Only files with .json, .jsonl, .ndjson, .csv or "
+                     f".tsv-extension, optionally compressed (.gz, .bz2, .xz), are supported.")
 
 
 def main():
@@ -13,19 +84,54 @@ def main():
     parser.add_argument('data_fpath', type=str, help='path to data file for which to infer schema')
     parser.add_argument('--schema_fpath', type=str, required=False, help='optional path for output schema file',
                         default=None)
+    add_inference_arguments(parser)
+    parser.add_argument('--state', type=str, nargs='?', required=False, default=None, const='',
+                        help='incremental inference: only read data added since the last run and merge it into the '
+                             'inference state saved at this path (default if no path is given: next to the schema '
+                             'file)')
+    parser.add_argument('--profile', type=str, nargs='?', required=False, default=None, const='-',
+                        help='record the time per stage, column and data type predicate, the bytes read and the peak '
+                             'memory and write them to this path (default if no path is given: stderr)')
+    parser.add_argument('--profile-format', type=str, choices=['json', 'prometheus'], default='json',
+                        help='format of the profile: json trace or Prometheus text format (default: json)')
     args = parser.parse_args()
     data_fpath = args.data_fpath
     schema_fpath = args.schema_fpath
+    state_fpath = args.state
+    if state_fpath == '':
+        state_fpath = get_state_fpath(schema_fpath or get_schema_fpath(data_fpath))
 
-    if data_fpath.endswith("json"):
-        InferJSONSchema(data_fpath).run(schema_fpath=schema_fpath)
-    elif data_fpath.endswith("csv") or data_fpath.endswith("tsv"):
-        InferCSVSchema(data_fpath).run(schema_fpath=schema_fpath)
-    else:
+    if get_data_format(data_fpath) is None:
         msg = f"File type for {data_fpath} not supported."\
-              f" Only files with .json or .csv-extension are"\
-              f" supported."
+              f" Only files with .json, .jsonl, .ndjson, .csv or .tsv-extension,"\
+              f" optionally compressed (.gz, .bz2, .xz), are supported."
         logging.error(msg)
+    else:
+        with (profiling.profile() if args.profile is not None else nullcontext()) as profiler:
+            try:
+                run_inference(data_fpath, schema_fpath, args, state_fpath)
+            except MemoryBudgetError as e:
+                logging.error(f"Schema inference of {data_fpath} stopped: {e}")
+                sys.exit(1)
+        if profiler is not None:
+            write_profile(profiler, args.profile, args.profile_format)
+
+
+def write_profile(profiler: profiling.Profiler, profile_fpath: str, profile_format: str = "json") -> None:
+    """
+    Write the trace of a profiled run
+
+    :param profiler: profiler of the run
+    :param profile_fpath: output path or - for stderr
+    :param profile_format: json or prometheus
+    """
+    trace = profiler.to_json() + "\n" if profile_format == "json" else profiler.to_prometheus()
+    if profile_fpath == "-":
+        sys.stderr.write(trace)
+        return
+    with open(profile_fpath, "w") as f:
+        f.write(trace)
+    logging.info(f"Saved profile at {profile_fpath}.")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,342 @@
+"""
+Daemon mode: a long-running local inference service. The worker processes import the libraries and load the literals
+once when the service starts, so the jobs of a client do not pay for interpreter start-up and imports. Clients connect
+to a Unix socket or a localhost TCP port and send one json request per line, the service sends back one json response
+per line as soon as the job is done, see infer_schema.client. Where there are no Unix sockets, e.g. on Windows, the
+service listens on DEFAULT_PORT instead.
+
+Requests are {"id": ..., "type": "infer" | "validate" | "ping" | "shutdown", "data_fpath": ..., "schema_fpath": ...,
+"options": {...}, "include_schema": true}. Options override the inference arguments the service was started with, e.g.
+{"chunksize": 10000}. At most jobs + queue_size jobs are accepted at once, further requests are not read from the
+connection until a job is done (back-pressure).
+
+Any local user can connect to the TCP port, so schema and state files are only written and read in the directory of the
+data file or below the output root the service was started with.
+"""
+import argparse
+import asyncio
+import getpass
+import json
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from infer_schema.batch import infer_file_schema, init_worker, share_memory_budget
+from infer_schema.main import add_inference_arguments
+from infer_schema.utils.utils import get_data_format, get_schema_fpath
+
+JOB_TYPES = ["infer", "validate"]
+DEFAULT_PORT = 8765  # localhost TCP port of the service where there are no Unix sockets
+# the jobs of the service are its worker processes, each file is read by one of them, and the cache is the one of the
+# service, clients cannot make the service write to other directories
+JOB_OPTION_EXCLUDED = {"jobs", "cache_dir"}
+
+
+def get_default_socket_fpath() -> str:
+    """
+    :return: path of the Unix socket of the current user in the temporary directory
+    """
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()  # there is no getuid on Windows
+    return os.path.join(tempfile.gettempdir(), f"infer-schema-{user}.sock")
+
+
+def has_unix_sockets() -> bool:
+    """
+    :return: True if asyncio supports Unix sockets on this platform, not on Windows
+    """
+    return hasattr(asyncio, "start_unix_server")
+
+
+def is_in_directory(fpath: str, dpath: str) -> bool:
+    """
+    :param fpath: file path
+    :param dpath: directory path
+    :return: True if the file is in the directory or one of its subdirectories, after resolving symbolic links
+    """
+    fpath, dpath = os.path.realpath(fpath), os.path.realpath(dpath)
+    return os.path.splitdrive(fpath)[0] == os.path.splitdrive(dpath)[0] \
+        and os.path.commonpath([fpath, dpath]) == dpath
+
+
+def init_service_worker() -> None:
+    """
+    Warm up a worker process of the service. Only warnings of single jobs are logged, the service logs its requests.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    init_worker()
+
+
+def validate_file_schema(data_fpath: str, schema_fpath: str, args: argparse.Namespace) -> dict:
+    """
+    Validate a data file against an existing schema. Module level function, so it can run in worker processes. Errors
+    are reported in the result instead of being raised.
+
+    :param data_fpath: path to data file
+    :param schema_fpath: path to csv or json schema
+    :param args: parsed inference arguments
+    :return: summary of the file with its status (valid, invalid or error), timing and schema path
+    """
+    start = time.perf_counter()
+    data_format = get_data_format(data_fpath)
+    result = {"data_fpath": data_fpath, "format": data_format, "schema_fpath": schema_fpath}
+    max_memory = None if args.max_memory is None else args.max_memory * 2 ** 20
+    try:
+        if data_format == "json":
+            from infer_schema.infer_json_schema import InferJSONSchema
+            valid = InferJSONSchema(data_fpath, max_errors=args.max_errors, max_memory=max_memory) \
+                .validate_json_schema(schema_fpath)
+        elif data_format == "csv":
+            from infer_schema.infer_csv_schema import InferCSVSchema
+            valid = InferCSVSchema(data_fpath, chunksize=args.chunksize, max_errors=args.max_errors,
+                                   max_memory=max_memory).validate_csv_schema(schema_fpath)
+        else:
+            raise ValueError(f"File type for {data_fpath} not supported.")
+        result["status"] = "valid" if valid else "invalid"
+    except Exception as e:  # noqa: any failure of a single file is reported to the client
+        logging.error(f"Validation of {data_fpath} failed: {e}")
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+class InferenceService:
+    def __init__(self, args: argparse.Namespace, queue_size: Optional[int] = None, output_root: Optional[str] = None) \
+            -> None:
+        """
+        Initialize the service. The worker processes are started in serve.
+
+        :param args: parsed inference arguments, the defaults of every job. args.jobs is the number of worker processes.
+        :param queue_size: number of jobs accepted on top of the running ones before back-pressure, 2 * jobs if None
+        :param output_root: optional directory below which schema files may be written and read, besides the directory
+            of each data file
+        """
+        self.args = args
+        self.queue_size = 2 * args.jobs if queue_size is None else queue_size
+        self.output_root = output_root
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.stopped: Optional[asyncio.Event] = None
+        self.tasks = set()  # jobs in progress, waited for at shutdown
+        self.futures = set()  # jobs submitted to the workers, cancelled at shutdown if they did not start
+        self.n_jobs = 0
+
+    def get_job_args(self, options: dict) -> argparse.Namespace:
+        """
+        Get the inference arguments of a job
+
+        :param options: arguments of the job that override the defaults of the service
+        :return: parsed inference arguments
+        """
+        unknown = set(options).difference(vars(self.args)).union(JOB_OPTION_EXCLUDED.intersection(options))
+        if unknown:
+            raise ValueError(f"Unknown job options: {sorted(unknown)}")
+        return argparse.Namespace(**{**vars(self.args), **options})
+
+    def check_schema_fpath(self, data_fpath: str, schema_fpath: str) -> None:
+        """
+        Check that a job only writes and reads its schema and state files where the service allows it
+
+        :param data_fpath: path to data file
+        :param schema_fpath: path to schema file of the job
+        :raise ValueError: if the schema file is neither in the directory of the data file nor below the output root
+        """
+        allowed_dpaths = [os.path.dirname(os.path.abspath(data_fpath))]
+        if self.output_root is not None:
+            allowed_dpaths.append(self.output_root)
+        if not any(is_in_directory(schema_fpath, dpath) for dpath in allowed_dpaths):
+            raise ValueError(f"Schema file {schema_fpath} has to be in the directory of the data file"
+                             + ("" if self.output_root is None else f" or below the output root {self.output_root}"))
+
+    def start_executor(self) -> None:
+        """
+        Start the worker processes, each imports the inference modules and loads the literals once
+        """
+        self.executor = ProcessPoolExecutor(max_workers=self.args.jobs, initializer=init_service_worker)
+
+    async def run_job(self, request: dict) -> dict:
+        """
+        Run an inference or validation job in a worker process
+
+        :param request: job request
+        :return: response with the status, timing and, for inference, the schema
+        """
+        if request.get("type") not in JOB_TYPES:
+            raise ValueError(f"Unknown request type {request.get('type')}, expected one of {JOB_TYPES} or ping")
+        args = self.get_job_args(request.get("options", {}))
+        data_fpath = request["data_fpath"]
+        schema_fpath = request.get("schema_fpath") or get_schema_fpath(data_fpath)
+        self.check_schema_fpath(data_fpath, schema_fpath)
+        function = infer_file_schema if request["type"] == "infer" else validate_file_schema
+        executor = self.executor
+        try:
+            future = executor.submit(function, data_fpath, schema_fpath, args)
+            self.futures.add(future)
+            future.add_done_callback(self.futures.discard)
+            result = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # a crashed worker breaks the pool, the following jobs get new workers
+            if executor is self.executor:
+                logging.error(f"Worker process died while processing {data_fpath}, restarting the workers")
+                executor.shutdown(wait=False)
+                self.start_executor()
+            raise
+        if request["type"] == "infer" and request.get("include_schema", True) and result["status"] != "error":
+            with open(schema_fpath, "r") as f:
+                result["schema"] = f.read()
+        return result
+
+    async def handle_request(self, request: dict, queued: float) -> dict:
+        """
+        Run a job and report errors in the response instead of raising them, so that one job does not stop the service
+
+        :param request: job request
+        :param queued: time the request was read, before it waited for a free slot
+        :return: response
+        """
+        try:
+            response = await self.run_job(request)
+        except Exception as e:  # noqa: any failure of a single job is reported to the client
+            response = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.slots.release()
+        self.n_jobs += 1
+        # seconds is the time in the worker, the rest of the total time the job waited for a slot and a free worker
+        response.update(id=request.get("id"), total_seconds=round(time.perf_counter() - queued, 6))
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Read the requests of a client line by line and write each response once its job is done, responses of
+        concurrent jobs are not in request order
+
+        :param reader: stream of requests
+        :param writer: stream of responses
+        """
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(response: dict) -> None:
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        async def run_and_respond(request: dict, queued: float) -> None:
+            await respond(await self.handle_request(request, queued))
+
+        while not self.stopped.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request is no json object")
+            except ValueError as e:
+                await respond({"status": "error", "error": f"Invalid request: {e}"})
+                continue
+            if request.get("type") == "ping":
+                await respond({"id": request.get("id"), "status": "ok", "n_jobs": self.n_jobs})
+            elif request.get("type") == "shutdown":
+                await respond({"id": request.get("id"), "status": "ok"})
+                self.stopped.set()
+            else:
+                queued = time.perf_counter()
+                await self.slots.acquire()  # back-pressure: stop reading the connection while all slots are taken
+                task = asyncio.create_task(run_and_respond(request, queued))
+                for task_set in [tasks, self.tasks]:
+                    task_set.add(task)
+                    task.add_done_callback(task_set.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        writer.close()
+
+    async def serve(self, socket_fpath: Optional[str] = None, port: Optional[int] = None) -> None:
+        """
+        Start the worker processes and serve requests until a shutdown request, SIGINT or SIGTERM
+
+        :param socket_fpath: path of the Unix socket, used if no port is given
+        :param port: optional localhost TCP port
+        """
+        self.slots = asyncio.Semaphore(self.args.jobs + self.queue_size)
+        self.stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            try:
+                loop.add_signal_handler(signum, self.stopped.set)
+            except NotImplementedError:
+                pass  # no signal handlers in the event loop on Windows, the service is stopped by a shutdown request
+        self.start_executor()
+        # start the workers before the first request, so that every job is served by a warm worker
+        await asyncio.gather(*[loop.run_in_executor(self.executor, time.sleep, 0) for _ in range(self.args.jobs)])
+        if port is None and not has_unix_sockets():
+            logging.warning(f"Unix sockets are not supported on this platform, listening on localhost TCP port "
+                            f"{DEFAULT_PORT} instead, choose the port with --port")
+            port = DEFAULT_PORT
+        if port is not None:
+            server = await asyncio.start_server(self.handle_connection, "127.0.0.1", port)
+            address = f"127.0.0.1:{port}"
+        else:
+            socket_fpath = socket_fpath or get_default_socket_fpath()
+            if os.path.exists(socket_fpath):
+                os.remove(socket_fpath)  # left over by a service that was killed
+            server = await asyncio.start_unix_server(self.handle_connection, socket_fpath)
+            address = socket_fpath
+        logging.info(f"Inference service with {self.args.jobs} workers listening on {address}")
+        try:
+            async with server:
+                await self.stopped.wait()
+                if self.tasks:
+                    await asyncio.wait(self.tasks)  # accepted jobs are finished and answered
+        finally:
+            # jobs that did not start are cancelled, shutdown(cancel_futures=True) needs python 3.9
+            for future in list(self.futures):
+                future.cancel()
+            self.executor.shutdown(wait=True)
+            if port is None and os.path.exists(socket_fpath):
+                os.remove(socket_fpath)
+        logging.info(f"Inference service stopped after {self.n_jobs} jobs")
+
+
+def get_argument_parser() -> argparse.ArgumentParser:
+    """
+    :return: parser of the service arguments
+    """
+    parser = argparse.ArgumentParser(description='serve schema inference and validation jobs to local clients')
+    parser.add_argument('--socket', type=str, required=False, default=None,
+                        help=f'path of the Unix socket (default: {get_default_socket_fpath()}, on Windows the service '
+                             f'listens on port {DEFAULT_PORT} instead)')
+    parser.add_argument('--port', type=int, required=False, default=None,
+                        help='listen on this localhost TCP port instead of a Unix socket')
+    parser.add_argument('--output-root', type=str, required=False, default=None,
+                        help='directory below which jobs may write schema files, besides the directory of each data '
+                             'file')
+    parser.add_argument('--queue-size', type=int, required=False, default=None,
+                        help='number of jobs accepted on top of the running ones before clients have to wait '
+                             '(default: 2 * jobs)')
+    parser.add_argument('--state', action='store_true',
+                        help='incremental inference with the inference state saved next to each schema file')
+    add_inference_arguments(parser)
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+
+    logging.basicConfig(format='(%(levelname)s) - %(message)s', level=logging.INFO)
+
+    args = get_argument_parser().parse_args(argv)
+    socket_fpath, port, queue_size = args.socket, args.port, args.queue_size
+    output_root = None if args.output_root is None else os.path.realpath(args.output_root)
+    for name in ["socket", "port", "queue_size", "output_root"]:
+        delattr(args, name)  # the remaining arguments are the defaults of the jobs
+    asyncio.run(InferenceService(share_memory_budget(args), queue_size, output_root).serve(socket_fpath, port))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
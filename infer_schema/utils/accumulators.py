@@ -0,0 +1,356 @@
+"""
+Mergeable per-column summaries for csv schema inference. A column is fed chunk by chunk into an accumulator, which keeps
+only the flags and counts needed for the schema decision, so memory depends on the chunk size and not on the file size.
+"""
+import logging
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import infer_schema.utils.check_dtype as check_type
+import infer_schema.utils.profiling as profiling
+from infer_schema.utils.distinct import DistinctTracker
+from infer_schema.utils.literals import LiteralEngine
+
+# column types in the order in which they are tried, literal names of the literal engine are types as well and are
+# tried between NUMERIC and ANY
+BOOL = "bool"
+CATEGORICAL = "categorical"
+POSITIVE_INTEGER = "positiveInteger"
+POSITIVE_NUMERIC = "positiveNumeric"
+NUMERIC = "numeric"
+ANY = "any"
+STRING = "String"  # literal name of strings
+
+FLAGS = ["is_bool", "is_numeric", "is_numeric_positive", "is_integer", "is_positive_integer", "is_alpha_upper",
+         "is_alpha_lower", "is_char"]
+IMPLIED_FLAGS = {  # flags that hold for all values that fit a column type
+    BOOL: ["is_bool", "is_numeric", "is_numeric_positive", "is_integer", "is_positive_integer", "is_char"],
+    POSITIVE_INTEGER: ["is_numeric", "is_numeric_positive", "is_integer", "is_positive_integer"],
+    POSITIVE_NUMERIC: ["is_numeric", "is_numeric_positive"],
+    NUMERIC: ["is_numeric", "is_integer"],
+    STRING: ["is_alpha_upper", "is_alpha_lower", "is_char"],
+}
+
+
+class ColumnAccumulator:
+    def __init__(self, name: str, missing_symbols: List[str], literal_engine: LiteralEngine, n_max_cats: int = 25) \
+            -> None:
+        """
+        Initialize an empty summary of a csv column
+
+        :param name: column name
+        :param missing_symbols: symbols pandas treats as missing, which are reported as alternatives in the schema
+        :param literal_engine: engine of the literals that all values are checked against
+        :param n_max_cats: maximum number of allowed categories, at most n_max_cats + 1 distinct values are kept
+        """
+        self.name = name
+        self.missing_symbols = missing_symbols
+        self.literal_engine = literal_engine
+        self.n_max_cats = n_max_cats
+
+        self.n_rows = 0  # all rows, including missing values
+        self.n_values = 0  # non-missing values
+        self.has_empty = False
+        self.found_missing_symbols = set()
+        self.is_bool = True
+        self.is_numeric = True
+        self.is_numeric_positive = True
+        self.is_integer = True
+        self.is_positive_integer = True
+        self.literal_mask = literal_engine.all_bits  # literals all values match
+        self.is_alpha_upper = True
+        self.is_alpha_lower = True
+        self.is_char = True
+        self.categories = DistinctTracker(n_max_cats)  # first n_max_cats + 1 distinct values
+        self.allow_categorical = True
+        self.verified_type = None  # column type checked in verification mode, see start_verification
+        self.n_verified_values = 0  # values only checked against the verified type, not against all flags
+        self.sampled_categories: Optional[DistinctTracker] = None  # categories of the sample during verification
+
+    def update(self, var_na: pd.Series) -> None:
+        """
+        Add a chunk of the column to the summary
+
+        :param var_na: chunk of the column as strings where only empty values are NaN
+        """
+        profile = self._encode(var_na)
+        self.n_rows += len(var_na.index)
+        self._check(profile)
+
+    def _encode(self, var_na: pd.Series) -> check_type.ColumnProfile:
+        """
+        Count the values of a chunk and get the profile of its distinct non-missing values
+
+        :param var_na: chunk of the column as strings where only empty values are NaN
+        :return: dictionary encoded profile of the chunk
+        """
+        # dictionary encode the chunk once, all checks only run on its distinct values
+        codes, uniques = pd.factorize(var_na)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        if not self.has_empty and (codes < 0).any():
+            self.has_empty = True
+        is_missing_symbol = uniques.isin(self.missing_symbols)
+        self.found_missing_symbols.update(uniques[is_missing_symbol])
+
+        profile = check_type.ColumnProfile(pd.Series(uniques[~is_missing_symbol], dtype=object),
+                                           counts=counts[~is_missing_symbol])
+        self.n_values += profile.n_values
+        return profile
+
+    def _check(self, profile: check_type.ColumnProfile) -> None:
+        """
+        Update the type flags and categories with the distinct values of a chunk
+
+        :param profile: dictionary encoded profile of the chunk
+        """
+        if not profile.n_values:
+            return
+        if self.is_bool:
+            self.is_bool = check_type.check_is_bool(profile)
+        if self.is_numeric:
+            self.is_numeric = check_type.check_is_numeric(profile)
+        if self.is_numeric_positive:
+            self.is_numeric_positive = check_type.check_is_numeric_positive(profile)
+        if self.is_integer:
+            self.is_integer = check_type.check_is_integer(profile)
+        if self.is_positive_integer:
+            self.is_positive_integer = check_type.check_is_positive_integer(profile)
+        if self.literal_mask:
+            self.literal_mask = self.literal_engine.classify(profile.values, self.literal_mask)
+        str_values = profile.values.tolist()
+        if self.is_alpha_upper:
+            self.is_alpha_upper = all([x.isalpha() and x.isupper() for x in str_values])
+        if self.is_alpha_lower:
+            self.is_alpha_lower = all([x.isalpha() and x.islower() for x in str_values])
+        if self.is_char:
+            self.is_char = all([len(x) == 1 for x in str_values])
+        self.categories.add_distinct(profile.values)
+
+    def merge(self, other: "ColumnAccumulator") -> None:
+        """
+        Merge the summary of a later part of the same column into this one
+
+        :param other: accumulator of the same column that was fed with the rows following the rows of this accumulator
+        """
+        self.n_rows += other.n_rows
+        self.n_values += other.n_values
+        self.has_empty = self.has_empty or other.has_empty
+        self.found_missing_symbols.update(other.found_missing_symbols)
+        self.is_bool = self.is_bool and other.is_bool
+        self.is_numeric = self.is_numeric and other.is_numeric
+        self.is_numeric_positive = self.is_numeric_positive and other.is_numeric_positive
+        self.is_integer = self.is_integer and other.is_integer
+        self.is_positive_integer = self.is_positive_integer and other.is_positive_integer
+        self.literal_mask &= other.literal_mask
+        self.is_alpha_upper = self.is_alpha_upper and other.is_alpha_upper
+        self.is_alpha_lower = self.is_alpha_lower and other.is_alpha_lower
+        self.is_char = self.is_char and other.is_char
+        self.allow_categorical = self.allow_categorical and other.allow_categorical
+        self.categories.merge(other.categories)
+
+    def start_verification(self, n_rows: int, min_n_limits: int = 100) -> None:
+        """
+        Switch from a summary of a sample of the rows to verification of all rows. The column type inferred from the
+        sample is fixed and all rows are only checked against it in verify. It is only widened if values do not fit.
+
+        :param n_rows: number of rows of the whole column, including missing values
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        """
+        self.n_rows = n_rows
+        self.verified_type = self.get_type(min_n_limits)
+        self.n_values = 0  # recounted during verification
+        self.n_verified_values = 0
+        # categories are collected again from all rows, so that they are in the order of the file
+        self.sampled_categories, self.categories = self.categories, DistinctTracker(self.n_max_cats)
+
+    def verify(self, var_na: pd.Series, min_n_limits: int = 100) -> None:
+        """
+        Check whether a chunk of the column fits the verified column type. If it does not, the summary is restricted to
+        what is known to hold for the rows verified so far and updated with the chunk, which widens the column type.
+        Without verified rows, e.g. if the sample is empty, the summary is only updated with the chunk.
+
+        :param var_na: chunk of the column as strings where only empty values are NaN
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        """
+        profile = self._encode(var_na)
+        self.categories.add_distinct(profile.values)  # bounded, so categories stay known for all rows
+        if self.fits(profile, self.verified_type):
+            self.n_verified_values += profile.n_values
+            return
+        logging.debug(f"Values of column {self.name} do not fit inferred type {self.verified_type}, widen type")
+        if self.n_verified_values:
+            self.restrict(self.verified_type)
+        self._check(profile)
+        self.verified_type = self.get_type(min_n_limits)
+        self.n_verified_values = 0  # all flags are known for the rows so far
+
+    def finish_verification(self) -> None:
+        """
+        Restrict the summary to the verified column type, flags that were not verified for all rows are dropped
+        """
+        if self.n_verified_values:
+            self.restrict(self.verified_type)
+        self.verified_type = None
+        self.n_verified_values = 0
+        self.sampled_categories = None
+
+    def fits(self, profile: check_type.ColumnProfile, column_type: str) -> bool:
+        """
+        Check whether the distinct values of a chunk fit a column type and all flags implied by it
+
+        :param profile: dictionary encoded profile of the chunk
+        :param column_type: column type as returned by get_type
+        :return: True if all values fit the column type
+        """
+        if not profile.n_values or column_type == ANY:
+            return True
+        if column_type == CATEGORICAL:
+            categories = self.categories if self.sampled_categories is None else self.sampled_categories
+            return all(value in categories for value in profile.values)
+        if column_type == BOOL:
+            return check_type.check_is_bool(profile)
+        if column_type == POSITIVE_INTEGER:
+            return check_type.check_is_positive_integer(profile)
+        if column_type == POSITIVE_NUMERIC:
+            return check_type.check_is_numeric_positive(profile)
+        if column_type == NUMERIC:
+            return check_type.check_is_numeric(profile) \
+                and (not self.is_integer or check_type.check_is_integer(profile))
+        if not self.literal_engine.classify(profile.values, self.literal_engine.bits[column_type]):
+            return False
+        if column_type == STRING:
+            str_values = profile.values.tolist()
+            return (not self.is_alpha_upper or all([x.isalpha() and x.isupper() for x in str_values])) \
+                and (not self.is_alpha_lower or all([x.isalpha() and x.islower() for x in str_values])) \
+                and (not self.is_char or all([len(x) == 1 for x in str_values]))
+        return True
+
+    def restrict(self, column_type: str) -> None:
+        """
+        Drop all flags that are not implied by a column type, i.e. that are unknown for rows only checked against it.
+        Categories are tracked for all rows and values of the other column types match the String literal, so both are
+        kept.
+
+        :param column_type: column type as returned by get_type
+        """
+        if column_type == CATEGORICAL:
+            return  # all checked values are known categories, so all flags are known
+        implied = IMPLIED_FLAGS.get(column_type, [])
+        for flag in FLAGS:
+            if flag not in implied:
+                setattr(self, flag, False)
+        self.literal_mask &= self.literal_engine.bits.get(column_type, 0) | self.literal_engine.bits.get(STRING, 0)
+
+    def to_dict(self) -> dict:
+        """
+        Get the summary as json serializable dictionary, e.g. to persist it for incremental inference
+
+        :return: summary of the column without missing symbols and literal engine
+        """
+        state = {"name": self.name, "n_max_cats": self.n_max_cats, "n_rows": self.n_rows, "n_values": self.n_values,
+                 "has_empty": self.has_empty, "found_missing_symbols": sorted(self.found_missing_symbols),
+                 "literals": [name for name in self.literal_engine.names if self.matches_literal(name)],
+                 "categories": list(self.categories.values), "allow_categorical": self.allow_categorical}
+        state.update({flag: getattr(self, flag) for flag in FLAGS})
+        return state
+
+    @classmethod
+    def from_dict(cls, state: dict, missing_symbols: List[str], literal_engine: LiteralEngine) \
+            -> "ColumnAccumulator":
+        """
+        Restore a summary saved with to_dict
+
+        :param state: summary of the column as returned by to_dict
+        :param missing_symbols: symbols pandas treats as missing, which are reported as alternatives in the schema
+        :param literal_engine: engine of the literals that all values are checked against
+        :return: column accumulator
+        """
+        acc = cls(state["name"], missing_symbols, literal_engine, state["n_max_cats"])
+        acc.n_rows = state["n_rows"]
+        acc.n_values = state["n_values"]
+        acc.has_empty = state["has_empty"]
+        acc.found_missing_symbols = set(state["found_missing_symbols"])
+        acc.literal_mask = sum(literal_engine.bits[name] for name in state["literals"] if name in literal_engine.bits)
+        acc.categories.add_distinct(state["categories"])
+        acc.allow_categorical = state["allow_categorical"]
+        for flag in FLAGS:
+            setattr(acc, flag, state[flag])
+        return acc
+
+    def matches_literal(self, name: str) -> bool:
+        """
+        Check whether all values of the column match a literal
+
+        :param name: literal name
+        :return: True if all non-missing values match the literal
+        """
+        return self.literal_engine.matches(self.literal_mask, name)
+
+    def get_missing_symbols(self) -> List[str]:
+        """
+        Get the pandas missing symbols found in the column in the order of the missing symbols list
+
+        :return: list of found missing symbols
+        """
+        return [m for m in self.missing_symbols if m in self.found_missing_symbols]
+
+    def get_categories(self) -> Optional[List[str]]:
+        """
+        Get the distinct non-missing values in order of appearance
+
+        :return: list of distinct values or None if there are more than n_max_cats distinct values
+        """
+        return self.categories.get_values()
+
+    def is_categorical(self) -> bool:
+        """
+        Check whether the column might be categorical, see check_dtype.heuristic_check_categorical
+
+        :return: True if column is assumed to be categorical
+        """
+        return self.allow_categorical \
+            and check_type.heuristic_check_categorical_counts(self.n_values, len(self.categories), self.n_max_cats)
+
+    def get_type(self, min_n_limits: int = 100) -> str:
+        """
+        Get the most specific column type all values fit
+
+        :param min_n_limits: minimum number of total values for a variable to be considered positive
+        :return: one of the column types of this module or the name of the first literal all values match
+        """
+        if self.is_bool:
+            return BOOL
+        if self.is_categorical():
+            return CATEGORICAL
+        if self.n_rows >= min_n_limits and self.is_numeric_positive:
+            return POSITIVE_INTEGER if self.is_positive_integer else POSITIVE_NUMERIC
+        if self.is_numeric:
+            return NUMERIC
+        for literal in self.literal_engine.names:
+            if self.matches_literal(literal):
+                return literal
+        return ANY
+
+
+def accumulate_chunk(chunk_na: pd.DataFrame, missing_symbols: List[str], literal_engine: LiteralEngine,
+                     n_max_cats: int = 25) -> List[ColumnAccumulator]:
+    """
+    Summarize every column of a chunk in a new accumulator. Module level function, so it can run in worker processes.
+
+    :param chunk_na: chunk of (some columns of) the csv file as strings where only empty values are NaN
+    :param missing_symbols: symbols pandas treats as missing, which are reported as alternatives in the schema
+    :param literal_engine: engine of the literals that all values are checked against
+    :param n_max_cats: maximum number of allowed categories
+    :return: list of column accumulators in column order
+    """
+    accumulators = []
+    for col_name, var_na in chunk_na.items():
+        start = time.perf_counter()
+        acc = ColumnAccumulator(col_name, missing_symbols, literal_engine, n_max_cats)
+        acc.update(var_na)
+        accumulators.append(acc)
+        profiling.add_column_seconds(col_name, time.perf_counter() - start)
+    return accumulators
@@ -1,129 +1,220 @@
 """
 Helper methods to check variables for data types. Pandas data type inference does not work well in case of missing
 values because NaN are interpreted as floats.
+
+All checks accept either a pandas series or a ColumnProfile. A profile parses the variable only once, so checking the
+same variable for several data types should be done on a profile.
 """
 import math
+import numpy as np
 import pandas as pd
 import re
 import warnings
+from typing import Optional, Union
+
+from infer_schema.utils.distinct import DistinctTracker
+from infer_schema.utils.profiling import profiled
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
+# syntax of the numbers the csv validator accepts in range and positiveInteger, float() also parses e.g. " 1", "1_0"
+# and "inf", which would fail validation against the inferred schema
+NUMBER_PATTERN = r"[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+POSITIVE_INTEGER_PATTERN = "[0-9]+"
+BOOL_VALUES = ["0", "1"]  # the schema of a bool column is is("0") or is("1")
+
+
+class ColumnProfile:
+    def __init__(self, var: pd.Series, counts: Optional[np.ndarray] = None) -> None:
+        """
+        Parse the non-missing values of a variable once into numpy arrays. Derived masks are computed on first access
+        and cached. The variable can be dictionary encoded, i.e. hold only its distinct values together with their
+        number of occurrences, then all checks only run on the distinct values.
+
+        :param var: pandas series of the variable or of its distinct values
+        :param counts: optional number of occurrences of each value of var if var holds distinct values
+        """
+        self.null_mask = var.isna().to_numpy()
+        self.values = var.to_numpy(dtype=object)[~self.null_mask]  # non-missing values
+        self.counts = None if counts is None else np.asarray(counts)[~self.null_mask]
+        # values of a numeric series are checked by value, text values by their syntax as well
+        self.has_numeric_dtype = pd.api.types.is_numeric_dtype(var.dtype)
+        try:
+            # same parsing as var.astype("float"), i.e. float() for every value
+            self.float_values: Optional[np.ndarray] = self.values.astype("float")
+        except (ValueError, TypeError):
+            self.float_values = None  # at least one value is not numeric
+        if self.float_values is not None and not (np.isfinite(self.float_values).all()
+                                                  and (self.has_numeric_dtype or self.match(NUMBER_PATTERN))):
+            self.float_values = None  # numbers float() parses but the csv validator does not
+        self._integer_mask = None
+        self._bool_mask = None
+
+    @property
+    def n_values(self) -> int:
+        """
+        :return: number of non-missing values of the variable
+        """
+        return len(self.values) if self.counts is None else int(self.counts.sum())
+
+    @property
+    def n_unique_values(self) -> int:
+        """
+        :return: number of unique non-missing values of the variable
+        """
+        return len(pd.unique(self.values)) if self.counts is None else len(self.values)
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.float_values is not None
+
+    def match(self, pattern: str) -> bool:
+        """
+        :param pattern: regular expression
+        :return: True if all non-missing values, which have to be strings, match the whole regular expression
+        """
+        return all(map(re.compile(pattern).fullmatch, self.values))
+
+    @property
+    def integer_mask(self) -> np.ndarray:
+        """
+        Mask of the non-missing values that are integers, i.e. that could be cast with int(). All values are False if
+        the variable is not numeric.
+
+        :return: boolean array with one entry per non-missing value
+        """
+        if self._integer_mask is None:
+            if not self.is_numeric:
+                self._integer_mask = np.zeros(len(self.values), dtype=bool)
+            elif self.has_numeric_dtype:
+                self._integer_mask = np.isfinite(self.float_values) & (self.float_values == np.floor(self.float_values))
+            else:
+                # a finite float literal without decimal point or exponent is an integer literal
+                has_float_syntax = pd.Series(self.values, dtype=object).str.contains("[.eE]", regex=True).to_numpy()
+                self._integer_mask = np.isfinite(self.float_values) & ~has_float_syntax.astype(bool)
+        return self._integer_mask
+
+    @property
+    def bool_mask(self) -> np.ndarray:
+        """
+        Mask of the non-missing values that are the integers 0 or 1, written as 0 or 1
+
+        :return: boolean array with one entry per non-missing value
+        """
+        if self._bool_mask is None:
+            if self.has_numeric_dtype:
+                self._bool_mask = self.integer_mask & ((self.float_values == 0) | (self.float_values == 1))
+            else:
+                self._bool_mask = np.isin(self.values, BOOL_VALUES) if self.is_numeric \
+                    else np.zeros(len(self.values), dtype=bool)
+        return self._bool_mask
+
+
+def get_profile(var: Union[pd.Series, ColumnProfile]) -> ColumnProfile:
+    """
+    Get the profile of a variable
+
+    :param var: pandas series of the variable or its profile
+    :return: given profile or new profile of the series
+    """
+    return var if isinstance(var, ColumnProfile) else ColumnProfile(var)
+
 
-def check_is_integer(var: pd.Series) -> bool:
+@profiled
+def check_is_integer(var: Union[pd.Series, ColumnProfile]) -> bool:
     """
     Check whether all data points of a variable in a pandas dataframe are of integer type
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :return: True if the variable is integer
     """
-    if not check_is_numeric(var):
-        return False
-    else:
-        try:
-            var.dropna().astype("int")
-            return True
-        except ValueError:
-            return False
+    profile = get_profile(var)
+    return profile.is_numeric and bool(profile.integer_mask.all())
 
 
-def check_is_positive_integer(var: pd.Series) -> bool:
+@profiled
+def check_is_positive_integer(var: Union[pd.Series, ColumnProfile]) -> bool:
     """
-    Check if all data points of a variable in a pandas dataframe are integers >= 0 by casting them to string.
+    Check if all data points of a variable in a pandas dataframe are integers >= 0 written without sign.
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :return: True if the variable only contains integers >=0
     """
-    if not check_is_integer(var):
+    profile = get_profile(var)
+    if not check_is_integer(profile):
         return False
-    else:
-        var = var.dropna().astype("int")
-        values_list = var.to_list()
-        return all([str(x).isdigit() for x in values_list])
+    if profile.has_numeric_dtype:
+        return bool((profile.float_values >= 0).all())
+    return profile.match(POSITIVE_INTEGER_PATTERN)
 
 
-def check_is_float(var: pd.Series, allow_integers: bool = True) -> bool:
+@profiled
+def check_is_float(var: Union[pd.Series, ColumnProfile], allow_integers: bool = True) -> bool:
     """
     Check whether data points of a variable in a pandas dataframe are of float type. The parameter allow_integers
     specifies whether values that are encoded as integers (e.g. a=1) are also accepted as floats. In that case, it
     is only checked whether the variable is numeric. NaN values are ignored
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :param allow_integers: whether values encoded as integers are also accepted as floats
     :return: True if the variable is float
     """
-    is_numeric = check_is_numeric(var)
-    if allow_integers:
-        return is_numeric
-    elif is_numeric:
-        var = var.dropna().astype("float")
-        values_list = var.to_list()
-        return all([isinstance(x, float) for x in values_list])
-    else:
-        return False
+    # all numeric values are parsed to floats, so integer encoded values are accepted either way
+    return check_is_numeric(var)
 
 
-def check_is_numeric(var: pd.Series):
+@profiled
+def check_is_numeric(var: Union[pd.Series, ColumnProfile]) -> bool:
     """
     Check whether all data points of a variable in a pandas dataframe are numeric.
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :return: True if the variable is numeric
     """
-    try:
-        var = var.dropna().astype("float")
-        return pd.api.types.is_numeric_dtype(var)
-    except ValueError:
-        return False
+    return get_profile(var).is_numeric
 
 
-def check_is_numeric_positive(var: pd.Series) -> bool:
+@profiled
+def check_is_numeric_positive(var: Union[pd.Series, ColumnProfile]) -> bool:
     """
     Check if all non-missing values of a numeric variable are >=0.
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :return: True if the variable contains only values >=0
     """
-    if not check_is_numeric(var):
-        return False
-    else:
-        var = var.dropna().astype("float")
-        values_list = var.to_list()
-        return all([x >= 0 for x in values_list])
+    profile = get_profile(var)
+    return profile.is_numeric and bool((profile.float_values >= 0).all())
 
 
-def check_is_bool(var: pd.Series):
+@profiled
+def check_is_bool(var: Union[pd.Series, ColumnProfile]) -> bool:
     """
-    Check whether all data points of a variable in a pandas dataframe are boolean by casting the non-missing values
-    to boolean and comparing it against original variable.
+    Check whether all data points of a variable in a pandas dataframe are boolean, i.e. all non-missing values are
+    the integers 0 or 1.
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :return: True if the variable is boolean
     """
-    values_list = var.dropna().to_list()
-    try:
-        cast_to_int = [int(i) for i in values_list]
-        cast_to_bool = [bool(i) for i in cast_to_int]
-        return cast_to_bool == cast_to_int
-    except ValueError:
-        return False
+    return bool(get_profile(var).bool_mask.all())
 
 
-def check_regex(var: pd.Series, expression: str) -> bool:
+@profiled
+def check_regex(var: Union[pd.Series, ColumnProfile], expression: str) -> bool:
     """
-    Check whether a variable from a pandas dataframe is in accordance with specified regular expression
+    Check whether a variable from a pandas dataframe is in accordance with specified regular expression. Like in the
+    csv validator, the regular expression has to match the whole value.
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :param expression: regular expression written as string
     :return: True if all values meet the regular expression condition
     """
-    values_list = var.dropna().to_list()
-    return all([bool(re.match(expression, x)) for x in values_list])
+    match = re.compile(expression).fullmatch
+    return all(match(x) is not None for x in get_profile(var).values)
 
 
-def heuristic_check_categorical(var: pd.Series, n_max_cats: int = 25, thr_min: float = 0.8, thr_max: float = 0.97,
-                                forbid_float_categories: bool = False) \
-        -> bool:
+@profiled
+def heuristic_check_categorical(var: Union[pd.Series, ColumnProfile], n_max_cats: int = 25, thr_min: float = 0.8,
+                                thr_max: float = 0.97, forbid_float_categories: bool = False) -> bool:
     """
     Check whether the variable might be categorical. Note: this can never be certain. First, it is checked whether
     the number of unique values lies below the maximum number of categories (n_max_cats). If that is the case,
@@ -132,24 +223,47 @@ def heuristic_check_categorical(var: pd.Series, n_max_cats: int = 25, thr_min: f
     The threshold refers to the allowed ratio of number of unique values vs. total number of values to be seen as not
     categorical. This threshold is adaptively computed such that it is higher for variables with higher n.
 
-    :param var: pandas series of the variable
+    :param var: pandas series of the variable or its profile
     :param n_max_cats: maximum number of allowed categories
     :param thr_min: minimum threshold
     :param thr_max: maximum threshold
     :param forbid_float_categories: whether floating point number as valid category identifiers
     :return: True if variable is assumed to be categorical
     """
-    var = var.dropna()
-    if forbid_float_categories and check_is_float(var):
+    if isinstance(var, ColumnProfile):
+        values, n_values = var.values, var.n_values
+    else:
+        values = var.dropna().to_numpy(dtype=object)
+        n_values = len(values)
+    # stops hashing values as soon as there are more distinct values than categories
+    distinct = DistinctTracker(n_max_cats)
+    distinct.update(values)
+    if distinct.is_full or forbid_float_categories and check_is_float(var):
         return False
-    n_unique_values = var.nunique()
+    return heuristic_check_categorical_counts(n_values, len(distinct), n_max_cats, thr_min, thr_max)
+
+
+@profiled
+def heuristic_check_categorical_counts(n_values: int, n_unique_values: int, n_max_cats: int = 25,
+                                       thr_min: float = 0.8, thr_max: float = 0.97) -> bool:
+    """
+    Categorical heuristic of heuristic_check_categorical computed from value counts only, e.g. when the variable is
+    read in chunks.
+
+    :param n_values: number of non-missing values of the variable
+    :param n_unique_values: number of unique non-missing values of the variable
+    :param n_max_cats: maximum number of allowed categories
+    :param thr_min: minimum threshold
+    :param thr_max: maximum threshold
+    :return: True if variable is assumed to be categorical
+    """
     if n_unique_values > n_max_cats:
         return False
-    thr = 1 - math.pow(1.5, math.log2(len(var))) / len(var)
+    thr = 1 - math.pow(1.5, math.log2(n_values)) / n_values
     thr = thr_min if thr < thr_min else thr
     thr = thr_max if thr > thr_max else thr
-    diff_total_unique = len(var) - n_unique_values
-    ratio_total_unique = diff_total_unique / len(var)
+    diff_total_unique = n_values - n_unique_values
+    ratio_total_unique = diff_total_unique / n_values
     if ratio_total_unique > thr:
         return True
     else:
@@ -0,0 +1,76 @@
+"""
+In-memory representation of an inferred csv schema. Inference fills in the directives and one rule per column, and the
+schema text of the csv schema language (.csvs) is serialized from it in a single pass, in time linear in its length.
+Callers can inspect the inferred column types, categories and missing symbols without parsing the schema text.
+"""
+from typing import List, Optional
+
+
+class ColumnRule:
+    def __init__(self, name: str, column_type: Optional[str] = None, expressions: Optional[List[str]] = None,
+                 categories: Optional[List[str]] = None, missing_symbols: Optional[List[str]] = None,
+                 allows_empty: bool = False) -> None:
+        """
+        Rule of a column: any value has to match one of the alternatives, i.e. one of the expressions, one of the
+        missing symbols or the empty value
+
+        :param name: column name
+        :param column_type: inferred column type as returned by ColumnAccumulator.get_type, None for empty columns
+        :param expressions: alternative expressions of the column type, e.g. ['is("0")', 'is("1")'], an expression
+            may combine several conditions, e.g. 'upperCase length(1, *)'
+        :param categories: categories of a categorical column
+        :param missing_symbols: symbols for missing values that are allowed in addition to the expressions
+        :param allows_empty: whether empty values are allowed
+        """
+        self.name = name
+        self.column_type = column_type
+        self.expressions = expressions or []
+        self.categories = categories
+        self.missing_symbols = missing_symbols or []
+        self.allows_empty = allows_empty
+
+    def get_alternatives(self) -> List[str]:
+        """
+        :return: all alternative expressions of the rule
+        """
+        alternatives = self.expressions + [f'is("{symbol}")' for symbol in self.missing_symbols]
+        if self.allows_empty:
+            alternatives.append("empty")
+        return alternatives
+
+    def to_text(self) -> str:
+        """
+        :return: rule in the csv schema language
+        """
+        return f'"{self.name}": ' + " or ".join(self.get_alternatives())
+
+
+class CSVSchemaIR:
+    def __init__(self, version: str, separator: str, columns: Optional[List[ColumnRule]] = None) -> None:
+        """
+        Csv schema with its directives and column rules
+
+        :param version: version line of the csv schema language, e.g. "version 1.2"
+        :param separator: separator of the csv file
+        :param columns: rules of the columns in column order
+        """
+        self.version = version
+        self.separator = separator
+        self.columns = columns or []
+
+    @property
+    def total_columns(self) -> int:
+        return len(self.columns)
+
+    def get_directives(self) -> List[str]:
+        """
+        :return: directive lines of the schema
+        """
+        separator = "TAB" if self.separator == "\t" else f"'{self.separator}'"
+        return [f"@totalColumns {self.total_columns}", f"@separator {separator}"]
+
+    def to_text(self) -> str:
+        """
+        :return: schema in the csv schema language
+        """
+        return "\n".join([self.version] + self.get_directives() + [column.to_text() for column in self.columns])
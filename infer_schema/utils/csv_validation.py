@@ -0,0 +1,380 @@
+"""
+Validation of csv files against CSV Schema 1.2 files as written by InferCSVSchema, without starting the java
+csv-validator. Every column rule is parsed and compiled into a function that checks all values of a chunk of the column
+at once with vectorized pandas string operations. The csv file is streamed in chunks and the number of values violating
+its column rule is counted per column.
+
+Supported is the subset of the schema language this tool emits: the directives @totalColumns, @separator and @noHeader
+and the column expressions is, any, regex, range, positiveInteger, xDate, xDateTime, xDateTimeTz, xTime, upperCase,
+lowerCase, length and empty combined with or, and as well as implicitly by juxtaposition.
+"""
+import re
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from infer_schema.utils.check_dtype import NUMBER_PATTERN, POSITIVE_INTEGER_PATTERN
+from infer_schema.utils.memory_budget import MemoryBudget
+from infer_schema.utils.utils import open_byte_range
+
+ColumnCheck = Callable[[pd.Series], np.ndarray]  # returns the mask of the values of a chunk that satisfy a rule
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(?P<string>"[^"]*")|(?P<number>-?[0-9]+(?:\.[0-9]+)?)|(?P<symbol>[(),*])'
+                           r'|(?P<keyword>xDateTimeTz|xDateTime|xDate|xTime|positiveInteger|upperCase|lowerCase'
+                           r'|length|range|regex|empty|any|and|is|or))')
+LITERAL_EXPRESSIONS = {"xDateTimeTz": "XsdDateTimeWithTimeZoneLiteral", "xDateTime": "XsdDateTimeLiteral",
+                       "xDate": "XsdDateLiteral", "xTime": "XsdTimeLiteral"}  # expressions checked against a literal
+
+
+class CSVSchema:
+    def __init__(self, schema: str, literals) -> None:
+        """
+        Parse a csv schema and compile its column rules
+
+        :param schema: csv schema as written by InferCSVSchema.create_schema_from_csv
+        :param literals: loaded literals config with resolved interpolations, used for the xDate* expressions
+        """
+        self.literals = literals
+        self.separator = ","
+        self.total_columns: Optional[int] = None
+        self.header = True
+        self.column_names: List[str] = []
+        self.rules: List[str] = []
+        self.checks: List[ColumnCheck] = []
+        lines = [line.strip() for line in schema.splitlines() if line.strip()]
+        if not lines or not lines[0].startswith("version "):
+            raise ValueError("Csv schema has to start with its version, e.g. version 1.2")
+        for line in lines[1:]:
+            if line.startswith("@"):
+                self.parse_directive(line)
+            else:
+                name, rule = self.split_column_rule(line)
+                self.column_names.append(name)
+                self.rules.append(rule)
+                self.checks.append(self.compile_rule(rule))
+        if self.total_columns is not None and self.total_columns != len(self.column_names):
+            raise ValueError(f"Csv schema defines {len(self.column_names)} column rules but @totalColumns "
+                             f"{self.total_columns}")
+
+    @classmethod
+    def from_file(cls, schema_fpath: str, literals) -> "CSVSchema":
+        """
+        Load a csv schema file
+
+        :param schema_fpath: path to .csvs file
+        :param literals: loaded literals config with resolved interpolations
+        :return: parsed csv schema
+        """
+        with open(schema_fpath, "r") as f:
+            return cls(f.read(), literals)
+
+    def parse_directive(self, line: str) -> None:
+        """
+        :param line: global directive of the schema, e.g. @separator ';'
+        """
+        directive, _, value = line.partition(" ")
+        value = value.strip()
+        if directive == "@totalColumns":
+            self.total_columns = int(value)
+        elif directive == "@separator":
+            self.separator = "\t" if value == "TAB" else value.strip("'")
+        elif directive == "@noHeader":
+            self.header = False
+        else:
+            raise ValueError(f"Unsupported csv schema directive {directive}")
+
+    @staticmethod
+    def split_column_rule(line: str) -> Tuple[str, str]:
+        """
+        :param line: column definition, e.g. "var": positiveInteger or empty
+        :return: column name and column rule
+        """
+        match = re.match(r'(?:"(?P<quoted>[^"]*)"|(?P<name>[^:\s]+))\s*:(?P<rule>.*)$', line)
+        if match is None:
+            raise ValueError(f"Invalid column definition {line}")
+        name = match.group("quoted") if match.group("quoted") is not None else match.group("name")
+        return name, match.group("rule").strip()
+
+    def compile_rule(self, rule: str) -> ColumnCheck:
+        """
+        Compile a column rule. The expressions of a rule have to hold all, or combines an expression with everything
+        that follows it, like in the grammar of the schema language.
+
+        :param rule: column rule, e.g. upperCase length(1, *) or empty
+        :return: function returning the mask of the values of a chunk of the column that satisfy the rule
+        """
+        tokens = tokenize(rule)
+        check, pos = self.compile_expressions(tokens, 0, rule)
+        if pos != len(tokens):
+            raise ValueError(f"Unexpected {tokens[pos][1]} in column rule {rule}")
+        return check
+
+    def compile_expressions(self, tokens: List[Tuple[str, str]], pos: int, rule: str) -> Tuple[ColumnCheck, int]:
+        """
+        :param tokens: tokens of the column rule
+        :param pos: position of the first token of the expressions
+        :param rule: column rule for error messages
+        :return: check that all expressions hold and the position after them
+        """
+        checks = []
+        while pos < len(tokens) and tokens[pos][1] not in [")", ","]:
+            check, pos = self.compile_expression(tokens, pos, rule)
+            checks.append(check)
+        if not checks:
+            return (lambda values: np.ones(len(values), dtype=bool)), pos
+        return all_of(checks), pos
+
+    def compile_expression(self, tokens: List[Tuple[str, str]], pos: int, rule: str) -> Tuple[ColumnCheck, int]:
+        """
+        :return: check of an expression, combined with the following expression if they are joined by or / and, and
+            the position after it
+        """
+        check, pos = self.compile_single_expression(tokens, pos, rule)
+        if pos < len(tokens) and tokens[pos][1] in ["or", "and"]:
+            operator = tokens[pos][1]
+            other, pos = self.compile_expression(tokens, pos + 1, rule)
+            check = any_of([check, other]) if operator == "or" else all_of([check, other])
+        return check, pos
+
+    def compile_single_expression(self, tokens: List[Tuple[str, str]], pos: int, rule: str) \
+            -> Tuple[ColumnCheck, int]:
+        """
+        :return: check of a single expression with its arguments and the position after it
+        """
+        kind, keyword = tokens[pos]
+        if kind != "keyword" or keyword in ["or", "and"]:
+            raise ValueError(f"Unexpected {keyword} in column rule {rule}")
+        args, pos = parse_arguments(tokens, pos + 1, rule)
+        n_args = -1 if args is None else len(args)
+        if keyword == "is" and n_args == 1:
+            value = unquote(args[0], rule)
+            return (lambda values: (values == value).to_numpy()), pos
+        if keyword == "any" and args is None:
+            return (lambda values: np.ones(len(values), dtype=bool)), pos
+        if keyword == "any":
+            options = [unquote(arg, rule) for arg in args]
+            return (lambda values: values.isin(options).to_numpy()), pos
+        if keyword == "regex" and n_args == 1:
+            return full_match(unquote(args[0], rule)), pos
+        if keyword == "range" and n_args == 2:
+            return in_range(*[parse_bound(arg, rule) for arg in args]), pos
+        if keyword == "length" and n_args in [1, 2]:
+            bounds = [parse_bound(arg, rule) for arg in args]
+            return has_length(bounds[0], bounds[-1]), pos
+        if n_args == -1:
+            if keyword == "empty":
+                return (lambda values: (values == "").to_numpy()), pos
+            if keyword == "positiveInteger":
+                return full_match(POSITIVE_INTEGER_PATTERN), pos
+            if keyword in LITERAL_EXPRESSIONS:
+                return full_match(self.literals[LITERAL_EXPRESSIONS[keyword]]), pos
+            if keyword == "upperCase":
+                return (lambda values: (values == values.str.upper()).to_numpy()), pos
+            if keyword == "lowerCase":
+                return (lambda values: (values == values.str.lower()).to_numpy()), pos
+        raise ValueError(f"Unsupported expression {keyword} in column rule {rule}")
+
+    def iter_violations(self, chunk: pd.DataFrame) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Check the values of a chunk of the csv file against the column rules. Every column is dictionary encoded first,
+        so the rules are only checked on its distinct values.
+
+        :param chunk: chunk of the csv file with all values as strings, empty values as ""
+        :return: iterator over the column index and the positions of the values violating its rule, for columns with
+            violations only
+        """
+        for i_col, check in enumerate(self.checks):
+            codes, uniques = pd.factorize(chunk.iloc[:, i_col])
+            violations = np.flatnonzero(~check(pd.Series(uniques, dtype=object))[codes])
+            if len(violations):
+                yield i_col, violations
+
+
+class CSVViolations:
+    def __init__(self, column_names: List[str], max_examples: Optional[int] = 100) -> None:
+        """
+        Count the values violating the column rules of a csv schema per column
+
+        :param column_names: column names of the csv schema
+        :param max_examples: maximum number of violating values to keep as examples, None for no limit
+        """
+        self.max_examples = max_examples
+        self.column_counts: Dict[str, int] = OrderedDict((name, 0) for name in column_names)
+        self.examples: List[Tuple[int, str, str]] = []  # row number, column name and value of violations
+        self.errors: List[str] = []  # violations of the file structure
+        self.n_rows = 0  # number of validated rows
+
+    @property
+    def n_violations(self) -> int:
+        return sum(self.column_counts.values()) + len(self.errors)
+
+    def add_chunk(self, chunk: pd.DataFrame, schema: CSVSchema) -> None:
+        """
+        Validate a chunk of the rows following the already validated rows
+
+        :param chunk: chunk of the csv file with all values as strings, empty values as ""
+        :param schema: csv schema to validate against
+        """
+        for i_col, violations in schema.iter_violations(chunk):
+            name = schema.column_names[i_col]
+            self.column_counts[name] += len(violations)
+            n_free = len(violations) if self.max_examples is None else self.max_examples - len(self.examples)
+            for row in violations[:max(n_free, 0)]:
+                self.examples.append((self.n_rows + int(row) + 1, name, chunk.iat[row, i_col]))
+        self.n_rows += len(chunk.index)
+
+    def summary(self) -> str:
+        """
+        :return: human readable summary of the violations per column and the first violating value
+        """
+        lines = [f"{self.n_violations} violations in {self.n_rows} validated rows"]
+        lines += self.errors
+        lines += [f"  {name}: {count}" for name, count in self.column_counts.items() if count]
+        if self.examples:
+            row, name, value = min(self.examples)
+            lines.append(f"First violation in row {row}, column {name}: {value!r}")
+        return "\n".join(lines)
+
+
+def validate_csv(csv_fpath: str, schema: CSVSchema, chunksize: int = 100000, max_examples: Optional[int] = 100,
+                 byte_range: Optional[Tuple[int, int]] = None, memory_budget: Optional[MemoryBudget] = None) \
+        -> CSVViolations:
+    """
+    Validate a csv file against a csv schema chunk by chunk
+
+    :param csv_fpath: path to csv file
+    :param schema: parsed csv schema
+    :param chunksize: number of rows per chunk
+    :param max_examples: maximum number of violating values to keep as examples
+    :param byte_range: optional start and end byte offset of the rows to validate, rows after the start have no header
+    :param memory_budget: optional memory budget with an estimate of the memory per row, the chunk size is adapted to
+        the observed memory after every chunk
+    :return: violations per column, row numbers are relative to the start of the byte range
+    """
+    result = CSVViolations(schema.column_names, max_examples)
+    header = 0 if schema.header and (byte_range is None or byte_range[0] == 0) else None
+    source = nullcontext(csv_fpath) if byte_range is None else open_byte_range(csv_fpath, *byte_range)
+    with source as data, pd.read_csv(data, sep=schema.separator, header=header, dtype=str, keep_default_na=False,
+                                     na_filter=False, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if len(chunk.columns) != len(schema.column_names):
+                result.errors.append(f"  file has {len(chunk.columns)} columns, schema expects "
+                                     f"{len(schema.column_names)}")
+                break
+            result.add_chunk(chunk, schema)
+            if memory_budget is not None and memory_budget.row_bytes is not None:
+                reader.chunksize = memory_budget.adapt_chunksize(reader.chunksize)
+    return result
+
+
+def tokenize(rule: str) -> List[Tuple[str, str]]:
+    """
+    :param rule: column rule
+    :return: list of token kind and token text
+    """
+    tokens, pos = [], 0
+    rule = rule.rstrip()
+    while pos < len(rule):
+        match = TOKEN_PATTERN.match(rule, pos)
+        if match is None:
+            raise ValueError(f"Cannot parse column rule {rule} at position {pos}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+def parse_arguments(tokens: List[Tuple[str, str]], pos: int, rule: str) -> Tuple[Optional[List[str]], int]:
+    """
+    :param tokens: tokens of a column rule
+    :param pos: position after an expression keyword
+    :param rule: column rule for error messages
+    :return: arguments of the expression in parentheses or None if it has none and the position after them
+    """
+    if pos >= len(tokens) or tokens[pos][1] != "(":
+        return None, pos
+    args = []
+    pos += 1
+    while pos < len(tokens):
+        kind, text = tokens[pos]
+        if kind not in ["string", "number"] and text != "*":
+            raise ValueError(f"Unexpected {text} in column rule {rule}")
+        args.append(text)
+        pos += 1
+        if pos < len(tokens) and tokens[pos][1] == ")":
+            return args, pos + 1
+        if pos >= len(tokens) or tokens[pos][1] != ",":
+            break
+        pos += 1
+    raise ValueError(f"Unclosed arguments in column rule {rule}")
+
+
+def unquote(arg: str, rule: str) -> str:
+    if not arg.startswith('"'):
+        raise ValueError(f"Expected string instead of {arg} in column rule {rule}")
+    return arg[1:-1]
+
+
+def parse_bound(arg: str, rule: str) -> Optional[float]:
+    """
+    :return: numeric bound or None for the unbounded *
+    """
+    if arg == "*":
+        return None
+    if arg.startswith('"'):
+        raise ValueError(f"Expected number instead of {arg} in column rule {rule}")
+    return float(arg)
+
+
+def full_match(pattern: str) -> ColumnCheck:
+    compiled = re.compile(pattern)
+    return lambda values: values.str.fullmatch(compiled).to_numpy(dtype=bool)
+
+
+def in_range(lower: Optional[float], upper: Optional[float]) -> ColumnCheck:
+    def check(values: pd.Series) -> np.ndarray:
+        # numbers have the syntax that inference accepts as numeric
+        numbers = pd.to_numeric(values.where(values.str.fullmatch(NUMBER_PATTERN)), errors="coerce") \
+            .to_numpy(dtype=float)
+        mask = np.isfinite(numbers)
+        if lower is not None:
+            mask &= numbers >= lower
+        if upper is not None:
+            mask &= numbers <= upper
+        return mask
+    return check
+
+
+def has_length(lower: Optional[float], upper: Optional[float]) -> ColumnCheck:
+    def check(values: pd.Series) -> np.ndarray:
+        lengths = values.str.len().to_numpy()
+        mask = np.ones(len(lengths), dtype=bool)
+        if lower is not None:
+            mask &= lengths >= lower
+        if upper is not None:
+            mask &= lengths <= upper
+        return mask
+    return check
+
+
+def any_of(checks: List[ColumnCheck]) -> ColumnCheck:
+    def check_any(values: pd.Series) -> np.ndarray:
+        mask = checks[0](values)
+        for check in checks[1:]:
+            mask = mask | check(values)
+        return mask
+    return check_any
+
+
+def all_of(checks: List[ColumnCheck]) -> ColumnCheck:
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(values: pd.Series) -> np.ndarray:
+        mask = checks[0](values)
+        for check in checks[1:]:
+            mask = mask & check(values)
+        return mask
+    return check_all
@@ -0,0 +1,74 @@
+"""
+Bounded-memory counting of distinct values. A DistinctTracker keeps the distinct values of a column in order of
+appearance until there are more than a maximum number of them, e.g. the categories of a column up to n_max_cats + 1,
+and ignores further values. This is all the categorical heuristic needs, so high-cardinality columns do not build a
+hash table of all their values.
+"""
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 4096  # values deduplicated at once until the tracker is full
+
+
+class DistinctTracker:
+    def __init__(self, max_size: int) -> None:
+        """
+        Create a tracker that keeps at most max_size + 1 distinct values
+
+        :param max_size: maximum number of distinct values of interest, e.g. the maximum number of categories
+        """
+        self.max_size = max_size
+        self.values = {}  # insertion ordered, used as ordered set of the first distinct values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self.values
+
+    @property
+    def is_full(self) -> bool:
+        """
+        :return: True if there are more than max_size distinct values
+        """
+        return len(self.values) > self.max_size
+
+    def update(self, values: Iterable[Any]) -> None:
+        """
+        Add values in order of appearance. Values are deduplicated in blocks, so that no more than a block of values is
+        hashed once the tracker is full.
+
+        :param values: values to add
+        """
+        values = np.asarray(values, dtype=object)
+        for start in range(0, len(values), BLOCK_SIZE):
+            if self.is_full:
+                return
+            self.add_distinct(pd.unique(values[start:start + BLOCK_SIZE]))
+
+    def add_distinct(self, values: Iterable[Any]) -> None:
+        """
+        Add distinct values until the tracker is full
+
+        :param values: values without duplicates
+        """
+        for value in values:
+            if self.is_full:
+                return
+            self.values[value] = None
+
+    def merge(self, other: "DistinctTracker") -> None:
+        """
+        Merge the values of a tracker of the values following the values of this tracker
+
+        :param other: tracker of the following values
+        """
+        self.add_distinct(other.values)
+
+    def get_values(self) -> Optional[List[Any]]:
+        """
+        :return: distinct values in order of appearance or None if there are more than max_size
+        """
+        return None if self.is_full else list(self.values)
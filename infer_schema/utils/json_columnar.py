@@ -0,0 +1,88 @@
+"""
+Columnar schema inference for batches of json records. Instead of walking every record recursively with genson, the
+records of a batch are transposed into one column of values per key. The type of a column, whether a key is required and
+the keys of nested objects are determined in bulk with builtins that run in C (type, dict.fromkeys, Counter, chain), so
+the work per record is a few dictionary lookups. Nested objects are inferred column by column as well, arrays from the
+concatenation of their elements.
+
+The schemas are lossless in the format of ShardSchemaNode (required lists are kept and alternatives are kept in the
+order their types were first seen), so that the schemas of consecutive batches can be merged into the same schema as
+genson builds from all records, see json_shards. Values of types genson does not know from json, e.g. subclasses of the
+json types, are passed to genson.
+"""
+from collections import Counter
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Any, Iterable, Iterator, List
+
+from infer_schema.utils.json_shards import ShardSchemaNode
+
+BATCH_SIZE = 10000  # number of records inferred at once
+# genson strategy of the json types, int and float share the number strategy
+TYPE_STRATEGIES = {type(None): "null", bool: "boolean", int: "number", float: "number", str: "string", list: "array",
+                   dict: "object"}
+
+
+def iter_batches(records: Iterable[Any], batch_size: int = BATCH_SIZE) -> Iterator[List[Any]]:
+    """
+    :param records: streamed records
+    :param batch_size: maximum number of records per batch
+    :return: iterator over lists of consecutive records
+    """
+    records = iter(records)
+    batch = list(islice(records, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(records, batch_size))
+
+
+def infer_values_schema(values: List[Any]) -> dict:
+    """
+    Infer the lossless schema of a column of values, i.e. the schema of a ShardSchemaNode that every value was added to
+
+    :param values: json values
+    :return: lossless schema, {} if there are no values
+    """
+    types = dict.fromkeys(map(type, values))
+    if not all(value_type in TYPE_STRATEGIES for value_type in types):
+        # irregular values are left to genson
+        node = ShardSchemaNode()
+        for value in values:
+            node.add_object(value)
+        return node.to_schema()
+    schemas = []
+    for strategy in dict.fromkeys(TYPE_STRATEGIES[value_type] for value_type in types):
+        if strategy == "number":
+            schemas.append({"type": "number" if float in types else "integer"})
+        elif strategy == "object":
+            schemas.append(infer_records_schema([value for value in values if type(value) is dict]))
+        elif strategy == "array":
+            items = list(chain.from_iterable(value for value in values if type(value) is list))
+            schemas.append({"type": "array", "items": infer_values_schema(items)} if items else {"type": "array"})
+        else:
+            schemas.append({"type": strategy})
+    if len(schemas) == 1:
+        return schemas[0]
+    return {"anyOf": schemas} if schemas else {}
+
+
+def infer_records_schema(records: List[dict]) -> dict:
+    """
+    Infer the lossless schema of json objects column by column
+
+    :param records: json objects
+    :return: lossless object schema with the properties in the order they were first seen
+    """
+    n_records = len(records)
+    counts = Counter(chain.from_iterable(records))  # keys in the order they were first seen
+    properties = {}
+    for key, count in counts.items():
+        # keys that every record has are taken in one pass in C
+        column = list(map(itemgetter(key), records)) if count == n_records \
+            else [record[key] for record in records if key in record]
+        properties[key] = infer_values_schema(column)
+    schema = {"type": "object"}
+    if properties:
+        schema["properties"] = properties
+    schema["required"] = sorted(key for key, count in counts.items() if count == n_records)
+    return schema
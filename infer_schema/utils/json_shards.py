@@ -0,0 +1,105 @@
+"""
+Parallel schema inference for json lines files. The file is split into byte ranges aligned on line breaks (shards), a
+schema is built for every shard in a worker process and the shard schemas are merged into the final schema.
+
+Genson serializes schemas lossy: an empty list of required properties is omitted, and alternatives of different types
+are grouped and sorted instead of being kept in the order the types were first seen. Merging such shard schemas would
+not give the schema built from all records at once. Shards are therefore built with ShardSchemaBuilder, which keeps the
+required lists and the order of the alternatives, and merged with MergeSchemaBuilder, which does not add empty required
+lists to its own output. The merged schema is the same as the schema built from all records at once. The lossless
+shard schemas are also used as persisted state for incremental inference, see profile_state.
+"""
+import json
+import os
+from typing import List, Optional, Tuple
+
+from genson import SchemaBuilder, SchemaNode
+from genson.schema.strategies import Object
+
+
+class ShardObject(Object):
+    def to_schema(self) -> dict:
+        schema = super().to_schema()
+        if self._required is not None:
+            schema['required'] = sorted(self._required)
+        return schema
+
+
+class MergeObject(Object):
+    def add_schema(self, schema: dict) -> None:
+        include_empty_required = self._include_empty_required
+        super().add_schema(schema)
+        self._include_empty_required = include_empty_required
+
+
+class ShardSchemaNode(SchemaNode):
+    STRATEGIES = (ShardObject,) + SchemaNode.STRATEGIES
+
+    def to_schema(self) -> dict:
+        schemas = [active_strategy.to_schema() for active_strategy in self._active_strategies]
+        if len(schemas) == 1:
+            return schemas[0]
+        return {'anyOf': schemas} if schemas else {}
+
+
+class ShardSchemaBuilder(SchemaBuilder):
+    pass
+
+
+ShardSchemaBuilder.NODE_CLASS = ShardSchemaNode  # set after class creation, genson's metaclass sets NODE_CLASS itself
+
+
+class MergeSchemaBuilder(SchemaBuilder):
+    EXTRA_STRATEGIES = (MergeObject,)
+
+
+def get_line_aligned_shards(fpath: str, n_shards: int, start: int = 0, end: Optional[int] = None) \
+        -> List[Tuple[int, int]]:
+    """
+    Split a file or a byte range of it into byte ranges of about the same size that start at the beginning of a line
+
+    :param fpath: file path
+    :param n_shards: maximum number of shards
+    :param start: byte offset of the start of a line where the first shard starts
+    :param end: byte offset where the last shard ends, the end of the file if None
+    :return: list of start (inclusive) and end (exclusive) byte offsets, empty shards are dropped
+    """
+    end = os.path.getsize(fpath) if end is None else end
+    bounds = [start]
+    with open(fpath, 'rb') as f:
+        for i_shard in range(1, n_shards):
+            f.seek(max(start + (end - start) * i_shard // n_shards, bounds[-1]))
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                f.readline()  # move to the start of the next line, stays if the offset is at the start of a line
+            bounds.append(min(f.tell(), end))
+    bounds.append(end)
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def build_shard_schema(fpath: str, start: int, end: int, schema_uri: str) -> dict:
+    """
+    Build the schema of the records of a json lines file within a byte range. Module level function, so it can run in
+    worker processes.
+
+    :param fpath: path to json lines file
+    :param start: byte offset of the first line of the shard
+    :param end: byte offset after the last line of the shard
+    :param schema_uri: uri of the json schema version
+    :return: schema of the shard, to be merged with MergeSchemaBuilder
+    """
+    # imported here, json_columnar builds its schemas with the nodes of this module
+    from infer_schema.utils.json_columnar import infer_values_schema, iter_batches
+
+    def iter_records():
+        while f.tell() < end:
+            line = f.readline()
+            if line.strip():
+                yield json.loads(line)
+
+    builder = ShardSchemaBuilder(schema_uri=schema_uri)
+    with open(fpath, 'rb') as f:
+        f.seek(start)
+        for batch in iter_batches(iter_records()):
+            builder.add_schema(infer_values_schema(batch))
+    return builder.to_schema()
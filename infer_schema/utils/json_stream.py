@@ -0,0 +1,107 @@
+"""
+Helper methods to read json data record by record, so that large files do not have to be loaded into memory at once.
+Supported are json lines files (one json document per line) and json files with an array at the top level.
+"""
+import json
+from typing import Any, Iterator, TextIO
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+ELEMENT_DELIMITERS = " \t\n\r,]"  # characters that can follow an array element
+
+
+def is_json_lines(fpath: str) -> bool:
+    """
+    Check whether a file is a json lines file by its extension
+
+    :param fpath: file path
+    :return: True if the file has a json lines extension
+    """
+    return fpath.lower().endswith(JSON_LINES_EXTENSIONS)
+
+
+def iter_json_lines(f: TextIO) -> Iterator[Any]:
+    """
+    Iterate over the records of a json lines file, blank lines are skipped
+
+    :param f: opened json lines file
+    :return: iterator over the parsed records
+    """
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def starts_with_array(f: TextIO) -> bool:
+    """
+    Check whether the json document in a file is an array without consuming the file
+
+    :param f: opened, seekable json file
+    :return: True if the first non-whitespace character is [
+    """
+    pos = f.tell()
+    char = f.read(1)
+    while char and char.isspace():
+        char = f.read(1)
+    f.seek(pos)
+    return char == "["
+
+
+def iter_json_array(f: TextIO, block_size: int = 2 ** 16) -> Iterator[Any]:
+    """
+    Iterate over the elements of a json array at the top level of a file. The file is read in blocks, so only the
+    current element and one block are kept in memory.
+
+    :param f: opened json file whose document is an array
+    :param block_size: number of characters read at once
+    :return: iterator over the parsed array elements
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def fill(n_chars: int) -> bool:
+        nonlocal buffer, pos, eof
+        block = f.read(n_chars)
+        eof = not block
+        buffer = buffer[pos:] + block
+        pos = 0
+        return not eof
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not fill(block_size):
+                return buffer[pos] if pos < len(buffer) else ""
+
+    if next_char() != "[":
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+    first = True
+    while True:
+        char = next_char()
+        if char == "]":
+            pos += 1
+            break
+        if not first:
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            next_char()
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill(max(block_size, len(buffer)))
+                continue
+            # a value not followed by a delimiter might continue in the next block, e.g. a number
+            if eof or end < len(buffer) and buffer[end] in ELEMENT_DELIMITERS:
+                break
+            fill(max(block_size, len(buffer)))
+        pos = end
+        first = False
+        yield element
+    if next_char():
+        raise json.JSONDecodeError("Extra data", buffer, pos)
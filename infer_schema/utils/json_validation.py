@@ -0,0 +1,267 @@
+"""
+Streaming validation of json data against a json schema. The schema is checked and compiled into a validator once per
+process and records are validated one by one, so the data file does not have to be loaded into memory. Instead of
+stopping at the first error, all errors up to a maximum number are collected and counted per json path.
+
+Schemas that only use the keywords genson generates are additionally compiled into plain python checks. Valid records
+are accepted by these checks, jsonschema is only run on invalid records to report their errors.
+"""
+import json
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from jsonschema import validators
+from jsonschema.exceptions import ValidationError
+
+ARRAY_SCHEMA_KEYS = {"$schema", "type", "items"}  # keys of array schemas whose elements can be validated one by one
+COMPILED_KEYWORDS = {"$schema", "title", "description", "type", "properties", "required", "items", "anyOf"}
+JSON_TYPES = {  # python types of the json types as parsed by the json module
+    "null": type(None),
+    "boolean": bool,
+    "string": str,
+    "array": list,
+    "object": dict,
+}
+
+
+class CompiledValidator:
+    def __init__(self, schema: dict) -> None:
+        """
+        Check a schema and create the jsonschema validator and, if possible, the compiled check of it
+
+        :param schema: json schema
+        """
+        validator_cls = validators.validator_for(schema)
+        validator_cls.check_schema(schema)
+        self.validator = validator_cls(schema)
+        self.integer_floats = validator_cls.TYPE_CHECKER.is_type(1.0, "integer")
+        self.check = self.compile(schema)
+
+    def iter_errors(self, instance: Any) -> Iterator[ValidationError]:
+        """
+        :param instance: json instance to validate
+        :return: iterator over the validation errors of the instance
+        """
+        if self.check is not None and self.check(instance):
+            return iter(())
+        return self.validator.iter_errors(instance)
+
+    def compile(self, schema: Any) -> Optional[Callable[[Any], bool]]:
+        """
+        Compile a schema into a function that returns whether an instance is valid
+
+        :param schema: json schema or subschema
+        :return: check function or None if the schema uses keywords that are not compiled
+        """
+        if schema is True or schema == {}:
+            return lambda instance: True
+        if not isinstance(schema, dict) or not set(schema) <= COMPILED_KEYWORDS:
+            return None
+        checks = []
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            type_checks = [self.compile_type(name) for name in types]
+            if None in type_checks:
+                return None
+            checks.append(type_checks[0] if len(type_checks) == 1 else any_of(type_checks))
+        if "required" in schema:
+            required = schema["required"]
+
+            def check_required(instance: Any) -> bool:
+                if type(instance) is dict:
+                    for key in required:
+                        if key not in instance:
+                            return False
+                return True
+            checks.append(check_required)
+        if "properties" in schema:
+            properties = [(key, self.compile(subschema)) for key, subschema in schema["properties"].items()]
+            if any(check is None for _, check in properties):
+                return None
+
+            def check_properties(instance: Any) -> bool:
+                if type(instance) is dict:
+                    for key, check in properties:
+                        if key in instance and not check(instance[key]):
+                            return False
+                return True
+            checks.append(check_properties)
+        if "items" in schema:
+            check_item = self.compile(schema["items"])
+            if check_item is None:
+                return None
+
+            def check_items(instance: Any) -> bool:
+                if type(instance) is list:
+                    for item in instance:
+                        if not check_item(item):
+                            return False
+                return True
+            checks.append(check_items)
+        if "anyOf" in schema:
+            alternatives = [self.compile(subschema) for subschema in schema["anyOf"]]
+            if None in alternatives:
+                return None
+            checks.append(any_of(alternatives))
+        return checks[0] if len(checks) == 1 else all_of(checks)
+
+    def compile_type(self, name: str) -> Optional[Callable[[Any], bool]]:
+        """
+        :param name: json type name
+        :return: function that returns whether an instance is of the type or None for unknown types
+        """
+        if name in JSON_TYPES:
+            python_type = JSON_TYPES[name]
+            return lambda instance: type(instance) is python_type
+        if name == "number":
+            return lambda instance: type(instance) in (int, float)
+        if name == "integer":
+            if self.integer_floats:
+                return lambda instance: type(instance) is int or type(instance) is float and instance.is_integer()
+            return lambda instance: type(instance) is int
+        return None
+
+
+def any_of(checks: List[Callable[[Any], bool]]) -> Callable[[Any], bool]:
+    def check_any(instance: Any) -> bool:
+        for check in checks:
+            if check(instance):
+                return True
+        return False
+    return check_any
+
+
+def all_of(checks: List[Callable[[Any], bool]]) -> Callable[[Any], bool]:
+    def check_all(instance: Any) -> bool:
+        for check in checks:
+            if not check(instance):
+                return False
+        return True
+    return check_all
+
+
+@lru_cache(maxsize=8)
+def get_validator(schema_json: str) -> CompiledValidator:
+    """
+    Check a schema and create a validator for it. The validator is cached, so it is only created once per process.
+
+    :param schema_json: json schema serialized as json string
+    :return: validator of the json schema version of the schema
+    """
+    return CompiledValidator(json.loads(schema_json))
+
+
+def get_item_schema(schema: dict) -> Optional[dict]:
+    """
+    Get the schema of the elements of an array schema if the array can be validated element by element, i.e. if the
+    schema has no other keywords than the type and the schema of its items
+
+    :param schema: json schema
+    :return: schema of every element or None if the array has to be validated at once
+    """
+    if set(schema) <= ARRAY_SCHEMA_KEYS and schema.get("type") == "array" and isinstance(schema.get("items"), dict):
+        item_schema = dict(schema["items"])
+        if "$schema" in schema:
+            item_schema["$schema"] = schema["$schema"]
+        return item_schema
+    return None
+
+
+class ValidationErrors:
+    def __init__(self, max_errors: Optional[int] = 100) -> None:
+        """
+        Collect validation errors of the records of a data file
+
+        :param max_errors: maximum number of errors to collect, validation stops once it is reached. None for no limit.
+        """
+        self.max_errors = max_errors
+        self.errors: List[Tuple[int, str, str]] = []  # record index, json path and message of every error
+        self.n_records = 0  # number of validated records
+
+    @property
+    def is_full(self) -> bool:
+        return self.max_errors is not None and len(self.errors) >= self.max_errors
+
+    @property
+    def path_counts(self) -> Counter:
+        """
+        :return: number of collected errors per json path within a record
+        """
+        return Counter(path for _, path, _ in self.errors)
+
+    def add(self, record_index: int, error: ValidationError, path_prefix: str = "$") -> None:
+        """
+        Add an error of a record
+
+        :param record_index: index of the record in the data file
+        :param error: validation error
+        :param path_prefix: json path of the record, the json path of the error is relative to it
+        """
+        if not self.is_full:
+            self.errors.append((record_index, path_prefix + error.json_path[1:], error.message))
+
+    def merge(self, other: "ValidationErrors") -> None:
+        """
+        Merge the errors of the records following the records of this collection
+
+        :param other: errors of the following records, record indices relative to the first of these records
+        """
+        for record_index, path, message in other.errors:
+            if self.is_full:
+                break
+            self.errors.append((self.n_records + record_index, path, message))
+        self.n_records += other.n_records
+
+    def validate(self, validator, records: Iterable[Any], path_prefix: str = "$") -> "ValidationErrors":
+        """
+        Validate records and collect their errors until the maximum number of errors is reached
+
+        :param validator: validator instance as returned by get_validator
+        :param records: records to validate
+        :param path_prefix: json path of every record within the data file
+        :return: self
+        """
+        for record in records:
+            if self.is_full:
+                break
+            for error in validator.iter_errors(record):
+                self.add(self.n_records, error, path_prefix)
+            self.n_records += 1
+        return self
+
+    def summary(self) -> str:
+        """
+        :return: human readable summary of the errors per json path and the first error
+        """
+        limit = " (limit reached)" if self.is_full else ""
+        lines = [f"{len(self.errors)} validation errors{limit} in {self.n_records} validated records"]
+        lines += [f"  {path}: {count}" for path, count in self.path_counts.most_common()]
+        if self.errors:
+            record_index, path, message = self.errors[0]
+            lines.append(f"First error in record {record_index} at {path}: {message}")
+        return "\n".join(lines)
+
+
+def validate_shard(fpath: str, start: int, end: int, schema_json: str, max_errors: Optional[int] = 100) \
+        -> ValidationErrors:
+    """
+    Validate the records of a json lines file within a byte range. Module level function, so it can run in worker
+    processes.
+
+    :param fpath: path to json lines file
+    :param start: byte offset of the first line of the shard
+    :param end: byte offset after the last line of the shard
+    :param schema_json: json schema of a record serialized as json string
+    :param max_errors: maximum number of errors to collect
+    :return: errors of the shard with record indices relative to the first record of the shard
+    """
+    def iter_records():
+        with open(fpath, 'rb') as f:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline()
+                if line.strip():
+                    yield json.loads(line)
+
+    return ValidationErrors(max_errors).validate(get_validator(schema_json), iter_records())
@@ -0,0 +1,83 @@
+"""
+Precompiled table of the csv literals. Resolving the ${.X} interpolations of csv-type-literals.yml with omegaconf takes
+longer than inferring the schema of a small file, so the resolved regular expressions are shipped as
+csv-type-literals.json next to the yml file and loaded with the json module. The table stores the hash of the yml file
+it was built from. If the yml file was edited since, the literals are resolved from it instead.
+
+Rebuild the table after editing the literals: python -m infer_schema.utils.literal_table
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+from typing import Dict
+
+
+def get_table_fpath(literals_fpath: str) -> str:
+    """
+    :param literals_fpath: path to yml literals file
+    :return: path to the precompiled table of the literals file
+    """
+    return os.path.splitext(literals_fpath)[0] + ".json"
+
+
+def get_source_hash(literals_fpath: str) -> str:
+    """
+    :param literals_fpath: path to yml literals file
+    :return: hex digest of the sha256 hash of the literals file
+    """
+    with open(literals_fpath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def resolve_literals(literals_fpath: str) -> Dict[str, str]:
+    """
+    Load a literals file and resolve its interpolations
+
+    :param literals_fpath: path to yml literals file
+    :return: mapping of literal name to regular expression
+    """
+    from omegaconf import OmegaConf  # only imported if the table is outdated or rebuilt
+    return OmegaConf.to_container(OmegaConf.load(literals_fpath), resolve=True)
+
+
+def write_literal_table(literals_fpath: str) -> str:
+    """
+    Resolve a literals file and save it as precompiled table
+
+    :param literals_fpath: path to yml literals file
+    :return: path to the written table
+    """
+    table_fpath = get_table_fpath(literals_fpath)
+    table = {"source_hash": get_source_hash(literals_fpath), "literals": resolve_literals(literals_fpath)}
+    with open(table_fpath, "w") as f:
+        json.dump(table, f, indent=2)
+        f.write("\n")
+    return table_fpath
+
+
+def load_literals(literals_fpath: str) -> Dict[str, str]:
+    """
+    Load the resolved literals from the precompiled table or, if the table is missing or outdated, from the yml file
+
+    :param literals_fpath: path to yml literals file
+    :return: mapping of literal name to regular expression
+    """
+    table_fpath = get_table_fpath(literals_fpath)
+    try:
+        with open(table_fpath, "r") as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        table = {}
+    if table.get("source_hash") != get_source_hash(literals_fpath):
+        logging.warning(f"Literal table {table_fpath} is missing or outdated, resolving {literals_fpath} instead. "
+                        f"Rebuild it with python -m infer_schema.utils.literal_table.")
+        return resolve_literals(literals_fpath)
+    return table["literals"]
+
+
+if __name__ == '__main__':
+    from infer_schema.infer_csv_schema import InferCSVSchema
+
+    print(write_literal_table(sys.argv[1] if len(sys.argv) > 1 else InferCSVSchema.literals_fpath))
@@ -0,0 +1,68 @@
+"""
+Matching of variable values against the literals of csv-type-literals.yml. All literals are compiled once and every
+distinct value is checked against all literals that can still match in a single pass. The result is a bitmask with one
+bit per literal that is set if all values match the literal.
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from infer_schema.utils.profiling import profiled
+
+
+class LiteralEngine:
+    def __init__(self, literals: Dict[str, str]) -> None:
+        """
+        Compile the literals
+
+        :param literals: mapping of literal name to regular expression, the order defines the bit of each literal
+        """
+        self.names = list(literals)
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.all_bits = (1 << len(self.names)) - 1
+        self.patterns = [re.compile(literals[name]) for name in self.names]
+
+    @classmethod
+    def from_config(cls, literals, names: List[str]) -> "LiteralEngine":
+        """
+        Create the engine for some of the literals loaded from csv-type-literals.yml
+
+        :param literals: loaded literals config with resolved interpolations
+        :param names: names of the literals to match values against
+        :return: literal engine
+        """
+        return cls({name: literals[name] for name in names})
+
+    @profiled
+    def classify(self, values: Iterable[str], mask: Optional[int] = None) -> int:
+        """
+        Check which literals all values match. Like in the csv validator, a literal has to match the whole value.
+        Stops as soon as no literal can match anymore.
+
+        :param values: values to check, duplicates are checked only once
+        :param mask: bitmask of the literals to check, all literals if None
+        :return: bitmask of the literals from mask that all values match
+        """
+        mask = self.all_bits if mask is None else mask
+        candidates = [(bit, pattern.fullmatch) for bit, pattern in zip(self.bits.values(), self.patterns) if mask & bit]
+        if not candidates:
+            return mask
+        for value in pd.unique(pd.Series(values, dtype=object)):
+            n_candidates = len(candidates)
+            candidates = [(bit, match) for bit, match in candidates if match(value) is not None]
+            if len(candidates) < n_candidates:
+                mask = sum(bit for bit, _ in candidates)
+                if not candidates:
+                    break
+        return mask
+
+    def matches(self, mask: int, name: str) -> bool:
+        """
+        Check whether the bit of a literal is set in a bitmask
+
+        :param mask: bitmask as returned by classify
+        :param name: literal name
+        :return: True if all classified values match the literal
+        """
+        return bool(mask & self.bits[name])
@@ -0,0 +1,193 @@
+"""
+Memory budget of a run. The resident memory of the process is observed while the data is read: the chunk size of csv
+files is chosen from the estimated memory per row and adapted to the observed memory after every chunk, worker
+processes are only started as far as the budget allows and json documents that have to be parsed at once are only
+parsed if they fit. A run that cannot stay within its budget fails with a MemoryBudgetError instead of being killed by
+the operating system.
+
+    budget = MemoryBudget(512 * 2 ** 20)
+    chunksize = budget.get_chunksize(row_bytes)
+    for chunk in chunks:
+        ...
+        chunksize = budget.adapt_chunksize(chunksize)
+"""
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, TypeVar
+
+from infer_schema.utils.profiling import get_peak_rss_bytes
+
+MIN_CHUNKSIZE = 100  # smaller chunks are dominated by the overhead per chunk and do not save memory
+CHUNK_FRACTION = 0.5  # fraction of the available memory a chunk may use, the rest is left for temporaries
+WORKER_FRACTION = 0.5  # fraction of the available memory worker processes may use
+ROW_MEMORY_FACTOR = 3  # memory of a row while its chunk is summarized relative to the parsed row
+JSON_MEMORY_FACTOR = 10  # memory of a parsed json document relative to its size in the file
+WORKER_BYTES = 128 * 2 ** 20  # approximate resident memory of a worker process that imported the inference modules
+CHECK_INTERVAL = 1000  # number of streamed records between two checks of the memory
+
+T = TypeVar("T")
+
+
+class MemoryBudgetError(MemoryError):
+    """The run cannot stay within its memory budget"""
+
+
+def get_rss_bytes() -> int:
+    """
+    :return: current resident memory of this process in bytes
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return get_peak_rss_bytes()  # the peak is an upper bound where the current memory cannot be read
+
+
+def format_bytes(n_bytes: float) -> str:
+    """
+    :param n_bytes: number of bytes
+    :return: number of bytes in MB for messages
+    """
+    return f"{n_bytes / 2 ** 20:.0f} MB"
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes: int, worker_bytes: Optional[int] = None) -> None:
+        """
+        Initialize the budget of a run
+
+        :param max_bytes: maximum resident memory of the run in bytes, including its worker processes
+        :param worker_bytes: estimated resident memory of a worker process, the current memory of this process if None
+            as the workers import the same modules
+        :raise MemoryBudgetError: if this process already uses more memory than the budget
+        """
+        self.max_bytes = max_bytes
+        self.worker_bytes = get_rss_bytes() if worker_bytes is None else worker_bytes
+        self.n_workers = 0
+        self.reserved_bytes = 0
+        self._row_bytes: Optional[float] = None
+        if self.get_available_bytes() <= 0:
+            raise MemoryBudgetError(f"The memory budget of {format_bytes(max_bytes)} cannot be met, the process "
+                                    f"already uses {format_bytes(self.get_used_bytes())}")
+
+    @property
+    def row_bytes(self) -> Optional[float]:
+        """
+        :return: estimated memory per row in bytes, None until it was estimated
+        """
+        return self._row_bytes
+
+    @row_bytes.setter
+    def row_bytes(self, row_bytes: float) -> None:
+        """
+        :param row_bytes: estimated memory per row in bytes, at least 1 byte, e.g. for files without rows
+        """
+        self._row_bytes = max(row_bytes, 1.0)
+
+    def get_used_bytes(self) -> int:
+        """
+        :return: resident memory of this process, the estimated memory of its workers and the reserved memory
+        """
+        return get_rss_bytes() + self.n_workers * self.worker_bytes + self.reserved_bytes
+
+    def get_available_bytes(self) -> int:
+        """
+        :return: memory left in the budget, negative if it is exceeded
+        """
+        return self.max_bytes - self.get_used_bytes()
+
+    def cap_workers(self, jobs: int) -> int:
+        """
+        Cap the number of worker processes, so that they use at most WORKER_FRACTION of the available memory. The
+        workers are counted as used memory from then on.
+
+        :param jobs: requested number of worker processes, 1 means no workers
+        :return: number of worker processes within the budget, 1 if there is no memory for more than one
+        """
+        if jobs <= 1:
+            return jobs
+        n_workers = int(min(jobs, max(1, self.get_available_bytes() * WORKER_FRACTION // self.worker_bytes)))
+        if n_workers < jobs:
+            logging.warning(f"Capped the number of worker processes from {jobs} to {n_workers} to stay within the "
+                            f"memory budget of {format_bytes(self.max_bytes)}")
+        self.n_workers = n_workers if n_workers > 1 else 0
+        return n_workers
+
+    @contextmanager
+    def reserve(self, n_bytes: float, purpose: str) -> Iterator[None]:
+        """
+        Reserve memory for data that is held while the context is active, e.g. a sample of rows
+
+        :param n_bytes: estimated memory of the data
+        :param purpose: description of the data for the error message
+        :raise MemoryBudgetError: if the data does not fit in the available memory
+        """
+        available = self.get_available_bytes()
+        if n_bytes > available:
+            raise MemoryBudgetError(f"{purpose} needs about {format_bytes(n_bytes)}, but only "
+                                    f"{format_bytes(available)} of the memory budget of {format_bytes(self.max_bytes)} "
+                                    f"are available")
+        self.reserved_bytes += n_bytes
+        try:
+            yield
+        finally:
+            self.reserved_bytes -= n_bytes
+
+    def get_chunksize(self, row_bytes: float) -> int:
+        """
+        Choose the number of rows per chunk, so that a chunk uses at most CHUNK_FRACTION of the available memory
+
+        :param row_bytes: estimated memory per row while its chunk is processed, kept to adapt the chunk size
+        :return: number of rows per chunk
+        :raise MemoryBudgetError: if not even MIN_CHUNKSIZE rows fit in the budget
+        """
+        self.row_bytes = row_bytes
+        chunksize = int(self.get_available_bytes() * CHUNK_FRACTION / self.row_bytes)
+        if chunksize < MIN_CHUNKSIZE:
+            raise MemoryBudgetError(f"Chunks of {MIN_CHUNKSIZE} rows of about {format_bytes(self.row_bytes)} each do "
+                                    f"not fit in the memory budget of {format_bytes(self.max_bytes)} with "
+                                    f"{format_bytes(self.get_used_bytes())} in use")
+        logging.info(f"Read chunks of {chunksize} rows to stay within the memory budget of "
+                     f"{format_bytes(self.max_bytes)}")
+        return chunksize
+
+    def adapt_chunksize(self, chunksize: int) -> int:
+        """
+        Adapt the number of rows per chunk to the memory observed after a chunk. If the budget is exceeded, the chunk
+        size is halved, otherwise it follows the available memory but at most doubles.
+
+        :param chunksize: number of rows of the last chunk
+        :return: number of rows of the next chunk
+        :raise MemoryBudgetError: if the budget is exceeded with chunks of MIN_CHUNKSIZE rows
+        """
+        available = self.get_available_bytes()
+        if available < 0:
+            if chunksize <= MIN_CHUNKSIZE:
+                raise MemoryBudgetError(f"The memory budget of {format_bytes(self.max_bytes)} is exceeded with "
+                                        f"{format_bytes(self.get_used_bytes())} in use and chunks of {chunksize} rows")
+            logging.debug(f"Memory budget exceeded by {format_bytes(-available)}, halve chunks of {chunksize} rows")
+            return max(MIN_CHUNKSIZE, chunksize // 2)
+        return max(MIN_CHUNKSIZE, min(2 * chunksize, int(available * CHUNK_FRACTION / self.row_bytes)))
+
+    def check(self, purpose: str) -> None:
+        """
+        :param purpose: description of the work for the error message
+        :raise MemoryBudgetError: if the budget is exceeded
+        """
+        if self.get_available_bytes() < 0:
+            raise MemoryBudgetError(f"The memory budget of {format_bytes(self.max_bytes)} is exceeded with "
+                                    f"{format_bytes(self.get_used_bytes())} in use while {purpose}")
+
+    def watch(self, records: Iterable[T], purpose: str) -> Iterator[T]:
+        """
+        Iterate over streamed records and check the budget every CHECK_INTERVAL records
+
+        :param records: records
+        :param purpose: description of the work for the error message
+        :return: iterator over the records
+        """
+        for i, record in enumerate(records, 1):
+            if i % CHECK_INTERVAL == 0:
+                self.check(purpose)
+            yield record
@@ -0,0 +1,82 @@
+"""
+Persisted inference state for incremental schema inference of data that only grows, e.g. append-only files or daily
+partitions. The state holds everything needed to regenerate the schema: the column summaries of csv files or the
+lossless schema of json files, together with the data file and the number of its bytes that were already read. A later
+run only reads the new data, merges it into the state and regenerates the schema from it.
+"""
+import json
+import logging
+import os
+from typing import Optional, Tuple
+
+from infer_schema.utils.utils import get_compression
+
+STATE_VERSION = 1
+STATE_SUFFIX = ".state.json"
+
+
+def get_state_fpath(schema_fpath: str) -> str:
+    """
+    Get the default path of the state file next to a schema file
+
+    :param schema_fpath: schema file path, e.g. data_schema-draft.csvs
+    :return: state file path, e.g. data_schema-draft.state.json
+    """
+    return os.path.splitext(schema_fpath)[0] + STATE_SUFFIX
+
+
+def load_state(state_fpath: Optional[str], data_format: str) -> Optional[dict]:
+    """
+    Load the state of previous runs if it exists
+
+    :param state_fpath: path to state file or None if no state is used
+    :param data_format: expected format of the data the state belongs to, csv or json
+    :return: state or None if there is no state file yet
+    """
+    if state_fpath is None or not os.path.exists(state_fpath):
+        return None
+    with open(state_fpath, "r") as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION or state.get("format") != data_format:
+        raise ValueError(f"State file {state_fpath} is no {data_format} state of version {STATE_VERSION}")
+    logging.info(f"Loaded inference state of {state['data_fpath']} from {state_fpath}")
+    return state
+
+
+def save_state(state_fpath: str, data_format: str, data_fpath: str, n_bytes: int, **content) -> None:
+    """
+    Save the inference state
+
+    :param state_fpath: path to state file
+    :param data_format: format of the data, csv or json
+    :param data_fpath: path to the data file that was read last
+    :param n_bytes: number of bytes of the data file that were read
+    :param content: format specific content of the state
+    """
+    state = {"version": STATE_VERSION, "format": data_format, "data_fpath": os.path.abspath(data_fpath),
+             "n_bytes": n_bytes}
+    state.update(content)
+    os.makedirs(os.path.dirname(os.path.abspath(state_fpath)), exist_ok=True)
+    with open(state_fpath, "w") as f:
+        json.dump(state, f)
+    logging.info(f"Saved inference state at {state_fpath}")
+
+
+def get_new_byte_range(data_fpath: str, state: Optional[dict]) -> Tuple[int, int]:
+    """
+    Get the byte range of a data file that was not read yet. If the state belongs to the same file, only the bytes
+    appended since then are new, otherwise the data file is a new file, e.g. a new partition, and all bytes are new.
+
+    :param data_fpath: path to data file
+    :param state: state of previous runs or None
+    :return: start and end byte offset of the new data
+    """
+    size = os.path.getsize(data_fpath)
+    if state is None or state["data_fpath"] != os.path.abspath(data_fpath):
+        return 0, size
+    if size < state["n_bytes"]:
+        raise ValueError(f"File {data_fpath} is smaller than when its state was saved, it is not append-only")
+    if size > state["n_bytes"] and get_compression(data_fpath) is not None:
+        raise ValueError(f"Compressed file {data_fpath} changed since its state was saved, only new files and "
+                         f"uncompressed files can be read incrementally")
+    return state["n_bytes"], size
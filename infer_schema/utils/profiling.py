@@ -0,0 +1,180 @@
+"""
+Opt-in instrumentation of schema inference. While a profiler is active, the stages of InferCSVSchema and
+InferJSONSchema, every column of a csv file and every call of the check_dtype predicates are timed, and the bytes read
+from data files are counted. The trace is exported as json or as Prometheus text exposition format.
+
+Profiling is disabled by default. The instrumented code then only checks whether PROFILER is None, so the overhead is
+negligible. Only the process that enabled profiling is traced: with more than one job, the work of the worker processes
+is included in the stage timings, but their columns and predicates are not recorded.
+
+    with profile() as profiler:
+        InferCSVSchema(csv_path).run()
+    print(profiler.to_prometheus())
+"""
+import functools
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Iterator, Optional
+
+PROFILER: Optional["Profiler"] = None  # active profiler, None if profiling is disabled
+METRIC_PREFIX = "infer_schema"
+
+
+class Profiler:
+    def __init__(self) -> None:
+        """
+        Collect the timings and counters of a run
+        """
+        self.start = time.perf_counter()
+        self.stage_seconds = defaultdict(float)
+        self.stage_calls = Counter()
+        self.column_seconds = defaultdict(float)
+        self.predicate_seconds = defaultdict(float)
+        self.predicate_calls = Counter()
+        self.bytes_read = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a stage. Stages can be entered repeatedly, their times are summed up. Stages may be nested, e.g. reading
+        chunks within accumulating them, so the times of all stages do not add up to the total time.
+
+        :param name: stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] += time.perf_counter() - start
+            self.stage_calls[name] += 1
+
+    def to_dict(self) -> dict:
+        """
+        :return: trace with the seconds and calls per stage, seconds per column, seconds and calls per predicate, bytes
+            read and peak memory
+        """
+        return {
+            "seconds": time.perf_counter() - self.start,
+            "stages": {name: {"seconds": seconds, "calls": self.stage_calls[name]}
+                       for name, seconds in self.stage_seconds.items()},
+            "columns": dict(self.column_seconds),
+            "predicates": {name: {"seconds": seconds, "calls": self.predicate_calls[name]}
+                           for name, seconds in self.predicate_seconds.items()},
+            "bytes_read": self.bytes_read,
+            "peak_rss_bytes": get_peak_rss_bytes(),
+        }
+
+    def to_json(self) -> str:
+        """
+        :return: trace as json string
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        :return: trace in Prometheus text exposition format
+        """
+        trace = self.to_dict()
+        metrics = [
+            ("seconds", "gauge", "Wall-clock seconds of the run", [("", trace["seconds"])]),
+            ("stage_seconds", "gauge", "Wall-clock seconds per stage",
+             [(label("stage", name), stage["seconds"]) for name, stage in trace["stages"].items()]),
+            ("stage_calls_total", "counter", "Calls per stage",
+             [(label("stage", name), stage["calls"]) for name, stage in trace["stages"].items()]),
+            ("column_seconds", "gauge", "Seconds of summarizing each csv column",
+             [(label("column", name), seconds) for name, seconds in trace["columns"].items()]),
+            ("predicate_seconds", "gauge", "Seconds per data type predicate",
+             [(label("predicate", name), predicate["seconds"]) for name, predicate in trace["predicates"].items()]),
+            ("predicate_calls_total", "counter", "Calls per data type predicate",
+             [(label("predicate", name), predicate["calls"]) for name, predicate in trace["predicates"].items()]),
+            ("bytes_read_total", "counter", "Bytes read from data files", [("", trace["bytes_read"])]),
+            ("peak_rss_bytes", "gauge", "Peak resident memory of the process", [("", trace["peak_rss_bytes"])]),
+        ]
+        lines = []
+        for name, metric_type, description, samples in metrics:
+            lines += [f"# HELP {METRIC_PREFIX}_{name} {description}", f"# TYPE {METRIC_PREFIX}_{name} {metric_type}"]
+            lines += [f"{METRIC_PREFIX}_{name}{labels} {value}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+def label(name: str, value: str) -> str:
+    """
+    :return: Prometheus label set of one label with escaped value
+    """
+    value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return f'{{{name}="{value}"}}'
+
+
+def get_peak_rss_bytes() -> int:
+    """
+    :return: peak resident memory of this process in bytes, 0 if it cannot be measured (e.g. on Windows)
+    """
+    try:
+        # unlike ru_maxrss, the high water mark of /proc is not inherited from the parent process that spawned this one
+        with open("/proc/self/status", "r") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) * 2 ** 10
+    except (OSError, StopIteration):
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 2 ** 10)
+
+
+@contextmanager
+def profile() -> Iterator[Profiler]:
+    """
+    Profile all schema inference within the context
+
+    :return: context manager of the active profiler
+    """
+    global PROFILER
+    previous, PROFILER = PROFILER, Profiler()
+    try:
+        yield PROFILER
+    finally:
+        PROFILER = previous
+
+
+def stage(name: str) -> ContextManager[None]:
+    """
+    :param name: stage name
+    :return: context manager that times a stage if profiling is enabled
+    """
+    return nullcontext() if PROFILER is None else PROFILER.stage(name)
+
+
+def add_column_seconds(name: str, seconds: float) -> None:
+    if PROFILER is not None:
+        PROFILER.column_seconds[name] += seconds
+
+
+def add_bytes_read(n_bytes: int) -> None:
+    if PROFILER is not None:
+        PROFILER.bytes_read += n_bytes
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    Decorator that times and counts the calls of a predicate if profiling is enabled
+
+    :param func: predicate
+    :return: instrumented predicate
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = PROFILER
+        if profiler is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.predicate_seconds[func.__qualname__] += time.perf_counter() - start
+            profiler.predicate_calls[func.__qualname__] += 1
+    return wrapper
@@ -0,0 +1,130 @@
+"""
+Cache of inference results, so that repeated runs on unchanged data files return the stored schema without reading the
+data. Entries are keyed by a fingerprint of the data file (path, size and modification time or a hash of the content),
+the version of this tool and all parameters that change the result, e.g. the literals file and min_n_limits. The cache
+is a directory with one json file per entry. It is bounded in size, the least recently used entries are evicted first.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+from infer_schema import __version__
+
+DEFAULT_MAX_SIZE = 256 * 2 ** 20  # bytes
+HASH_BLOCK_SIZE = 2 ** 20
+
+
+def get_default_cache_dir() -> str:
+    """
+    :return: infer-schema directory in the user cache directory
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "infer-schema")
+
+
+def get_file_hash(fpath: str) -> str:
+    """
+    Hash the content of a file
+
+    :param fpath: file path
+    :return: hex digest of the blake2b hash of the file content
+    """
+    file_hash = hashlib.blake2b(digest_size=20)
+    with open(fpath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE,
+                 hash_content: bool = False) -> None:
+        """
+        Open a result cache
+
+        :param cache_dir: directory of the cache entries, the user cache directory if None
+        :param max_size: maximum total size of all entries in bytes
+        :param hash_content: whether data files are identified by a hash of their content instead of their path, size
+            and modification time. Hashing reads the whole file, but is still much faster than inference.
+        """
+        self.cache_dir = cache_dir or get_default_cache_dir()
+        self.max_size = max_size
+        self.hash_content = hash_content
+
+    def get_key(self, data_fpath: str, params: dict) -> str:
+        """
+        Get the key of the result of a data file
+
+        :param data_fpath: path to data file
+        :param params: json serializable parameters that change the result
+        :return: cache key
+        """
+        stat = os.stat(data_fpath)
+        if self.hash_content:
+            fingerprint = {"size": stat.st_size, "hash": get_file_hash(data_fpath)}
+        else:
+            fingerprint = {"path": os.path.abspath(data_fpath), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        key = {"file": fingerprint, "version": __version__, "params": params}
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get_entry_fpath(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached result and mark it as recently used
+
+        :param key: cache key as returned by get_key
+        :return: cached result or None if there is none
+        """
+        entry_fpath = self.get_entry_fpath(key)
+        try:
+            with open(entry_fpath, "r") as f:
+                result = json.load(f)
+            os.utime(entry_fpath)  # the modification time of an entry is its last use
+        except (OSError, ValueError):
+            return None
+        logging.info(f"Found cached result {entry_fpath}")
+        return result
+
+    def put(self, key: str, result: Any) -> None:
+        """
+        Store a result and evict the least recently used entries if the cache exceeds its maximum size
+
+        :param key: cache key as returned by get_key
+        :param result: json serializable result
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # write to a temporary file first, so that concurrent runs never read a partially written entry
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                json.dump(result, f)
+            os.replace(f.name, self.get_entry_fpath(key))
+            self.evict()
+        except OSError as e:
+            logging.warning(f"Cannot store result in cache {self.cache_dir}: {e}.")
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the total size of the cache is at most its maximum size
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed by a concurrent run
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_fpath in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(entry_fpath)
+            except FileNotFoundError:
+                pass
+            total_size -= size
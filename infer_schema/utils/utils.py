@@ -1,6 +1,15 @@
+import bz2
+import gzip
+import io
+import lzma
 import os
 import logging
 import re
+from typing import IO, Optional, TextIO
+
+from infer_schema.utils.json_stream import JSON_LINES_EXTENSIONS
+
+COMPRESSION_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}  # openers of compressed files
 
 
 def get_file_extension(fpath: str) -> str:
@@ -13,18 +22,67 @@ def get_file_extension(fpath: str) -> str:
     return os.path.splitext(fpath)[1]
 
 
+def get_compression(fpath: str) -> Optional[str]:
+    """
+    Get the compression of a data file from its extension
+
+    :param fpath: data file path
+    :return: compression extension (.gz, .bz2 or .xz) or None for uncompressed files
+    """
+    extension = get_file_extension(fpath).lower()
+    return extension if extension in COMPRESSION_OPENERS else None
+
+
+def strip_compression_extension(fpath: str) -> str:
+    """
+    :param fpath: data file path
+    :return: path without the compression extension, e.g. x.csv for x.csv.gz
+    """
+    return os.path.splitext(fpath)[0] if get_compression(fpath) else fpath
+
+
+def open_data_file(fpath: str, mode: str = "rt", **kwargs) -> IO:
+    """
+    Open a data file, compressed files are decompressed while they are read
+
+    :param fpath: data file path
+    :param mode: file mode
+    :param kwargs: additional keyword arguments for open, e.g. encoding
+    :return: opened file
+    """
+    return COMPRESSION_OPENERS.get(get_compression(fpath), open)(fpath, mode, **kwargs)
+
+
+def get_data_format(fpath: str) -> Optional[str]:
+    """
+    Get the format of a data file from its extension
+
+    :param fpath: data file path, optionally with the extension of its compression
+    :return: json for json and json lines files, csv for csv and tsv files, None for other files
+    """
+    fpath = strip_compression_extension(fpath)
+    if fpath.endswith("json") or fpath.endswith("jsonl") or fpath.endswith("ndjson"):
+        return "json"
+    if fpath.endswith("csv") or fpath.endswith("tsv"):
+        return "csv"
+    return None
+
+
 def get_schema_fpath(fpath: str):
     """
     Edit a given file path of a json or csv by adding the suffix _schema-draft before the file extension
 
-    :param fpath: data file path with extension
+    :param fpath: data file path with extension, the extension of its compression is dropped
     :return: edited file path with _schema suffix before extension
     """
     try:
+        fpath = strip_compression_extension(fpath)
         f_path_no_ext = os.path.splitext(fpath)[0]
         extension = get_file_extension(fpath)
         if extension.endswith("csv"):
             extension += "s"  # .csvs extension for csv schema files
+        elif extension.lower() in JSON_LINES_EXTENSIONS:
+            extension = ".json"  # the schema of a json lines file is a json file
         updated_fpath = f_path_no_ext + "_schema-draft" + extension
         return updated_fpath
     except IOError as e:
@@ -40,3 +98,44 @@ def replace_non_ascii_characters(str_to_edit: str, replacement: str = ".") -> st
     :return: updated string
     """
     return re.sub('[^\x00-\x7F]', replacement, str_to_edit)
+
+
+class FileRange(io.RawIOBase):
+    def __init__(self, fpath: str, start: int, end: int) -> None:
+        """
+        Binary file that only reads the bytes of a file within a byte range
+
+        :param fpath: file path
+        :param start: first byte to read
+        :param end: byte offset after the last byte to read
+        """
+        super().__init__()
+        self.f = open(fpath, "rb")
+        self.f.seek(start)
+        self.remaining = max(end - start, 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.f.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self.f.close()
+        super().close()
+
+
+def open_byte_range(fpath: str, start: int, end: int, encoding: str = "utf-8") -> TextIO:
+    """
+    Open a byte range of a text file, e.g. the lines appended since a previous run
+
+    :param fpath: file path
+    :param start: byte offset of the start of a line
+    :param end: byte offset after the last byte to read
+    :param encoding: encoding of the file
+    :return: opened text file that ends at end
+    """
+    return io.TextIOWrapper(io.BufferedReader(FileRange(fpath, start, end)), encoding=encoding, newline="")
@@ -4,6 +4,7 @@ setup(
     name='infer-data-schema',
     version='0.1.0',
     packages=["infer_schema", "infer_schema.utils"],
+    package_data={"infer_schema": ["resources/csv-type-literals.yml", "resources/csv-type-literals.json"]},
     url='',
     license='',
     author='Carolin Scholl',
@@ -11,6 +12,9 @@ setup(
     entry_points={
         'console_scripts': [
             'run-schema-inference = infer_schema.main:main',
+            'run-batch-schema-inference = infer_schema.batch:main',
+            'run-schema-inference-service = infer_schema.service:main',
+            'run-schema-inference-client = infer_schema.client:main',
         ]
     },
     python_requires='>=3.8.10',
@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from infer_schema.batch import collect_data_fpaths, main
+
+
+class BatchTest(unittest.TestCase):
+    """Tests for inferring the schemas of many files in batch mode"""
+
+    test_data_file = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+    gt_schema = os.path.join(os.getcwd(), "test", "test-data", "gt_dummy-schema.csvs")
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), BatchTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        self.data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(os.path.join(self.data_dir, "sub"))
+        shutil.copy(self.test_data_file, os.path.join(self.data_dir, "a.csv"))
+        shutil.copy(self.test_data_file, os.path.join(self.data_dir, "sub", "b.csv"))
+        with open(os.path.join(self.data_dir, "sub", "c.jsonl"), "w") as f:
+            f.write('{"id": 1}\n{"id": 2}\n')
+        with open(os.path.join(self.data_dir, "broken.json"), "w") as f:
+            f.write('{"id": ')
+        with open(os.path.join(self.data_dir, "notes.txt"), "w") as f:
+            f.write("no data")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_collect_data_fpaths(self):
+        fpaths = collect_data_fpaths([self.data_dir])
+        assert [os.path.relpath(fpath, self.data_dir) for fpath in fpaths] == \
+            ["a.csv", "broken.json", os.path.join("sub", "b.csv"), os.path.join("sub", "c.jsonl")]
+        assert collect_data_fpaths([os.path.join(self.data_dir, "**", "*.csv")]) == [fpaths[0], fpaths[2]]
+        # schema files written next to the data are no data files
+        with open(os.path.join(self.data_dir, "a_schema-draft.json"), "w") as f:
+            f.write("{}")
+        assert collect_data_fpaths([self.data_dir]) == fpaths
+
+    def test_batch(self):
+        manifest_fpath = os.path.join(self.tmp_dir, "manifest.txt")
+        with open(manifest_fpath, "w") as f:
+            f.write("# data files\ndata/sub\n\ndata/a.csv\ndata/broken.json\n")
+        summary_fpath = os.path.join(self.tmp_dir, "summary.json")
+        output_dir = os.path.join(self.tmp_dir, "schemas")
+        exit_code = main(["--manifest", manifest_fpath, "--output-dir", output_dir, "--summary", summary_fpath,
+                          "--jobs", "2", "--no-cache"])
+        assert exit_code == 1  # broken.json fails
+        with open(summary_fpath, "r") as f:
+            summary = json.load(f)
+        assert (summary["n_files"], summary["n_valid"], summary["n_invalid"], summary["n_error"]) == (4, 3, 0, 1)
+        status = {os.path.basename(file["data_fpath"]): file["status"] for file in summary["files"]}
+        assert status == {"a.csv": "valid", "broken.json": "error", "b.csv": "valid", "c.jsonl": "valid"}
+        assert summary["files"][2]["schema_fpath"] == os.path.join(output_dir, "sub", "b_schema-draft.csvs")
+        assert all(file["seconds"] >= 0 for file in summary["files"])
+        assert os.path.exists(os.path.join(output_dir, "sub", "c_schema-draft.json"))
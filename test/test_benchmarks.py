@@ -0,0 +1,40 @@
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from benchmarks import generators
+from benchmarks.run import SCENARIOS, get_data_fpath, run_scenario
+
+
+class BenchmarksTest(unittest.TestCase):
+    """Tests for the synthetic data generators and the benchmark harness"""
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), BenchmarksTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_generators_seeded(self):
+        for scenario, (data_format, generate, kwargs) in SCENARIOS.items():
+            fpaths = []
+            for i, seed in enumerate([0, 0, 1]):
+                fpaths.append(os.path.join(self.tmp_dir, f"{scenario}_{i}.{data_format}"))
+                generate(fpaths[-1], seed=seed, **kwargs["tiny"])
+            assert filecmp.cmp(fpaths[0], fpaths[1], shallow=False), scenario
+            assert not filecmp.cmp(fpaths[0], fpaths[2], shallow=False), scenario
+
+        df = pd.read_csv(get_data_fpath(self.tmp_dir, "wide_csv", "tiny"))
+        assert df.shape == (SCENARIOS["wide_csv"][2]["tiny"]["n_rows"], SCENARIOS["wide_csv"][2]["tiny"]["n_columns"])
+
+    def test_run_scenario(self):
+        result = run_scenario("tall_csv", "tiny", self.tmp_dir)
+        assert list(result["stages"]) == ["import", "separator", "read", "infer", "validate"]
+        assert result["n_rows"] == 1000 and result["rows_per_s"] > 0 and result["peak_rss_mb"] > 0
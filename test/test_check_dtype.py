@@ -0,0 +1,49 @@
+import unittest
+
+import pandas as pd
+
+import infer_schema.utils.check_dtype as check_type
+
+
+class CheckDtypeTest(unittest.TestCase):
+    """Tests for the data type checks on a column profile"""
+
+    def test_column_profile(self):
+        profile = check_type.ColumnProfile(pd.Series(["1", "0", None, "12", "-3", "1.0"], dtype=object))
+        assert profile.null_mask.tolist() == [False, False, True, False, False, False]
+        assert profile.float_values.tolist() == [1.0, 0.0, 12.0, -3.0, 1.0]
+        assert profile.integer_mask.tolist() == [True, True, True, True, False]
+        assert profile.bool_mask.tolist() == [True, True, False, False, False]
+
+    def test_checks_on_profile(self):
+        cases = {
+            "bool": (["0", "1", None], dict(bool=True, numeric=True, integer=True, pos_integer=True, pos=True)),
+            "uint": (["0", "12", "7"], dict(bool=False, numeric=True, integer=True, pos_integer=True, pos=True)),
+            "int": (["3", "-1"], dict(bool=False, numeric=True, integer=True, pos_integer=False, pos=False)),
+            "float": (["1.5", "1e3"], dict(bool=False, numeric=True, integer=False, pos_integer=False, pos=True)),
+            "str": (["1", "a"], dict(bool=False, numeric=False, integer=False, pos_integer=False, pos=False)),
+            "signed": (["+1", "0"], dict(bool=False, numeric=True, integer=True, pos_integer=False, pos=True)),
+            "inf": (["Inf", "1"], dict(bool=False, numeric=False, integer=False, pos_integer=False, pos=False)),
+            "space": ([" 1", "1_0"], dict(bool=False, numeric=False, integer=False, pos_integer=False, pos=False)),
+        }
+        for name, (values, expected) in cases.items():
+            profile = check_type.ColumnProfile(pd.Series(values, dtype=object))
+            result = dict(bool=check_type.check_is_bool(profile), numeric=check_type.check_is_numeric(profile),
+                          integer=check_type.check_is_integer(profile),
+                          pos_integer=check_type.check_is_positive_integer(profile),
+                          pos=check_type.check_is_numeric_positive(profile))
+            assert result == expected, name
+
+    def test_checks_on_numeric_series(self):
+        # numeric series are checked by their values, without the syntax checks of text values
+        var = pd.Series([1, 2.5, None])
+        assert check_type.check_is_numeric(var) and check_type.check_is_float(var)
+        assert check_type.check_is_numeric_positive(var) and not check_type.check_is_integer(var)
+        var = pd.Series([0, 1, None], dtype="Int64")
+        assert check_type.check_is_bool(var) and check_type.check_is_positive_integer(var)
+
+    def test_dictionary_encoded_profile(self):
+        var = pd.Series(["a", "b", None, "a", "b", "a"] * 10, dtype=object)
+        profile = check_type.ColumnProfile(pd.Series(["a", "b"], dtype=object), counts=[30, 20])
+        assert (profile.n_values, profile.n_unique_values) == (50, 2)
+        assert check_type.heuristic_check_categorical(profile) == check_type.heuristic_check_categorical(var)
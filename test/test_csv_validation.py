@@ -0,0 +1,51 @@
+import os
+import unittest
+
+import pandas as pd
+from omegaconf import OmegaConf
+
+from infer_schema.infer_csv_schema import InferCSVSchema
+from infer_schema.utils.csv_validation import CSVSchema, validate_csv
+
+
+class CsvValidationTest(unittest.TestCase):
+    """Tests for validating csv files against csv schemas"""
+
+    test_data_file = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+    gt_schema = os.path.join(os.getcwd(), "test", "test-data", "gt_dummy-schema.csvs")
+    literals = OmegaConf.load(InferCSVSchema.literals_fpath)
+
+    def check(self, rule: str, values: list) -> list:
+        schema = CSVSchema(f'version 1.2\n@totalColumns 1\n"var": {rule}', self.literals)
+        return schema.checks[0](pd.Series(values, dtype=object)).tolist()
+
+    def test_validate_gt_schema(self):
+        schema = CSVSchema.from_file(self.gt_schema, self.literals)
+        assert schema.separator == ";" and len(schema.column_names) == 12
+        violations = validate_csv(self.test_data_file, schema, chunksize=4)
+        assert violations.n_violations == 0 and violations.n_rows == 14
+
+    def test_violation_counts(self):
+        schema = CSVSchema.from_file(self.gt_schema, self.literals)
+        schema.checks[0] = CSVSchema('version 1.2\n"var_bool": is("1")', self.literals).checks[0]
+        violations = validate_csv(self.test_data_file, schema, chunksize=4, max_examples=2)
+        n_zeros = (pd.read_csv(self.test_data_file, sep=";", dtype=str)["var_bool"] != "1").sum()
+        assert violations.column_counts["var_bool"] == n_zeros
+        assert violations.n_violations == n_zeros and len(violations.examples) == 2
+
+    def test_expressions(self):
+        assert self.check('upperCase length(1) or is("NA") or empty', ["A", "NA", "", "a", "AB"]) == \
+            [True, True, True, False, False]
+        assert self.check('range(0, *) or empty', ["0", "1.5", "-1", "a", "", " 1"]) == \
+            [True, True, False, False, True, False]
+        assert self.check('positiveInteger', ["12", "1.0", "-1"]) == [True, False, False]
+        assert self.check('any("a","b")', ["a", "b", "ab"]) == [True, True, False]
+        assert self.check('regex("caf.")', ["café", "cafés"]) == [True, False]
+        assert self.check('xDate', ["1992-12-02", "1992-12-02T10:11:12"]) == [True, False]
+        assert self.check('length(2, *)', ["a", "ab", "abc"]) == [False, True, True]
+
+    def test_unsupported_rule(self):
+        with self.assertRaises(ValueError):
+            CSVSchema('version 1.2\n"var": notEmpty', self.literals)
+        with self.assertRaises(ValueError):
+            CSVSchema('version 1.2\n@totalColumns 2\n"var": empty', self.literals)
@@ -0,0 +1,31 @@
+import unittest
+
+import pandas as pd
+
+import infer_schema.utils.check_dtype as check_type
+from infer_schema.utils.distinct import DistinctTracker
+
+
+class DistinctTest(unittest.TestCase):
+    """Tests for bounded-memory counting of distinct values"""
+
+    def test_distinct_tracker(self):
+        tracker = DistinctTracker(3)
+        tracker.update(["b", "a", "b", "c"])
+        assert (tracker.get_values(), len(tracker), tracker.is_full) == (["b", "a", "c"], 3, False)
+        other = DistinctTracker(3)
+        other.update(["a", "d", "e"])
+        tracker.merge(other)
+        assert tracker.is_full and tracker.get_values() is None
+        assert len(tracker) == 4 and "d" in tracker and "e" not in tracker  # stops growing after max_size + 1 values
+
+        # values beyond the first block are not looked at once the tracker is full
+        tracker = DistinctTracker(25)
+        tracker.update([str(i) for i in range(10 ** 5)])
+        assert len(tracker) == 26
+
+    def test_heuristic_check_categorical(self):
+        assert check_type.heuristic_check_categorical(pd.Series(["a", "b", None] * 100, dtype=object))
+        assert not check_type.heuristic_check_categorical(pd.Series([str(i) for i in range(1000)], dtype=object))
+        assert not check_type.heuristic_check_categorical(pd.Series(["1.5", "2.5"] * 100, dtype=object),
+                                                          forbid_float_categories=True)
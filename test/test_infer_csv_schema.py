@@ -1,10 +1,15 @@
+import gzip
 import os
 import shutil
 import subprocess
 import tempfile
 import unittest
 
+import pandas as pd
+
 from infer_schema.infer_csv_schema import InferCSVSchema
+from infer_schema.utils.result_cache import ResultCache
+from infer_schema.utils.utils import get_schema_fpath
 
 
 class InferCsvSchemaTest(unittest.TestCase):
@@ -29,3 +34,157 @@ class InferCsvSchemaTest(unittest.TestCase):
         with open(self.gt_schema, "r") as f:
             gt_schema = f.read()
         assert schema == gt_schema
+
+    def test_infer_csv_schema_ir(self):
+        schema_ir = InferCSVSchema(self.test_data_file).create_schema_ir(min_n_limits=1)
+        with open(self.gt_schema, "r") as f:
+            assert schema_ir.to_text() == f.read()
+        assert (schema_ir.total_columns, schema_ir.separator) == (12, ";")
+        columns = {column.name: column for column in schema_ir.columns}
+        assert columns["var_cat"].column_type == "categorical" and columns["var_cat"].categories == ["a", "b"]
+        assert columns["var_uint"].expressions == ["positiveInteger"] and columns["var_uint"].missing_symbols == ["NA"]
+        assert columns["var_xdate"].allows_empty and not columns["var_const"].allows_empty
+
+        # columns of a csv file without rows are empty
+        header_fpath = os.path.join(self.tmp_dir, "header.csv")
+        with open(header_fpath, "w") as f:
+            f.write("a,b\n")
+        schema = InferCSVSchema(header_fpath).create_schema_from_csv()
+        assert schema.splitlines()[-2:] == ['"a": empty', '"b": empty']
+
+    def test_infer_csv_schema_chunked(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        for chunksize in [1, 4, 100]:
+            schema = InferCSVSchema(self.test_data_file, chunksize=chunksize).create_schema_from_csv(min_n_limits=1)
+            assert schema == gt_schema
+
+    def test_derived_missing_value_view(self):
+        infer = InferCSVSchema(self.test_data_file)
+        assert infer.seperator == ";"
+        pd.testing.assert_frame_equal(infer.df, pd.read_csv(self.test_data_file, sep=";", dtype=str))
+
+    def test_infer_csv_schema_parallel(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        for chunksize in [None, 5]:
+            schema = InferCSVSchema(self.test_data_file, chunksize=chunksize, jobs=2) \
+                .create_schema_from_csv(min_n_limits=1)
+            assert schema == gt_schema
+
+    def test_infer_csv_schema_sampled(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        schema = InferCSVSchema(self.test_data_file, sample_rows=100).create_schema_from_csv(min_n_limits=1)
+        assert schema == gt_schema
+        # types inferred from three rows are widened where the other rows do not fit, to the types of all rows
+        schema = InferCSVSchema(self.test_data_file, chunksize=4, sample_rows=3).create_schema_from_csv(min_n_limits=1)
+        assert schema == gt_schema
+
+    def test_infer_csv_schema_small_sample(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        data_fpath = os.path.join(self.tmp_dir, "dates.csv")
+        with open(data_fpath, "w") as f:
+            f.write("id;d;name\n" + "".join(f"{i};2024-01-0{i + 1};n{i}\n" for i in range(8)))
+        dates_schema = InferCSVSchema(data_fpath).create_schema_from_csv(min_n_limits=1)
+        assert '"d": xDate' in dates_schema
+        # the type of an empty sample is widened by the first chunk without dropping flags of unverified rows
+        assert InferCSVSchema(data_fpath, sample_fraction=0.01).create_schema_from_csv(min_n_limits=1) == dates_schema
+        for sample_rows in [0, 1]:  # empty sample and sample smaller than one chunk
+            infer = InferCSVSchema(self.test_data_file, chunksize=4, sample_rows=sample_rows)
+            assert infer.create_schema_from_csv(min_n_limits=1) == gt_schema
+
+    def test_infer_csv_schema_sampled_widened_to_string(self):
+        data_fpath = os.path.join(self.tmp_dir, "outlier.csv")
+        with open(data_fpath, "w") as f:
+            f.write("num,date,flag\n")
+            f.writelines(f"{i * 1.5},2024-01-{i % 28 + 1:02d},{i % 2}\n" for i in range(1000))
+            f.write("x,x,x\n")
+        gt_schema = InferCSVSchema(data_fpath).create_schema_from_csv(min_n_limits=1)
+        assert '"num": length(1, *)' in gt_schema and '"flag": any("0","1","x")' in gt_schema
+        try:
+            for seed in [1, 2]:
+                # the numeric, date and bool types of the sample are widened by the last row
+                InferCSVSchema.sample_seed = seed
+                infer = InferCSVSchema(data_fpath, chunksize=200, sample_rows=40)
+                assert infer.create_schema_from_csv(min_n_limits=1) == gt_schema
+        finally:
+            InferCSVSchema.sample_seed = 0
+
+    def test_inferred_schema_validates_data(self):
+        data_fpath = os.path.join(self.tmp_dir, "syntax.csv")
+        pd.DataFrame({"datetime": [f"2024-01-02T02:43:{i % 60:02d}" for i in range(200)],
+                      "signed": [f"+{i}" if i % 2 else str(i) for i in range(200)],
+                      "inf": ["Inf" if i == 5 else f"{i}.5" for i in range(200)]}).to_csv(data_fpath, index=False)
+        infer = InferCSVSchema(data_fpath)
+        # literals and numbers are only inferred if the validator accepts the whole value
+        assert infer.create_schema_from_csv().splitlines()[3:] == \
+            ['"datetime": length(1, *)', '"signed": range(0, *)', '"inf": length(1, *)']
+        assert infer.run(os.path.join(self.tmp_dir, "syntax_schema-draft.csvs"))
+        assert infer.violations.n_violations == 0
+
+    def test_run_validates_schema(self):
+        infer = InferCSVSchema(self.test_data_file, chunksize=5)
+        assert infer.run(os.path.join(self.tmp_dir, "dummy_schema-draft.csvs"))
+        assert infer.violations.n_violations == 0 and infer.violations.n_rows == 14
+
+    def test_infer_compressed_csv_schema(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        data_fpath = os.path.join(self.tmp_dir, "dummy.csv.gz")
+        with open(self.test_data_file, "rb") as f_in, gzip.open(data_fpath, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        assert get_schema_fpath(data_fpath) == os.path.join(self.tmp_dir, "dummy_schema-draft.csvs")
+        # the schema of a tsv file keeps its name, with or without compression
+        assert get_schema_fpath("dummy.tsv.gz") == get_schema_fpath("dummy.tsv") == "dummy_schema-draft.tsv"
+        for chunksize in [None, 4]:
+            infer = InferCSVSchema(data_fpath, chunksize=chunksize)
+            assert infer.create_schema_from_csv(min_n_limits=1) == gt_schema
+        assert infer.run(min_n_limits=1)
+        assert infer.violations.n_violations == 0 and infer.violations.n_rows == 14
+
+    def test_infer_csv_schema_incremental(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        with open(self.test_data_file, "r") as f:
+            lines = f.read().splitlines(keepends=True)
+        data_fpath = os.path.join(self.tmp_dir, "dummy.csv")
+        state_fpath = os.path.join(self.tmp_dir, "dummy_schema-draft.state.json")
+        for chunksize in [None, 3]:
+            if os.path.exists(state_fpath):
+                os.remove(state_fpath)
+            # append-only file that grows by some rows between runs, the last run reads no new rows
+            for n_lines in [4, 9, len(lines), len(lines)]:
+                with open(data_fpath, "w") as f:
+                    f.write("".join(lines[:n_lines]))
+                infer = InferCSVSchema(data_fpath, chunksize=chunksize, state_fpath=state_fpath)
+                schema = infer.create_schema_from_csv(min_n_limits=1)
+                infer.save_state()
+            assert schema == gt_schema
+        # new partition with the remaining rows merged into the state of the first rows
+        os.remove(state_fpath)
+        partition_fpaths = [os.path.join(self.tmp_dir, f"part{i}.csv") for i in range(2)]
+        for partition_fpath, partition_lines in zip(partition_fpaths, [lines[:6], lines[:1] + lines[6:]]):
+            with open(partition_fpath, "w") as f:
+                f.write("".join(partition_lines))
+            infer = InferCSVSchema(partition_fpath, state_fpath=state_fpath)
+            schema = infer.create_schema_from_csv(min_n_limits=1)
+            infer.save_state()
+        assert schema == gt_schema
+
+    def test_run_cached(self):
+        cache = ResultCache(os.path.join(self.tmp_dir, "cache"))
+        schema_fpath = os.path.join(self.tmp_dir, "dummy_schema-draft.csvs")
+        assert InferCSVSchema(self.test_data_file).run(schema_fpath, min_n_limits=1, cache=cache)
+        with open(schema_fpath, "r") as f:
+            schema = f.read()
+        os.remove(schema_fpath)
+        # a cache hit does not read the csv file
+        infer = InferCSVSchema(self.test_data_file, chunksize=5)
+        infer.iter_chunks = None
+        assert infer.run(schema_fpath, min_n_limits=1, cache=cache)
+        with open(schema_fpath, "r") as f:
+            assert f.read() == schema
+        # other parameters are another entry
+        assert infer.get_cache_key(cache, min_n_limits=2) != infer.get_cache_key(cache, min_n_limits=1)
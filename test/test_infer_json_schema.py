@@ -0,0 +1,120 @@
+import bz2
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+from genson import SchemaBuilder
+
+from infer_schema.infer_json_schema import InferJSONSchema, JSONVersion
+
+
+class InferJsonSchemaTest(unittest.TestCase):
+    """Tests for inferring a schema from a json or json lines file"""
+
+    records = [{"id": 1, "name": "a", "tags": ["x", "y"]}, {"id": 2, "name": None, "score": 1.5},
+               {"id": 3, "nested": {"flag": True}}]
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), InferJsonSchemaTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        builder = SchemaBuilder(schema_uri=JSONVersion[2020])
+        builder.add_object(self.records)
+        self.gt_array_schema = builder.to_schema()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_infer_json_array_schema(self):
+        data_fpath = os.path.join(self.tmp_dir, "records.json")
+        with open(data_fpath, "w") as f:
+            json.dump(self.records, f, indent=2)
+        assert InferJSONSchema(data_fpath).create_schema_from_json() == self.gt_array_schema
+
+    def test_infer_json_lines_schema(self):
+        data_fpath = os.path.join(self.tmp_dir, "records.jsonl")
+        with open(data_fpath, "w") as f:
+            f.write("\n".join(json.dumps(record) for record in self.records) + "\n")
+        schema = InferJSONSchema(data_fpath).create_schema_from_json()
+        assert schema["type"] == "object"
+        assert schema["properties"] == self.gt_array_schema["items"]["properties"]
+        assert InferJSONSchema(data_fpath).run()
+        assert os.path.exists(os.path.join(self.tmp_dir, "records_schema-draft.json"))
+
+    def test_infer_compressed_json_schema(self):
+        array_fpath = os.path.join(self.tmp_dir, "records.json.bz2")
+        with bz2.open(array_fpath, "wt") as f:
+            json.dump(self.records, f, indent=2)
+        infer = InferJSONSchema(array_fpath)
+        assert infer.create_schema_from_json() == self.gt_array_schema
+        assert infer.run()
+        assert os.path.exists(os.path.join(self.tmp_dir, "records_schema-draft.json"))
+
+        lines_fpath = os.path.join(self.tmp_dir, "records.jsonl.xz")
+        with lzma.open(lines_fpath, "wt") as f:
+            f.write("\n".join(json.dumps(record) for record in self.records) + "\n")
+        # compressed json lines files are read by a single process
+        infer = InferJSONSchema(lines_fpath, jobs=2)
+        assert infer.is_json_lines and not infer.is_sharded
+        schema = infer.create_schema_from_json()
+        assert schema["properties"] == self.gt_array_schema["items"]["properties"]
+        assert infer.run(os.path.join(self.tmp_dir, "lines_schema-draft.json"))
+
+    def test_infer_json_lines_schema_parallel(self):
+        data_fpath = os.path.join(self.tmp_dir, "records.jsonl")
+        with open(data_fpath, "w") as f:
+            for i in range(50):
+                f.write("\n".join(json.dumps(record) for record in self.records[i % 3:]) + "\n")
+            f.write(json.dumps([1, "a"]) + "\n")
+        schema = InferJSONSchema(data_fpath).create_schema_from_json()
+        assert InferJSONSchema(data_fpath, jobs=3).create_schema_from_json() == schema
+
+    def test_json_validation_errors(self):
+        schema = {"$schema": JSONVersion[2020], "type": "object", "properties": {"id": {"type": "integer"}},
+                  "required": ["id"]}
+        records = [{"id": "x"}, {"id": 1}, {}, {"id": "y"}, {"id": 2.5}]
+        for fname, jobs in [("records.jsonl", 1), ("records.jsonl", 2), ("records.json", 1)]:
+            data_fpath = os.path.join(self.tmp_dir, fname)
+            with open(data_fpath, "w") as f:
+                if fname.endswith(".jsonl"):
+                    f.write("\n".join(json.dumps(record) for record in records) + "\n")
+                else:
+                    json.dump(records, f)
+            array_schema = {"$schema": schema["$schema"], "type": "array", "items": schema}
+            errors = InferJSONSchema(data_fpath, jobs=jobs).collect_validation_errors(
+                schema if fname.endswith(".jsonl") else array_schema)
+            prefix = "$" if fname.endswith(".jsonl") else "$[*]"
+            assert [index for index, _, _ in errors.errors] == [0, 2, 3, 4]
+            assert errors.path_counts == {prefix + ".id": 3, prefix: 1}
+            assert errors.n_records == 5
+            capped = InferJSONSchema(data_fpath, jobs=jobs, max_errors=2).collect_validation_errors(
+                schema if fname.endswith(".jsonl") else array_schema)
+            assert len(capped.errors) == 2 and capped.is_full
+
+    def test_infer_json_lines_schema_incremental(self):
+        data_fpath = os.path.join(self.tmp_dir, "records.jsonl")
+        state_fpath = os.path.join(self.tmp_dir, "records_schema-draft.state.json")
+        lines = [json.dumps(record) + "\n" for record in self.records * 2 + [[1, "a"], {}]]
+        for jobs in [1, 2]:
+            if os.path.exists(state_fpath):
+                os.remove(state_fpath)
+            # append-only file that grows by some records between runs, the last run reads no new records
+            for n_lines in [0, 2, 5, len(lines), len(lines)]:
+                with open(data_fpath, "w") as f:
+                    f.write("".join(lines[:n_lines]))
+                infer = InferJSONSchema(data_fpath, jobs=jobs, state_fpath=state_fpath)
+                schema = infer.create_schema_from_json()
+                infer.save_state()
+            assert schema == InferJSONSchema(data_fpath).create_schema_from_json()
+        # new partition merged into the state of the previous file
+        partition_fpath = os.path.join(self.tmp_dir, "partition.jsonl")
+        with open(partition_fpath, "w") as f:
+            f.write(json.dumps({"id": "x"}) + "\n")
+        with open(data_fpath, "a") as f:
+            f.write(json.dumps({"id": "x"}) + "\n")
+        assert InferJSONSchema(partition_fpath, state_fpath=state_fpath).create_schema_from_json() == \
+            InferJSONSchema(data_fpath).create_schema_from_json()
@@ -0,0 +1,45 @@
+import json
+import random
+import unittest
+from collections import OrderedDict
+
+from genson import SchemaBuilder
+
+from infer_schema.utils.json_columnar import infer_values_schema, iter_batches
+from infer_schema.utils.json_shards import MergeSchemaBuilder, ShardSchemaBuilder, ShardSchemaNode
+
+
+def get_random_value(rng: random.Random, depth: int = 0):
+    if depth > 3 or rng.random() < 0.5:
+        return rng.choice([None, True, False, 0, 3, 1.5, "s", ""])
+    if rng.random() < 0.6:
+        return {key: get_random_value(rng, depth + 1) for key in rng.sample("abcde", rng.randint(0, 4))}
+    return [get_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+
+
+class JsonColumnarTest(unittest.TestCase):
+    """Tests for inferring json schemas column by column"""
+
+    def test_infer_values_schema(self):
+        records = [{"id": 1, "tags": [], "nested": {"a": None}}, {"id": 2.5, "tags": ["x", 1], "extra": True},
+                   {"id": None, "tags": [{"b": "y"}], "nested": {"a": "z", "c": []}}, "text", [1], OrderedDict(d=1)]
+        for n_values in range(len(records) + 1):
+            node = ShardSchemaNode()
+            for record in records[:n_values]:
+                node.add_object(record)
+            # the order of keys and alternatives is the one genson writes
+            assert json.dumps(infer_values_schema(records[:n_values])) == json.dumps(node.to_schema())
+
+    def test_batches_give_genson_schema(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            records = [get_random_value(rng, 1 if rng.random() < 0.8 else 0) for _ in range(rng.randint(0, 30))]
+            builder = SchemaBuilder(schema_uri="https://json-schema.org/draft/2020-12")
+            builder.add_object(records)
+            batch_builder = ShardSchemaBuilder(schema_uri="https://json-schema.org/draft/2020-12")
+            batch_builder.add_object([])
+            for batch in iter_batches(records, rng.randint(1, 8)):
+                batch_builder.add_schema({"type": "array", "items": infer_values_schema(batch)})
+            merge_builder = MergeSchemaBuilder(schema_uri="https://json-schema.org/draft/2020-12")
+            merge_builder.add_schema(batch_builder.to_schema())
+            assert json.dumps(merge_builder.to_schema()) == json.dumps(builder.to_schema())
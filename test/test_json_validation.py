@@ -0,0 +1,34 @@
+import json
+import unittest
+
+from infer_schema.utils.json_validation import get_item_schema, get_validator
+
+
+class JsonValidationTest(unittest.TestCase):
+    """Tests for the compiled json schema validator"""
+
+    schema = {"$schema": "https://json-schema.org/draft/2020-12", "type": "object",
+              "properties": {"id": {"type": "integer"}, "tags": {"type": "array", "items": {"type": "string"}},
+                             "value": {"anyOf": [{"type": ["number", "null"]}, {"type": "object"}]}},
+              "required": ["id"]}
+    instances = [{"id": 1}, {"id": 1.0}, {"id": True}, {"id": "1"}, {}, [], {"id": 1, "tags": ["a", 1]},
+                 {"id": 1, "tags": []}, {"id": 1, "value": None}, {"id": 1, "value": {"a": 1}}, {"id": 1, "value": "a"}]
+
+    def test_compiled_check_matches_jsonschema(self):
+        validator = get_validator(json.dumps(self.schema))
+        assert validator.check is not None
+        for instance in self.instances:
+            assert validator.check(instance) == validator.validator.is_valid(instance)
+            assert (not list(validator.iter_errors(instance))) == validator.validator.is_valid(instance)
+
+    def test_not_compiled_keywords(self):
+        schema = {"type": "string", "pattern": "^a"}
+        validator = get_validator(json.dumps(schema))
+        assert validator.check is None
+        assert not list(validator.iter_errors("ab")) and list(validator.iter_errors("b"))
+
+    def test_get_item_schema(self):
+        array_schema = {"$schema": self.schema["$schema"], "type": "array", "items": {"type": "integer"}}
+        assert get_item_schema(array_schema) == {"$schema": self.schema["$schema"], "type": "integer"}
+        assert get_item_schema(dict(array_schema, minItems=1)) is None
+        assert get_item_schema(self.schema) is None
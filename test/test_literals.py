@@ -0,0 +1,32 @@
+import os
+import unittest
+
+from omegaconf import OmegaConf
+
+from infer_schema.infer_csv_schema import InferCSVSchema
+from infer_schema.utils.literals import LiteralEngine
+
+
+class LiteralEngineTest(unittest.TestCase):
+    """Tests for matching values against the csv literals"""
+
+    def setUp(self) -> None:
+        literals = OmegaConf.load(os.path.join(os.getcwd(), "infer_schema", "resources", "csv-type-literals.yml"))
+        self.engine = LiteralEngine.from_config(literals, InferCSVSchema.checked_literals)
+
+    def test_classify(self):
+        mask = self.engine.classify(["1992-12-02", "2006-12-05", "1992-12-02"])
+        assert [name for name in self.engine.names if self.engine.matches(mask, name)] == ["XsdDateLiteral", "String"]
+        mask = self.engine.classify(["2001-01-31T00:00:00+01:00"])
+        assert self.engine.matches(mask, "XsdDateTimeWithTimeZoneLiteral")
+        assert self.engine.matches(mask, "XsdDateTimeLiteral")
+        assert self.engine.classify(["a"], mask=self.engine.bits["XsdDateLiteral"]) == 0
+        # a literal has to match the whole value
+        mask = self.engine.classify(["2024-01-02T02:43:43"])
+        assert [name for name in self.engine.names if self.engine.matches(mask, name)] == ["String"]
+
+    def test_classify_continues_from_mask(self):
+        mask = self.engine.classify(["10:11:12Z"])
+        assert self.engine.matches(mask, "XsdTimeLiteral")
+        mask = self.engine.classify(["hello"], mask=mask)
+        assert mask == self.engine.bits["String"]
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from infer_schema.infer_csv_schema import InferCSVSchema
+from infer_schema.infer_json_schema import InferJSONSchema
+from infer_schema.utils.memory_budget import MIN_CHUNKSIZE, MemoryBudget, MemoryBudgetError, get_rss_bytes
+
+
+class MemoryBudgetTest(unittest.TestCase):
+    """Tests for running schema inference within a memory budget"""
+
+    test_data_file = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+    gt_schema = os.path.join(os.getcwd(), "test", "test-data", "gt_dummy-schema.csvs")
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), MemoryBudgetTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_memory_budget(self):
+        budget = MemoryBudget(get_rss_bytes() + 100 * 2 ** 20, worker_bytes=20 * 2 ** 20)
+        # workers may use half of the available memory
+        assert budget.cap_workers(8) == 2 and budget.n_workers == 2
+        chunksize = budget.get_chunksize(1000)
+        assert MIN_CHUNKSIZE < chunksize < 30 * 2 ** 20 / 1000
+        assert budget.adapt_chunksize(MIN_CHUNKSIZE) == 2 * MIN_CHUNKSIZE
+        with budget.reserve(20 * 2 ** 20, "A sample"):
+            assert budget.get_chunksize(1000) < chunksize
+        assert budget.reserved_bytes == 0
+        with self.assertRaises(MemoryBudgetError):
+            with budget.reserve(200 * 2 ** 20, "A sample"):
+                pass
+        with self.assertRaises(MemoryBudgetError):
+            budget.get_chunksize(2 ** 20)
+        with self.assertRaises(MemoryBudgetError):
+            MemoryBudget(get_rss_bytes() // 2)
+
+    def test_infer_with_memory_budget(self):
+        with open(self.gt_schema, "r") as f:
+            gt_schema = f.read()
+        infer = InferCSVSchema(self.test_data_file, jobs=2, max_memory=get_rss_bytes() + 200 * 2 ** 20)
+        # the file is streamed in chunks that fit the budget, the schema does not change
+        assert infer.create_schema_from_csv(min_n_limits=1) == gt_schema
+        assert infer.chunksize >= MIN_CHUNKSIZE and infer.df_na is None
+        assert infer.run(os.path.join(self.tmp_dir, "dummy_schema-draft.csvs"), min_n_limits=1)
+
+        data_fpath = os.path.join(self.tmp_dir, "records.json")
+        with open(data_fpath, "w") as f:
+            json.dump({"records": [{"id": i, "name": "a" * 20} for i in range(5000)]}, f)
+        # the parsed document would not fit, it is not parsed
+        with self.assertRaises(MemoryBudgetError):
+            InferJSONSchema(data_fpath, max_memory=get_rss_bytes() + 2 ** 20).create_schema_from_json()
+        schema = InferJSONSchema(data_fpath, max_memory=get_rss_bytes() + 100 * 2 ** 20).create_schema_from_json()
+        assert schema == InferJSONSchema(data_fpath).create_schema_from_json()
+
+    def test_infer_rows_without_values_with_memory_budget(self):
+        for content in ["a,b\n", "a,b\n\n\n"]:  # header only, blank rows only
+            data_fpath = os.path.join(self.tmp_dir, "empty.csv")
+            with open(data_fpath, "w") as f:
+                f.write(content)
+            gt_schema = InferCSVSchema(data_fpath).create_schema_from_csv()
+            assert '"a": empty' in gt_schema
+            for chunksize in [None, 1000]:
+                infer = InferCSVSchema(data_fpath, chunksize=chunksize, max_memory=get_rss_bytes() + 200 * 2 ** 20)
+                assert infer.create_schema_from_csv() == gt_schema
+                assert infer.memory_budget.row_bytes >= 1
@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import infer_schema.utils.profiling as profiling
+from infer_schema.infer_csv_schema import InferCSVSchema
+from infer_schema.infer_json_schema import InferJSONSchema
+
+
+class ProfilingTest(unittest.TestCase):
+    """Tests for the opt-in instrumentation of schema inference"""
+
+    test_data_file = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), ProfilingTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_profile_csv(self):
+        with profiling.profile() as profiler:
+            InferCSVSchema(self.test_data_file).run(os.path.join(self.tmp_dir, "schema.csvs"))
+        assert profiling.PROFILER is None
+        trace = profiler.to_dict()
+        assert list(trace["stages"]) == ["separator", "cache", "read", "accumulate", "schema", "serialize", "write",
+                                         "validate"]
+        assert all(stage["calls"] == 1 for stage in trace["stages"].values())
+        assert len(trace["columns"]) == 12
+        assert trace["predicates"]["check_is_bool"]["calls"] == 12
+        assert trace["bytes_read"] == 2 * os.path.getsize(self.test_data_file)  # inference and validation
+        assert trace["peak_rss_bytes"] > 0
+        assert json.loads(profiler.to_json())["bytes_read"] == trace["bytes_read"]
+
+        lines = profiler.to_prometheus().splitlines()
+        assert "# TYPE infer_schema_stage_seconds gauge" in lines
+        assert 'infer_schema_predicate_calls_total{predicate="check_is_bool"} 12' in lines
+        assert f"infer_schema_bytes_read_total {trace['bytes_read']}" in lines
+
+    def test_profile_json(self):
+        json_fpath = os.path.join(self.tmp_dir, "data.jsonl")
+        with open(json_fpath, "w") as f:
+            f.write('{"id": 1}\n{"id": 2, "name": "a"}\n')
+        with profiling.profile() as profiler:
+            InferJSONSchema(json_fpath).run(os.path.join(self.tmp_dir, "schema.json"))
+        assert list(profiler.to_dict()["stages"]) == ["cache", "infer", "schema", "write", "validate"]
+        assert profiler.bytes_read == 2 * os.path.getsize(json_fpath)
+
+    def test_label_escaping(self):
+        assert profiling.label("column", 'a "b"\\c\n') == '{column="a \\"b\\"\\\\c\\n"}'
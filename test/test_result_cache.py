@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from infer_schema.utils.result_cache import ResultCache
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Tests for the cache of inference results"""
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), ResultCacheTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        self.data_fpath = os.path.join(self.tmp_dir, "data.csv")
+        with open(self.data_fpath, "w") as f:
+            f.write("a\n1\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key_changes_with_file(self):
+        for hash_content in [False, True]:
+            cache = ResultCache(os.path.join(self.tmp_dir, "cache"), hash_content=hash_content)
+            key = cache.get_key(self.data_fpath, {"p": 1})
+            assert key == cache.get_key(self.data_fpath, {"p": 1})
+            assert key != cache.get_key(self.data_fpath, {"p": 2})
+            with open(self.data_fpath, "a") as f:
+                f.write("2\n")
+            assert key != cache.get_key(self.data_fpath, {"p": 1})
+
+    def test_lru_eviction(self):
+        cache = ResultCache(os.path.join(self.tmp_dir, "cache"), max_size=150)  # room for two entries
+        for key in ["a", "b", "c"]:
+            cache.put(key, {"schema": key * 50})
+            time.sleep(0.01)
+        assert cache.get("a") is None and cache.get("b") == {"schema": "b" * 50}
+        time.sleep(0.01)
+        cache.put("d", {"schema": "d" * 50})
+        # b was used more recently than c, so c is evicted
+        assert cache.get("c") is None
+        assert cache.get("b") is not None and cache.get("d") is not None
@@ -0,0 +1,72 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from infer_schema.client import main, submit
+
+
+class ServiceTest(unittest.TestCase):
+    """Tests for the inference service and its client"""
+
+    test_data_file = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+
+    def setUp(self) -> None:
+        self.tmp_dir = os.path.join(tempfile.gettempdir(), ServiceTest.__name__)
+        if os.path.exists(self.tmp_dir):
+            shutil.rmtree(self.tmp_dir)
+        os.makedirs(self.tmp_dir)
+        shutil.copy(self.test_data_file, os.path.join(self.tmp_dir, "a.csv"))
+        with open(os.path.join(self.tmp_dir, "b.jsonl"), "w") as f:
+            f.write('{"id": 1}\n{"id": 2}\n')
+        self.socket_fpath = os.path.join(self.tmp_dir, "service.sock")
+        self.service = subprocess.Popen([sys.executable, "-m", "infer_schema.service", "--socket", self.socket_fpath,
+                                         "--jobs", "2", "--queue-size", "1"], cwd=os.getcwd())
+        for _ in range(300):
+            if os.path.exists(self.socket_fpath):
+                break
+            time.sleep(0.1)
+
+    def tearDown(self) -> None:
+        if self.service.poll() is None:
+            self.service.kill()
+            self.service.wait()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_service(self):
+        data_fpaths = [os.path.join(self.tmp_dir, fname) for fname in ["a.csv", "b.jsonl"]]
+        requests = [{"id": i, "type": "infer", "data_fpath": data_fpaths[i % 2]} for i in range(10)]
+        requests.append({"id": "bad", "type": "infer", "data_fpath": data_fpaths[0], "options": {"jobs": 4}})
+        responses = submit(requests, self.socket_fpath)
+        # more jobs than workers and queue slots are accepted one after another
+        assert [response["status"] for response in responses] == ["valid"] * 10 + ["error"]
+        with open(os.path.join(self.tmp_dir, "a_schema-draft.csvs"), "r") as f:
+            assert responses[0]["schema"] == f.read()
+        assert responses[1]["format"] == "json" and responses[1]["seconds"] <= responses[1]["total_seconds"]
+
+        responses = submit([{"id": 0, "type": "validate", "data_fpath": data_fpaths[0]},
+                            {"id": 1, "type": "validate", "data_fpath": data_fpaths[0],
+                             "schema_fpath": os.path.join(self.tmp_dir, "missing.csvs")},
+                            {"id": 2, "type": "ping"}], self.socket_fpath)
+        assert [response["status"] for response in responses] == ["valid", "error", "ok"]
+
+        assert responses[2]["n_jobs"] >= 11  # ping is answered at once, the validation jobs may still run
+
+        # clients cannot make the service write outside of the directory of the data file
+        outside_fpath = os.path.join(os.path.dirname(self.tmp_dir), "outside_schema-draft.csvs")
+        responses = submit([{"id": 0, "type": "infer", "data_fpath": data_fpaths[0], "schema_fpath": outside_fpath},
+                            {"id": 1, "type": "infer", "data_fpath": data_fpaths[0],
+                             "schema_fpath": os.path.join(self.tmp_dir, "sub", "..", "other.csvs")},
+                            {"id": 2, "type": "infer", "data_fpath": data_fpaths[0], "options": {"cache_dir": "/"}}],
+                           self.socket_fpath)
+        assert [response["status"] for response in responses] == ["error", "valid", "error"]
+        assert "directory of the data file" in responses[0]["error"] and not os.path.exists(outside_fpath)
+
+        assert main(["--socket", self.socket_fpath, "--no-schema", "--chunksize", "5", data_fpaths[0]]) == 0
+        assert main(["--socket", self.socket_fpath, "--shutdown"]) == 0
+        assert self.service.wait(timeout=30) == 0
+        assert not os.path.exists(self.socket_fpath)
+        assert main(["--socket", self.socket_fpath, "--ping"]) == 2
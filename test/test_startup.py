@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from infer_schema.infer_csv_schema import InferCSVSchema
+from infer_schema.utils.literal_table import get_source_hash, get_table_fpath, resolve_literals
+
+
+def get_imported_modules(code: str) -> set:
+    """
+    :param code: python code to run in a new interpreter
+    :return: names of the top level packages imported by the code
+    """
+    code += "\nimport sys; print(' '.join(sorted({name.split('.')[0] for name in sys.modules})))"
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return set(output.split())
+
+
+class StartupTest(unittest.TestCase):
+    """Guards against regressions of the start-up time of the CLI, see benchmarks/startup.py for timings"""
+
+    test_data_file = os.path.join(os.getcwd(), "test", "test-data", "dummy.csv")
+
+    def test_lazy_imports(self):
+        modules = get_imported_modules("import infer_schema.main, infer_schema.batch")
+        assert not modules & {"pandas", "numpy", "omegaconf", "genson", "jsonschema"}
+        assert "resource" not in modules  # Unix only, the CLI also runs on Windows
+
+        # csv inference loads the precompiled literal table without omegaconf
+        modules = get_imported_modules(f"from infer_schema.infer_csv_schema import InferCSVSchema\n"
+                                       f"InferCSVSchema({self.test_data_file!r}).create_schema_from_csv()")
+        assert "pandas" in modules and "omegaconf" not in modules
+
+    def test_literal_table_up_to_date(self):
+        with open(get_table_fpath(InferCSVSchema.literals_fpath), "r") as f:
+            table = json.load(f)
+        assert table["source_hash"] == get_source_hash(InferCSVSchema.literals_fpath), \
+            "rebuild the table with python -m infer_schema.utils.literal_table"
+        assert table["literals"] == resolve_literals(InferCSVSchema.literals_fpath)